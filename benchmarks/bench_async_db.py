@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Async DB qatlami benchmarki
+Bir vaqtda kelgan N ta update'ni simulyatsiya qiladi: har bir update bitta
+sekin so'rov (pg_sleep) bajaradi. Sinxron chaqiruv event loop'ni bloklaydi,
+AsyncDatabase esa so'rovlarni executor'da parallel bajaradi.
+
+Ishlatish:
+    DATABASE_URL=postgresql://... python benchmarks/bench_async_db.py [updates] [delay_sec]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, AsyncDatabase
+
+
+async def run_sync(db: Database, updates: int, delay: float) -> float:
+    """Eski usul: handler sinxron metodni to'g'ridan-to'g'ri chaqiradi"""
+    async def handler():
+        db.execute_query("SELECT pg_sleep(%s)", (delay,))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[handler() for _ in range(updates)])
+    return time.perf_counter() - start
+
+
+async def run_async(adb: AsyncDatabase, updates: int, delay: float) -> float:
+    """Yangi usul: handler AsyncDatabase metodini await qiladi"""
+    async def handler():
+        await adb.execute_query("SELECT pg_sleep(%s)", (delay,))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[handler() for _ in range(updates)])
+    return time.perf_counter() - start
+
+
+async def main():
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+    db = Database()
+    adb = AsyncDatabase(db)
+
+    try:
+        sync_time = await run_sync(db, updates, delay)
+        async_time = await run_async(adb, updates, delay)
+    finally:
+        adb.close()
+
+    print(f"Update'lar: {updates}, so'rov kechikishi: {delay * 1000:.0f} ms")
+    print(f"Sinxron (oldin):  {sync_time:.3f} s, {updates / sync_time:.1f} update/s")
+    print(f"Async (keyin):    {async_time:.3f} s, {updates / async_time:.1f} update/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Indekslar benchmarki
+Alohida (bo'sh) bazaga N ta vazifa (standart 1 000 000) yoziladi va asosiy
+so'rovlar EXPLAIN ANALYZE bilan indekslarsiz va indekslar bilan o'lchanadi.
+
+DIQQAT: BENCH_DATABASE_URL dagi jadvallar tozalanadi (TRUNCATE) - ishchi
+bazani ko'rsatmang.
+
+Ishlatish:
+    BENCH_DATABASE_URL=postgresql://.../ishbot_bench python benchmarks/bench_indexes.py [tasks]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from migrations import SCHEMA_INDEXES
+
+USERS = 1000
+
+# (nomi, so'rov) - handlerlardagi so'rovlar bilan bir xil
+QUERIES = [
+    ("Xodimning faol vazifalari", """
+        SELECT t.*, u1.full_name as creator_name, u2.full_name as rejector_name
+        FROM tasks t
+        JOIN users u1 ON t.created_by = u1.id
+        LEFT JOIN users u2 ON t.rejected_by = u2.id
+        WHERE t.assigned_to = 42 AND t.status IN ('REJALASHTIRILGAN', 'JARAYONDA')
+        ORDER BY t.created_at DESC
+    """),
+    ("Muddati o'tganlar skaneri", """
+        SELECT t.*, u.telegram_id, u.full_name as assigned_name
+        FROM tasks t
+        JOIN users u ON t.assigned_to = u.id
+        WHERE t.deadline < NOW()
+        AND t.status IN ('REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA')
+    """),
+    ("Eslatmalar uchun faol vazifalar", """
+        SELECT t.*, u.telegram_id, u.full_name as assigned_name
+        FROM tasks t
+        JOIN users u ON t.assigned_to = u.id
+        WHERE t.status IN ('REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA')
+        AND u.is_active = TRUE
+    """),
+    ("Tasdiqlash kutilmoqda", """
+        SELECT t.*, u.full_name as assigned_name
+        FROM tasks t
+        JOIN users u ON t.assigned_to = u.id
+        WHERE t.status = 'TASDIQLASH_KUTILMOQDA'
+        ORDER BY t.created_at DESC
+    """),
+    ("Sana bo'yicha qidiruv", """
+        SELECT t.*, u.full_name as assigned_name
+        FROM tasks t
+        LEFT JOIN users u ON t.assigned_to = u.id
+        WHERE t.created_at >= (CURRENT_DATE - 30) AND t.created_at < (CURRENT_DATE - 30) + 1
+        ORDER BY t.created_at DESC
+    """),
+    ("Audit log (oxirgi 50)", """
+        SELECT al.*, u.full_name, u.role
+        FROM audit_log al
+        JOIN users u ON al.user_id = u.id
+        ORDER BY al.created_at DESC
+        LIMIT 50
+    """),
+    ("Deadline uzaytirish tarixi", """
+        SELECT tde.*, u.full_name as extended_by_name
+        FROM task_deadline_extensions tde
+        JOIN users u ON tde.extended_by = u.id
+        WHERE tde.task_id = 'T-500000'
+        ORDER BY tde.created_at DESC
+    """),
+    ("Adminlar", """
+        SELECT * FROM users WHERE role IN ('ADMIN', 'SUPER_ADMIN') AND is_active = TRUE
+    """),
+]
+
+
+def seed(cursor, tasks: int):
+    """Test ma'lumotlarini yozish"""
+    cursor.execute("""
+        TRUNCATE task_deadline_extensions, task_comments, task_files, audit_log, tasks, users
+        RESTART IDENTITY CASCADE
+    """)
+    cursor.execute("""
+        INSERT INTO users (telegram_id, full_name, role, is_active)
+        SELECT 1000000 + g, 'Foydalanuvchi ' || g,
+               CASE WHEN g <= 10 THEN 'ADMIN' WHEN g = 11 THEN 'SUPER_ADMIN' ELSE 'WORKER' END,
+               g % 50 <> 0
+        FROM generate_series(1, %s) g
+    """, (USERS,))
+    # Ko'pchilik vazifalar yakunlangan, ~5% faol - real bazadagi taqsimotga yaqin
+    cursor.execute("""
+        INSERT INTO tasks (id, title, created_by, assigned_to, start_at, deadline, priority, status, created_at)
+        SELECT 'T-' || g, 'Vazifa ' || g, 1 + g % 11, 12 + g % (%s - 11),
+               c, c + interval '3 days', 'ORTA',
+               CASE WHEN r < 0.02 THEN 'REJALASHTIRILGAN'
+                    WHEN r < 0.04 THEN 'JARAYONDA'
+                    WHEN r < 0.05 THEN 'TASDIQLASH_KUTILMOQDA'
+                    WHEN r < 0.07 THEN 'MUDDATI_OTGAN'
+                    WHEN r < 0.10 THEN 'RAD_ETILDI'
+                    ELSE 'BAJARILDI' END,
+               c
+        FROM (
+            SELECT g, random() AS r, NOW() - (random() * interval '730 days') AS c
+            FROM generate_series(1, %s) g
+        ) s
+    """, (USERS, tasks))
+    cursor.execute("""
+        INSERT INTO audit_log (user_id, action, details, created_at)
+        SELECT 1 + g % %s, 'TASK_CREATED', 'T-' || g, NOW() - (random() * interval '730 days')
+        FROM generate_series(1, %s) g
+    """, (USERS, tasks))
+    cursor.execute("""
+        INSERT INTO task_deadline_extensions (task_id, extended_by, old_deadline, new_deadline, extension_hours)
+        SELECT 'T-' || (g * 10), 1, NOW(), NOW() + interval '1 day', 24
+        FROM generate_series(1, %s) g
+    """, (tasks // 10,))
+
+
+def explain(cursor, query: str) -> tuple:
+    """So'rov rejasi (birinchi qator) va bajarilish vaqti (ms)"""
+    cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query)
+    plan = cursor.fetchone()[0][0]
+    node = plan['Plan']
+    # Eng ichki skan tugunini topish
+    while node.get('Plans') and 'Scan' not in node['Node Type']:
+        node = node['Plans'][0]
+    return node['Node Type'], plan['Execution Time']
+
+
+def measure(cursor) -> list:
+    cursor.execute("ANALYZE")
+    results = []
+    for _, query in QUERIES:
+        explain(cursor, query)  # keshni isitish
+        results.append(explain(cursor, query))
+    return results
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    url = os.getenv('BENCH_DATABASE_URL')
+    if not url:
+        print("BENCH_DATABASE_URL o'rnatilmagan")
+        sys.exit(1)
+
+    db = Database(url)
+    conn = db.get_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        for name, _ in SCHEMA_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+        start = time.perf_counter()
+        seed(cursor, tasks)
+        print(f"{tasks} ta vazifa yozildi: {time.perf_counter() - start:.1f} s")
+
+        before = measure(cursor)
+
+        start = time.perf_counter()
+        for _, index_sql in SCHEMA_INDEXES:
+            cursor.execute(index_sql)
+        print(f"Indekslar yaratildi: {time.perf_counter() - start:.1f} s\n")
+
+        after = measure(cursor)
+    finally:
+        conn.autocommit = False
+        db.return_connection(conn)
+        db.close()
+
+    print(f"{'Sorov':<34} {'Oldin':>28} {'Keyin':>28}")
+    for (name, _), (node_b, ms_b), (node_a, ms_a) in zip(QUERIES, before, after):
+        print(f"{name:<34} {node_b:>17} {ms_b:>8.2f} ms {node_a:>17} {ms_a:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Ixcham qatorlar (compact) benchmarki
+100k qatorli natija uchun RealDictCursor + dict() nusxa va Record qatorlarning
+xotira (tracemalloc) va vaqt sarfini solishtiradi. So'rov generate_series
+orqali vazifalar eksportiga o'xshash 20 ustunli qatorlar qaytaradi - jadval
+to'ldirish shart emas.
+
+Ishlatish:
+    DATABASE_URL=postgresql://... python benchmarks/bench_records.py [rows]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+QUERY = """
+    SELECT
+        'T-' || g as id, 'Vazifa ' || g as title, 'Tavsif' as description,
+        'JARAYONDA' as status, 'ORTA' as priority,
+        NOW() as start_at, NOW() + interval '1 day' as deadline,
+        NULL::timestamp as completed_at, NULL::timestamp as approved_at, NULL::timestamp as rejected_at,
+        FALSE as is_penalized, 0 as penalty_amount, NOW() as created_at,
+        'Admin' as creator_name, '+998900000000' as creator_phone,
+        'Ishchi ' || g as assigned_name, '+998900000001' as assigned_phone,
+        NULL as approver_name, NULL as rejector_name, NOW() as original_deadline
+    FROM generate_series(1, %s) g
+"""
+
+
+def measure(db: Database, rows: int, compact: bool):
+    """Natija ro'yxati egallagan xotira va o'qish vaqti"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = db.execute_query(QUERY, (rows,), compact=compact)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Qatorlarni o'qish (eksport kabi)
+    start = time.perf_counter()
+    for row in result:
+        row['id'], row['title'], row['deadline'], row['assigned_name']
+    access = time.perf_counter() - start
+    del result
+    return current, peak, elapsed, access
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    db = Database()
+    try:
+        db.execute_query(QUERY, (10,))  # isitish
+        results = {
+            'dict (oldin)': measure(db, rows, compact=False),
+            'Record (keyin)': measure(db, rows, compact=True),
+        }
+    finally:
+        db.close()
+
+    print(f"Qatorlar: {rows}")
+    for name, (current, peak, elapsed, access) in results.items():
+        print(f"  {name:<15} natija {current / 1024 / 1024:7.1f} MB, cho'qqi {peak / 1024 / 1024:7.1f} MB, "
+              f"o'qish {elapsed:.3f} s, kirish {access:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Prepared statement benchmarki
+1) Klient tomoni: har chaqiruvda query.replace('?', '%s') + RETURNING qidirish
+   va ro'yxatdan o'tgan Statement ni olish narxi (bazasiz).
+2) Baza bilan: bir xil so'rovni oddiy satr sifatida (har safar parse/plan)
+   va nomi bilan EXECUTE qilib bajarishning bitta so'rovga to'g'ri keladigan vaqti.
+
+Ishlatish:
+    DATABASE_URL=postgresql://... python benchmarks/bench_statements.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from statements import statement
+
+QUERY = """
+    SELECT t.*, u.full_name as creator_name
+    FROM tasks t
+    JOIN users u ON t.created_by = u.id
+    WHERE t.id = ?
+"""
+
+
+def bench_client(iterations: int):
+    """Faqat klient tomonidagi tayyorlash narxi"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        sql = QUERY.replace('?', '%s')
+        'RETURNING' in sql.upper()
+    old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        stmt = statement('bench_get_task', QUERY)
+        stmt.returning
+    new = time.perf_counter() - start
+
+    print(f"Klient tomoni ({iterations} marta):")
+    print(f"  replace + upper (oldin): {old / iterations * 1e6:.2f} us/so'rov")
+    print(f"  Statement (keyin):       {new / iterations * 1e6:.2f} us/so'rov")
+
+
+def bench_database(iterations: int):
+    """Bazaga so'rov: oddiy satr va nomli EXECUTE"""
+    from database import Database
+
+    db = Database()
+    try:
+        rows = db.execute_query("SELECT id FROM tasks LIMIT 1")
+        task_id = rows[0]['id'] if rows else 'yoq'
+        stmt = statement('bench_get_task', QUERY)
+
+        # Isitish: connection'lar ochiladi va statement prepare qilinadi
+        for _ in range(50):
+            db.execute_query(QUERY, (task_id,))
+            db.execute_query(stmt, (task_id,))
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            db.execute_query(QUERY, (task_id,))
+        plain = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            db.execute_query(stmt, (task_id,))
+        prepared = time.perf_counter() - start
+    finally:
+        db.close()
+
+    print(f"Baza bilan ({iterations} marta):")
+    print(f"  Oddiy so'rov (oldin):   {plain / iterations * 1e6:.1f} us/so'rov")
+    print(f"  EXECUTE nomi (keyin):   {prepared / iterations * 1e6:.1f} us/so'rov")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    bench_client(iterations * 100)
+    bench_database(iterations)
+
+
+if __name__ == "__main__":
+    main()
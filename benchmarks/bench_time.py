@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Vaqt yordamchilari benchmarki
+Oldingi yordamchilar (har chaqiruvda pytz.timezone, localize va strftime) bilan
+timeutils (keshlangan zoneinfo, sikl uchun bitta "hozir", ustun bo'yicha
+formatlash)ni solishtiradi. Baza kerak emas.
+
+Ishlatish:
+    python benchmarks/bench_time.py [rows]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeutils
+from config import DEFAULT_TIMEZONE
+
+
+# Oldingi yordamchilar (utils.py va NotificationHandler'dagi ko'rinishi)
+
+def legacy_get_uzbek_time() -> datetime:
+    tz = pytz.timezone(DEFAULT_TIMEZONE)
+    return datetime.now(tz)
+
+
+def legacy_format_datetime(dt, format_str: str = "%d.%m.%Y %H:%M") -> str:
+    if isinstance(dt, str):
+        dt = datetime.fromisoformat(dt)
+    return dt.strftime(format_str)
+
+
+def legacy_hours_remaining(task) -> float:
+    """check_task_notifications: har vazifada now, parse va localize"""
+    now = legacy_get_uzbek_time()
+    deadline = task['deadline']
+    if isinstance(deadline, str):
+        deadline = datetime.fromisoformat(deadline)
+    if deadline.tzinfo is None:
+        from pytz import timezone
+        deadline = timezone('Asia/Tashkent').localize(deadline)
+    return (deadline - now).total_seconds() / 3600
+
+
+def new_hours_remaining(task, now: datetime) -> float:
+    return (timeutils.localize(task['deadline']) - now).total_seconds() / 3600
+
+
+def bench(func, repeat: int = 3) -> float:
+    """Eng yaxshi natija (soniya)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    base = datetime(2024, 1, 1, 9, 0)
+    # Eksportdagi kabi: sanalar ko'p takrorlanadi (deadline = original_deadline)
+    column = [base + timedelta(minutes=i % 5000) for i in range(rows)]
+    tasks = [{'deadline': dt} for dt in column]
+
+    def legacy_loop():
+        for task in tasks:
+            legacy_hours_remaining(task)
+
+    def new_loop():
+        clock = timeutils.TickClock()
+        now = clock.tick()
+        for task in tasks:
+            new_hours_remaining(task, now)
+
+    results = [
+        ('get_uzbek_time', bench(lambda: [legacy_get_uzbek_time() for _ in range(rows)]),
+         bench(lambda: [timeutils.now() for _ in range(rows)])),
+        ('eslatma sikli', bench(legacy_loop), bench(new_loop)),
+        ('format_datetime', bench(lambda: [legacy_format_datetime(dt) for dt in column]),
+         bench(lambda: [timeutils.format_datetime(dt) for dt in column])),
+        ('ustun formatlash', bench(lambda: [legacy_format_datetime(dt) for dt in column]),
+         bench(lambda: timeutils.format_datetimes(column))),
+    ]
+
+    print(f"Qatorlar: {rows}")
+    for name, old, new in results:
+        print(f"  {name:<17} oldin {old * 1000:8.1f} ms, keyin {new * 1000:8.1f} ms ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
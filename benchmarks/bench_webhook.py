@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Polling va webhook benchmarki
+Lokal soxta Bot API serveri (getUpdates long-poll, setWebhook, sendMessage) ishga
+tushiriladi va yangilanish "Telegram"da paydo bo'lgan paytdan bot javobi (sendMessage)
+serverga yetib kelguncha bo'lgan vaqt ikki rejimda o'lchanadi:
+  polling - PTB Updater.start_polling (getUpdates long-poll)
+  webhook - PTB Updater.start_webhook, soxta server yangilanishni secret token bilan POST qiladi
+Tarmoq kechikishi har bir yo'nalishga --delay ms qo'shib taqlid qilinadi. Bot sifatida
+oddiy echo handler ishlatiladi - baza kerak emas, faqat transport solishtiriladi.
+Webhook qismi uchun python-telegram-bot[webhooks] (tornado) kerak.
+
+Ishlatish:
+    python benchmarks/bench_webhook.py [updates] [--interval MS] [--delay MS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import time
+from urllib.parse import parse_qs
+
+import httpx
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOKEN = "123456:benchmark"
+SECRET_TOKEN = "bench-secret"
+WEBHOOK_PATH = "telegram"
+CHAT = {"id": 1, "type": "private", "first_name": "Bench"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeBotApi:
+    """Minimal Bot API: HTTP/1.1 keep-alive, form-urlencoded so'rovlar.
+
+    Har bir so'rov kelganda va har bir javobdan oldin delay soniya kutiladi (bir
+    yo'nalishdagi tarmoq kechikishi).
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.port = free_port()
+        self.webhook_url = None
+        self.webhook_secret = None
+        self._updates = []
+        self._new_update = asyncio.Event()
+        self._server = None
+        self._client = httpx.AsyncClient(timeout=30)
+        # update_id -> paydo bo'lgan vaqt / javob kelgan vaqt
+        self.injected = {}
+        self.replied = {}
+        self._all_replied = asyncio.Event()
+        self._expected = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self._client.aclose()
+
+    def expect(self, count: int):
+        self._expected = count
+        self.injected.clear()
+        self.replied.clear()
+        self._all_replied.clear()
+
+    async def wait_replies(self, timeout: float):
+        await asyncio.wait_for(self._all_replied.wait(), timeout)
+
+    async def inject(self, update_id: int):
+        """Yangilanish paydo bo'ldi: webhook bo'lsa POST qilinadi, bo'lmasa getUpdates navbatiga"""
+        update = {
+            "update_id": update_id,
+            "message": {"message_id": update_id, "date": int(time.time()), "chat": CHAT,
+                        "from": {"id": 1, "is_bot": False, "first_name": "Bench"},
+                        "text": f"ping {update_id}"},
+        }
+        self.injected[update_id] = time.perf_counter()
+        if self.webhook_url:
+            asyncio.create_task(self._push(update))
+        else:
+            self._updates.append(update)
+            self._new_update.set()
+
+    async def _push(self, update):
+        await asyncio.sleep(self.delay)
+        response = await self._client.post(
+            self.webhook_url, json=update,
+            headers={"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret})
+        if response.status_code != 200:
+            raise RuntimeError(f"Webhook javobi {response.status_code}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                params = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+                await asyncio.sleep(self.delay)
+                result = await self._call(path.rsplit("/", 1)[-1], params)
+                await asyncio.sleep(self.delay)
+
+                payload = json.dumps({"ok": True, "result": result}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _call(self, method: str, params: dict):
+        if method == "getMe":
+            return {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        if method == "setWebhook":
+            self.webhook_url = params["url"]
+            self.webhook_secret = params.get("secret_token")
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = None
+            return True
+        if method == "getUpdates":
+            return await self._get_updates(int(params.get("offset", 0)), float(params.get("timeout", 0)))
+        if method == "sendMessage":
+            update_id = int(params["text"].split()[-1])
+            self.replied[update_id] = time.perf_counter()
+            if len(self.replied) >= self._expected:
+                self._all_replied.set()
+            return {"message_id": update_id, "date": int(time.time()), "chat": CHAT, "text": params["text"]}
+        return True
+
+    async def _get_updates(self, offset: int, timeout: float):
+        self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if not self._updates:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        updates, self._updates = self._updates, []
+        return updates
+
+    def latencies_ms(self):
+        return [(self.replied[update_id] - started) * 1000 for update_id, started in self.injected.items()]
+
+
+async def echo(update: Update, context):
+    await update.message.reply_text(update.message.text)
+
+
+async def run_mode(mode: str, updates: int, interval: float, delay: float):
+    api = FakeBotApi(delay)
+    await api.start()
+    app = Application.builder().token(TOKEN).base_url(api.base_url).build()
+    app.add_handler(MessageHandler(filters.TEXT, echo))
+
+    async with app:
+        if mode == "webhook":
+            port = free_port()
+            await app.updater.start_webhook(
+                listen="127.0.0.1", port=port, url_path=WEBHOOK_PATH,
+                webhook_url=f"http://127.0.0.1:{port}/{WEBHOOK_PATH}", secret_token=SECRET_TOKEN)
+        else:
+            await app.updater.start_polling(timeout=10)
+        await app.start()
+        # Ulanishlar ochilishi va birinchi getUpdates yetib borishi uchun
+        await asyncio.sleep(0.5)
+
+        api.expect(updates)
+        for update_id in range(1, updates + 1):
+            await api.inject(update_id)
+            await asyncio.sleep(interval)
+        await api.wait_replies(timeout=60)
+
+        await app.updater.stop()
+        await app.stop()
+    await api.stop()
+    return api.latencies_ms()
+
+
+def report(mode: str, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{mode:8} n={len(latencies):4}  o'rtacha={statistics.mean(latencies):7.2f} ms  "
+          f"p50={statistics.median(latencies):7.2f} ms  p95={p95:7.2f} ms  max={latencies[-1]:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polling va webhook kechikishi")
+    parser.add_argument("updates", nargs="?", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=100,
+                        help="yangilanishlar oralig'i, ms (handler javobidan qisqa bo'lsa navbat o'lchanadi)")
+    parser.add_argument("--delay", type=float, default=20, help="bir yo'nalishdagi tarmoq kechikishi, ms")
+    args = parser.parse_args()
+
+    print(f"{args.updates} ta yangilanish, oralig'i {args.interval} ms, tarmoq kechikishi {args.delay} ms "
+          f"(RTT {2 * args.delay} ms)")
+    for mode in ("polling", "webhook"):
+        latencies = asyncio.run(run_mode(mode, args.updates, args.interval / 1000, args.delay / 1000))
+        report(mode, latencies)
+
+
+if __name__ == "__main__":
+    main()
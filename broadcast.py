@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Hashable, List, Tuple
+
+from telegram import Bot
+
+from config import BROADCAST_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastResult:
+    """Tarqatish natijasi: yetkazilgan va xato bo'lgan chatlar"""
+
+    __slots__ = ('name', 'total', 'sent', 'failed', 'elapsed')
+
+    def __init__(self, name: str, total: int):
+        self.name = name
+        self.total = total
+        self.sent = 0
+        # xabar kaliti -> xato
+        self.failed: Dict[Hashable, Exception] = {}
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return f"BroadcastResult({self.name!r}, sent={self.sent}/{self.total}, failed={len(self.failed)})"
+
+
+class Broadcaster:
+    """Ko'p xabarni cheklangan parallellik bilan yuborish.
+
+    Bir vaqtda ko'pi bilan concurrency ta so'rov yuboriladi (tezlik cheklovi -
+    OutboundGateway'da). OutboxDispatcher paketlarini shu orqali yuboradi.
+    """
+
+    def __init__(self, concurrency: int = BROADCAST_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self._batches = 0
+        self._sent = 0
+        self._failed = 0
+
+    async def deliver(self, bot: Bot, messages: List[Tuple[Hashable, Any, str, int, Dict[str, Any]]],
+                      name: str = "broadcast") -> BroadcastResult:
+        """Har xil xabarlarni cheklangan parallellik bilan yuborib, natijani kutish.
+
+        messages: [(kalit, chat_id, matn, ustuvorlik, send_message kwargs), ...];
+        natijadagi failed - kalit bo'yicha xatolar.
+        """
+        result = BroadcastResult(name, len(messages))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async def send_one(key, chat_id, text, priority, kwargs):
+            async with semaphore:
+                try:
+                    await bot.send_message(chat_id=chat_id, text=text, rate_limit_args=priority, **kwargs)
+                    result.sent += 1
+                except Exception as e:
+                    result.failed[key] = e
+                    logger.error(f"{name}: {chat_id} ga xabar yuborishda xatolik: {e}")
+
+        await asyncio.gather(*(send_one(*message) for message in messages))
+        result.elapsed = time.monotonic() - started
+        self._batches += 1
+        self._sent += result.sent
+        self._failed += len(result.failed)
+        logger.info(f"{name}: {result.sent}/{result.total} ta yetkazildi, "
+                    f"{len(result.failed)} ta xato ({result.elapsed:.2f} s)")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Tarqatish metrikalarini olish"""
+        return {
+            'batches': self._batches,
+            'sent': self._sent,
+            'failed': self._failed,
+        }
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Keshda topilmaganini bildiradi (None ham qiymat bo'lishi mumkin)
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU kesh: har bir yozuv ttl soniya yashaydi, hajm maxsize dan oshsa
+    eng uzoq ishlatilmagan yozuv chiqarib yuboriladi. maxsize=0 yoki ttl=0 - kesh o'chiq.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrikalar
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Qiymatni olish (muddati o'tgan yozuv o'chiriladi)"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self._misses += 1
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Qiymatni yozish"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Yozuvni o'chirish"""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Kesh metrikalarini olish"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+            }
+
+
+class UserCache:
+    """Foydalanuvchilar identity keshi: bitta yozuv telegram_id va ichki id
+    bo'yicha topiladi.
+
+    Yozish (rol, ism, telefon, faollik) yozuvni o'chiradi va generation'ni
+    oshiradi - yozishdan oldin boshlangan o'qish natijasi keshga tushmaydi.
+    Qaytariladigan dict nusxa, shuning uchun chaqiruvchi uni o'zgartirishi
+    keshga ta'sir qilmaydi.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        # Har bir foydalanuvchi ikki kalit bilan saqlanadi
+        self._cache = TTLCache(maxsize * 2, ttl)
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        user = self._cache.get(('telegram_id', telegram_id))
+        return dict(user) if user is not None else None
+
+    def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        user = self._cache.get(('id', user_id))
+        return dict(user) if user is not None else None
+
+    def put(self, user: Dict[str, Any], generation: int):
+        """Bazadan o'qilgan foydalanuvchini saqlash (o'qish davomida invalidatsiya bo'lmagan bo'lsa)"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            user = dict(user)
+            self._cache.set(('id', user['id']), user)
+            self._cache.set(('telegram_id', user['telegram_id']), user)
+
+    def invalidate(self, user_id: int):
+        """Foydalanuvchi yozuvini ikkala kalit bo'yicha o'chirish"""
+        with self._lock:
+            self.generation += 1
+            user = self._cache.pop(('id', user_id))
+            if user is not None:
+                self._cache.pop(('telegram_id', user['telegram_id']))
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats['size'] //= 2
+        stats['maxsize'] //= 2
+        return stats
+
+
+class UserRoster:
+    """Faol foydalanuvchilarning xotiradagi o'zgarmas ro'yxati: rol, id va
+    telegram_id bo'yicha indekslangan.
+
+    Qatorlar o'zgarmas (Record), shuning uchun ro'yxatlar nusxalanmasdan
+    beriladi. Rol yoki faollik o'zgarganda butun ro'yxat yangisiga almashtiriladi.
+    """
+
+    __slots__ = ('active', 'by_id', 'by_telegram_id', 'by_role')
+
+    def __init__(self, users):
+        # Tartib - full_name bo'yicha (bazadan shunday keladi)
+        self.active = tuple(users)
+        self.by_id = {user['id']: user for user in self.active}
+        self.by_telegram_id = {user['telegram_id']: user for user in self.active}
+        by_role: Dict[str, list] = {}
+        for user in self.active:
+            by_role.setdefault(user['role'], []).append(user)
+        self.by_role = {role: tuple(users) for role, users in by_role.items()}
+
+    def with_roles(self, roles) -> list:
+        """Berilgan rollardagi faol foydalanuvchilar (full_name tartibida)"""
+        if len(roles) == 1:
+            return list(self.by_role.get(roles[0], ()))
+        roles = set(roles)
+        return [user for user in self.active if user['role'] in roles]
+
+    def __len__(self):
+        return len(self.active)
@@ -0,0 +1,215 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Any
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolError(Exception):
+    """Connection pool xatosi"""
+
+
+class PoolTimeout(PoolError):
+    """Belgilangan vaqt ichida bo'sh connection topilmadi"""
+
+
+class PooledConnection(extensions.connection):
+    """Pool connectioni: server tomonda prepare qilingan statement nomlarini eslab qoladi"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool.
+
+    - min_size/max_size: ochiq connectionlar soni chegarasi
+    - timeout: bo'sh connection kutish vaqti (soniya)
+    - max_waiting: navbatda kutayotganlar soni chegarasi (0 - cheklanmagan)
+    - validate_idle: shuncha soniya ishlatilmagan connection checkout paytida
+      SELECT 1 bilan tekshiriladi; uzilgan connection yangisiga almashtiriladi
+    - read_only: connectionlar READ ONLY sessiya bilan ochiladi (replika uchun)
+    """
+
+    def __init__(self, min_size: int, max_size: int, timeout: float = 10.0,
+                 max_waiting: int = 0, validate_idle: float = 30.0, read_only: bool = False,
+                 **conn_kwargs):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Noto'g'ri pool hajmi: min={min_size}, max={max_size}")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_waiting = max_waiting
+        self.validate_idle = validate_idle
+        self.read_only = read_only
+        self.conn_kwargs = conn_kwargs
+
+        self._cond = threading.Condition()
+        # (connection, oxirgi ishlatilgan vaqt)
+        self._idle = deque()
+        self._in_use = set()
+        # Ochiq (yoki ochilayotgan) connectionlar soni
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Metrikalar
+        self._checkouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._errors = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._discarded = 0
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        """Yangi connection ochish"""
+        conn = psycopg2.connect(connection_factory=PooledConnection, **self.conn_kwargs)
+        if self.read_only:
+            conn.set_session(readonly=True)
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, conn, last_used: float) -> bool:
+        """Connection ishlatishga yaroqliligini tekshirish"""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.validate_idle:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Eskirgan connection aniqlandi, qayta ulanilmoqda: {e}")
+            return False
+
+    def getconn(self):
+        """Pool'dan connection olish (kerak bo'lsa timeout gacha kutadi)"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        conn = None
+        last_used = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool yopilgan")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Joy band qilinadi, connection lock'dan tashqarida ochiladi
+                    self._size += 1
+                    break
+                if self.max_waiting and self._waiting >= self.max_waiting:
+                    self._errors += 1
+                    raise PoolError(f"Connection navbati to'la ({self._waiting} ta kutmoqda)")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"{self.timeout} soniya ichida bo'sh connection topilmadi")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not self._is_usable(conn, last_used):
+                self._close_quietly(conn)
+                conn = self._connect()
+                with self._cond:
+                    self._reconnects += 1
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._errors += 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._in_use.add(conn)
+            self._checkouts += 1
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+        return conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Connectionni pool'ga qaytarish; buzilgan connection yopiladi"""
+        with self._cond:
+            if conn not in self._in_use:
+                raise PoolError("Bu connection pool'dan olinmagan")
+            self._in_use.discard(conn)
+
+        broken = discard or conn.closed
+        if not broken:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                broken = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                # Yakunlanmagan tranzaksiyani bekor qilish
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+
+        with self._cond:
+            if broken or self._closed:
+                self._close_quietly(conn)
+                self._size -= 1
+                if broken:
+                    self._discarded += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        """Barcha bo'sh connectionlarni yopish va pool'ni yopiq deb belgilash"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close_quietly(conn)
+                self._size -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool metrikalarini olish"""
+        with self._cond:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': self._waiting,
+                'checkouts': self._checkouts,
+                'wait_time_total': round(self._wait_time_total, 6),
+                'wait_time_avg': round(self._wait_time_total / self._checkouts, 6) if self._checkouts else 0.0,
+                'wait_time_max': round(self._wait_time_max, 6),
+                'errors': self._errors,
+                'timeouts': self._timeouts,
+                'reconnects': self._reconnects,
+                'discarded': self._discarded,
+            }
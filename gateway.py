@@ -0,0 +1,291 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Coroutine, Deque, Dict, List, Optional, Tuple, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from config import (TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST, TELEGRAM_GROUP_RATE,
+                    TELEGRAM_MAX_RETRIES, TELEGRAM_QUEUE_SIZE)
+
+logger = logging.getLogger(__name__)
+
+# Navbat yo'laklari (kichik raqam - yuqori ustuvorlik). Bot metodlariga
+# rate_limit_args sifatida beriladi: bot.send_message(..., rate_limit_args=PRIORITY_NOTIFICATION)
+PRIORITY_INTERACTIVE = 0   # foydalanuvchi so'roviga javob (default)
+PRIORITY_NOTIFICATION = 1  # boshqa foydalanuvchiga xabar, eslatmalar
+PRIORITY_BROADCAST = 2     # ommaviy tarqatish
+LANE_NAMES = ('interactive', 'notification', 'broadcast')
+
+# Bo'sh (to'lgan) chat bucketlari shuncha chatdan oshganda tozalanadi
+_MAX_IDLE_BUCKETS = 1024
+# Throughput shu oyna (soniya) bo'yicha hisoblanadi
+_THROUGHPUT_WINDOW = 60.0
+
+
+class GatewayError(Exception):
+    """Chiquvchi xabarlar shlyuzi xatosi"""
+
+
+class GatewayQueueFull(GatewayError):
+    """Fon yo'lagi navbati to'la - xabar tashlab yuborildi"""
+
+
+class TokenBucket:
+    """Token bucket: soniyasiga rate token, ko'pi bilan capacity (burst)"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Keyingi token uchun kutish vaqti (0 - hozir mavjud)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    if hasattr(retry_after, 'total_seconds'):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class OutboundGateway(BaseRateLimiter):
+    """Telegram'ga chiquvchi barcha so'rovlar uchun markaziy shlyuz (PTB rate limiter).
+
+    - global token bucket (TELEGRAM_GLOBAL_RATE xabar/soniya) va har bir chat uchun
+      alohida bucket (shaxsiy chat - TELEGRAM_CHAT_RATE, guruh/kanal - TELEGRAM_GROUP_RATE)
+    - ustuvorlik yo'laklari: interaktiv javoblar eslatma va tarqatishlardan oldin o'tadi;
+      bitta yo'lak ichida chatlar navbat bilan (round-robin), bitta chat ichida - tartib bilan
+    - RetryAfter kelsa barcha yuborish retry_after davomida to'xtatiladi va so'rov
+      navbat boshidan qayta yuboriladi (TELEGRAM_MAX_RETRIES martagacha)
+    - fon yo'laklari navbati TELEGRAM_QUEUE_SIZE bilan cheklangan, oshsa GatewayQueueFull
+
+    chat_id'siz so'rovlar (getUpdates, answerCallbackQuery va h.k.) cheklovsiz o'tadi.
+    """
+
+    def __init__(self, global_rate: float = TELEGRAM_GLOBAL_RATE, chat_rate: float = TELEGRAM_CHAT_RATE,
+                 chat_burst: float = TELEGRAM_CHAT_BURST, group_rate: float = TELEGRAM_GROUP_RATE,
+                 max_retries: int = TELEGRAM_MAX_RETRIES, queue_size: int = TELEGRAM_QUEUE_SIZE):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.queue_size = queue_size
+
+        self._global = TokenBucket(global_rate, global_rate, time.monotonic())
+        self._buckets: Dict[Union[int, str], TokenBucket] = {}
+        # Yo'lak -> {chat: [(future, navbatga qo'yilgan vaqt), ...]} (chatlar kelish tartibida)
+        self._lanes: List['OrderedDict[Union[int, str], Deque[Tuple[asyncio.Future, float]]]'] = [
+            OrderedDict() for _ in LANE_NAMES
+        ]
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+
+        # Metrikalar
+        self._depth = [0] * len(LANE_NAMES)
+        self._sent = [0] * len(LANE_NAMES)
+        self._dropped = [0] * len(LANE_NAMES)
+        self._failed = [0] * len(LANE_NAMES)
+        self._wait_total = [0.0] * len(LANE_NAMES)
+        self._wait_max = [0.0] * len(LANE_NAMES)
+        self._granted = [0] * len(LANE_NAMES)
+        self._retry_after = 0
+        self._recent: Deque[float] = deque()
+
+    async def initialize(self) -> None:
+        """Navbat siklini ishga tushirish (Bot.initialize chaqiradi)"""
+        if self._pump_task is None:
+            self._wakeup = asyncio.Event()
+            self._pump_task = asyncio.create_task(self._pump())
+
+    async def shutdown(self) -> None:
+        """Navbat siklini to'xtatish; kutayotgan so'rovlar GatewayError bilan tugaydi"""
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._pump_task
+            self._pump_task = None
+        for lane in self._lanes:
+            for waiters in lane.values():
+                for future, _ in waiters:
+                    if not future.done():
+                        future.set_exception(GatewayError("Chiquvchi xabarlar shlyuzi yopildi"))
+            lane.clear()
+        logger.info(f"Chiquvchi xabarlar shlyuzi to'xtatildi: {self.stats()}")
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Any:
+        chat_id = data.get('chat_id')
+        if chat_id is None:
+            return await callback(*args, **kwargs)
+
+        priority = rate_limit_args if rate_limit_args in (PRIORITY_NOTIFICATION, PRIORITY_BROADCAST) \
+            else PRIORITY_INTERACTIVE
+        with contextlib.suppress(ValueError, TypeError):
+            chat_id = int(chat_id)
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, chat_id, retry=attempt > 0)
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self._retry_after += 1
+                retry_after = _retry_after_seconds(e)
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after + 0.1)
+                if attempt == self.max_retries:
+                    self._failed[priority] += 1
+                    logger.error(f"{endpoint} ({chat_id}): {self.max_retries} marta qayta urinishdan keyin ham RetryAfter")
+                    raise
+                logger.warning(f"{endpoint} ({chat_id}): RetryAfter {retry_after} s, qayta yuboriladi")
+                continue
+            except Exception:
+                self._failed[priority] += 1
+                raise
+            self._sent[priority] += 1
+            self._recent.append(time.monotonic())
+            return result
+
+    async def _acquire(self, priority: int, chat_id: Union[int, str], retry: bool = False):
+        """Navbatga turib, yuborishga ruxsat kutish"""
+        if priority != PRIORITY_INTERACTIVE and self.queue_size and not retry \
+                and self._depth[priority] >= self.queue_size:
+            self._dropped[priority] += 1
+            raise GatewayQueueFull(f"{LANE_NAMES[priority]} navbati to'la ({self._depth[priority]} ta)")
+        if self._pump_task is None:
+            await self.initialize()
+
+        future = asyncio.get_running_loop().create_future()
+        lane = self._lanes[priority]
+        waiters = lane.get(chat_id)
+        if waiters is None:
+            waiters = lane[chat_id] = deque()
+        # Qayta urinish chat navbatining boshiga qo'yiladi - xabarlar tartibi saqlanadi
+        if retry:
+            waiters.appendleft((future, time.monotonic()))
+        else:
+            waiters.append((future, time.monotonic()))
+        self._depth[priority] += 1
+        self._wakeup.set()
+        # Bekor qilingan future'ni navbat sikli tashlab yuboradi
+        await future
+
+    def _bucket(self, chat_id: Union[int, str], now: float) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) > _MAX_IDLE_BUCKETS:
+                self._buckets = {key: b for key, b in self._buckets.items() if not b.is_full(now)}
+            # Manfiy ID yoki @username - guruh/kanal
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = self._buckets[chat_id] = TokenBucket(
+                self.group_rate if is_group else self.chat_rate, self.chat_burst, now
+            )
+        return bucket
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """Ruxsat berish mumkin bo'lgan so'rovlarni ozod qilish.
+
+        Qaytaradi: 0 - yana urinish kerak, soniya - keyingi tokengacha, None - navbat bo'sh.
+        """
+        if now < self._paused_until:
+            return self._paused_until - now if any(self._depth) else None
+        wait = None
+        granted = False
+        for priority, lane in enumerate(self._lanes):
+            for chat_id in list(lane):
+                waiters = lane[chat_id]
+                while waiters and waiters[0][0].done():
+                    waiters.popleft()
+                    self._depth[priority] -= 1
+                if not waiters:
+                    del lane[chat_id]
+                    continue
+                global_wait = self._global.wait_time(now)
+                if global_wait > 0:
+                    return 0.0 if granted else global_wait
+                bucket = self._bucket(chat_id, now)
+                chat_wait = bucket.wait_time(now)
+                if chat_wait > 0:
+                    wait = chat_wait if wait is None else min(wait, chat_wait)
+                    continue
+
+                self._global.take(now)
+                bucket.take(now)
+                future, enqueued_at = waiters.popleft()
+                self._depth[priority] -= 1
+                future.set_result(None)
+                granted = True
+                waited = now - enqueued_at
+                self._granted[priority] += 1
+                self._wait_total[priority] += waited
+                self._wait_max[priority] = max(self._wait_max[priority], waited)
+                if waiters:
+                    # Yo'lak ichida chatlar navbat bilan
+                    lane.move_to_end(chat_id)
+                else:
+                    del lane[chat_id]
+        return 0.0 if granted else wait
+
+    async def _pump(self):
+        """Navbat sikli: token bo'lganda eng yuqori ustuvorlikdagi so'rovni ozod qiladi"""
+        while True:
+            self._wakeup.clear()
+            delay = self._dispatch(time.monotonic())
+            if delay == 0:
+                # Ozod qilingan so'rovlar ishga tushishi uchun
+                await asyncio.sleep(0)
+                continue
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Shlyuz metrikalarini olish"""
+        now = time.monotonic()
+        while self._recent and self._recent[0] < now - _THROUGHPUT_WINDOW:
+            self._recent.popleft()
+        return {
+            'throughput': round(len(self._recent) / _THROUGHPUT_WINDOW, 3),
+            'retry_after': self._retry_after,
+            'paused_for': round(max(0.0, self._paused_until - now), 3),
+            'chats': len(self._buckets),
+            'lanes': {
+                name: {
+                    'queued': self._depth[i],
+                    'sent': self._sent[i],
+                    'dropped': self._dropped[i],
+                    'failed': self._failed[i],
+                    'wait_time_avg': round(self._wait_total[i] / self._granted[i], 6) if self._granted[i] else 0.0,
+                    'wait_time_max': round(self._wait_max[i], 6),
+                }
+                for i, name in enumerate(LANE_NAMES)
+            },
+        }
@@ -1,26 +1,41 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from handlers.base import BaseHandler
+from keyboards import MENUS
 from config import UserRole
 from utils import format_datetime
+from statements import statement
+import tempfile
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Audit loglar - hisobot va eksport uchun oqim bilan o'qiladi
+AUDIT_LOGS_STREAM = statement('stream_audit_logs', """
+    SELECT al.action, al.details, al.created_at, u.full_name, u.role
+    FROM audit_log al
+    JOIN users u ON al.user_id = u.id
+    ORDER BY al.created_at DESC
+    LIMIT %s
+""")
+
+# CSV eksport shu hajmdan oshsa xotiradan vaqtinchalik faylga o'tkaziladi
+AUDIT_CSV_SPOOL_SIZE = 4 * 1024 * 1024
+
 class AuditHandler(BaseHandler):
     def __init__(self, db):
         super().__init__(db)
     
     async def handle_audit_log(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Audit log ko'rish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
             return
         
         # Audit loglarni olish
-        logs = self.db.get_audit_logs(limit=50)
+        logs = await self.db.get_audit_logs(limit=50, replica=True)
         
         if not logs:
             text = "📝 Audit log bo'sh."
@@ -40,41 +55,33 @@ class AuditHandler(BaseHandler):
 
 """
         
-        keyboard = [
-            [InlineKeyboardButton("🔄 Yangilash", callback_data="audit_log")],
-            [InlineKeyboardButton("📊 To'liq hisobot", callback_data="audit_full_report")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['audit_log']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_audit_full_report(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """To'liq audit hisoboti"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
             return
         
-        # Barcha audit loglarni olish
-        logs = self.db.get_audit_logs(limit=1000)
-        
-        if not logs:
-            text = "📝 Audit log bo'sh."
-            reply_markup = self.create_back_button("audit_log")
-            await self.send_message(update, context, text, reply_markup)
-            return
-        
-        # Statistikalar
-        total_actions = len(logs)
+        # Audit loglar oqim bilan o'qiladi - faqat hisoblagichlar xotirada saqlanadi
+        total_actions = 0
         action_counts = {}
         user_counts = {}
         
-        for log in logs:
+        async for log in self.db.stream_query(AUDIT_LOGS_STREAM, (1000,), replica=True):
+            total_actions += 1
             action_counts[log['action']] = action_counts.get(log['action'], 0) + 1
             user_counts[log['full_name']] = user_counts.get(log['full_name'], 0) + 1
         
+        if not total_actions:
+            text = "📝 Audit log bo'sh."
+            reply_markup = self.create_back_button("audit_log")
+            await self.send_message(update, context, text, reply_markup)
+            return
+        
         # Eng ko'p amal qilgan foydalanuvchi
         most_active_user = max(user_counts.items(), key=lambda x: x[1])
         
@@ -101,48 +108,51 @@ class AuditHandler(BaseHandler):
         for user_name, count in sorted(user_counts.items(), key=lambda x: x[1], reverse=True)[:10]:
             text += f"• {user_name}: {count} ta amal\n"
         
-        keyboard = [
-            [InlineKeyboardButton("📄 CSV eksport", callback_data="export_audit_csv")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="audit_log")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['audit_full_report']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_export_audit_csv(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Audit log CSV eksport"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
             return
         
         try:
-            # Audit loglarni olish
-            logs = self.db.get_audit_logs(limit=10000)
-            
-            if not logs:
-                await self.send_message(update, context, "📝 Eksport qilish uchun ma'lumotlar yo'q!")
-                return
-            
-            # CSV ma'lumotlarini tayyorlash
-            csv_data = "Vaqt,Foydalanuvchi,Rol,Amal,Tafsilot\n"
-            
-            for log in logs:
-                csv_data += f'"{format_datetime(log["created_at"])}","{log["full_name"]}","{log["role"]}","{log["action"]}","{log["details"] or ""}"\n'
-            
-            # Faylni yuborish
-            filename = f"audit_log_{format_datetime(logs[0]['created_at'], '%Y%m%d_%H%M%S')}.csv"
-            
-            await context.bot.send_document(
-                chat_id=update.effective_chat.id,
-                document=csv_data.encode('utf-8-sig'),
-                filename=filename,
-                caption=f"📜 <b>Audit log eksport tayyor!</b>\n\n📁 <b>Fayl:</b> {filename}\n📊 <b>Jami amallar:</b> {len(logs)}"
-            )
+            # Audit loglar bo'laklab o'qiladi va darhol faylga yoziladi
+            with tempfile.SpooledTemporaryFile(max_size=AUDIT_CSV_SPOOL_SIZE) as csv_file:
+                csv_file.write("Vaqt,Foydalanuvchi,Rol,Amal,Tafsilot\n".encode('utf-8-sig'))
+                
+                log_count = 0
+                latest_created_at = None
+                async for logs in self.db.stream_query(AUDIT_LOGS_STREAM, (10000,), batch_size=1000, replica=True):
+                    if latest_created_at is None:
+                        latest_created_at = logs[0]['created_at']
+                    log_count += len(logs)
+                    lines = [
+                        f'"{format_datetime(log["created_at"])}","{log["full_name"]}","{log["role"]}","{log["action"]}","{log["details"] or ""}"\n'
+                        for log in logs
+                    ]
+                    csv_file.write(''.join(lines).encode('utf-8'))
+                
+                if not log_count:
+                    await self.send_message(update, context, "📝 Eksport qilish uchun ma'lumotlar yo'q!")
+                    return
+                
+                # Faylni yuborish
+                filename = f"audit_log_{format_datetime(latest_created_at, '%Y%m%d_%H%M%S')}.csv"
+                csv_file.seek(0)
+                
+                await context.bot.send_document(
+                    chat_id=update.effective_chat.id,
+                    document=csv_file,
+                    filename=filename,
+                    caption=f"📜 <b>Audit log eksport tayyor!</b>\n\n📁 <b>Fayl:</b> {filename}\n📊 <b>Jami amallar:</b> {log_count}"
+                )
             
             # Audit log
-            self.db.add_audit_log(user['id'], 'AUDIT_EXPORTED', f"Audit log CSV formatida eksport qilindi")
+            await self.db.add_audit_log(user['id'], 'AUDIT_EXPORTED', f"Audit log CSV formatida eksport qilindi")
             
         except Exception as e:
             logger.error(f"Audit log eksport qilishda xatolik: {e}")
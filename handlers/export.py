@@ -1,16 +1,97 @@
-import pandas as pd
+import asyncio
 import io
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, AsyncIterator
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from handlers.base import BaseHandler
+from keyboards import MENUS
 from config import UserRole, TaskStatus
 from utils import format_datetime, get_status_emoji, get_priority_emoji
+from timeutils import format_datetimes
+from statements import statement
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Eksport oqimida bir vaqtda ishlanadigan qatorlar soni
+EXPORT_BATCH_SIZE = 1000
+
+# XLSX ustunlari: (sarlavha, kenglik)
+XLSX_COLUMNS = [
+    ('ID', 35),
+    ('Sarlavha', 20),
+    ('Tavsif', 30),
+    ('Status', 15),
+    ('Ustuvorlik', 15),
+    ('Boshlanish vaqti', 18),
+    ('Original deadline', 18),
+    ('Joriy deadline', 18),
+    ('Deadline uzaytirgan', 20),
+    ('Uzaytirish sababi', 25),
+    ('Uzaytirish soati', 15),
+    ('Ishchi tugatgan vaqt', 20),
+    ('Admin tasdiqlagan vaqt', 20),
+    ('Rad etilgan vaqt', 20),
+    ('Yaratuvchi', 20),
+    ('Yaratuvchi telefon', 18),
+    ('Ishchi', 20),
+    ('Ishchi telefon', 18),
+    ('Tasdiqlovchi', 20),
+    ('Rad etuvchi', 20),
+    ('Jarima', 12),
+    ('Jarima miqdori', 15),
+    ('Yaratilgan', 18),
+]
+
+# Barcha vazifalar tafsilotlari bilan. Oxirgi deadline uzaytirish ma'lumoti shu so'rovning
+# o'zida olinadi (har vazifa uchun alohida so'rov yo'q)
+EXPORT_ALL_TASKS = statement('export_all_tasks', """
+    SELECT 
+        t.id,
+        t.title,
+        t.description,
+        t.status,
+        t.priority,
+        t.start_at,
+        t.deadline,
+        t.completed_at,
+        t.approved_at,
+        t.rejected_at,
+        t.is_penalized,
+        t.penalty_amount,
+        t.created_at,
+        u1.full_name as creator_name,
+        u1.phone as creator_phone,
+        u2.full_name as assigned_name,
+        u2.phone as assigned_phone,
+        u3.full_name as approver_name,
+        u4.full_name as rejector_name,
+        COALESCE(ext.old_deadline, t.deadline) as original_deadline,
+        CASE WHEN ext.old_deadline IS NULL THEN 'Uzaytirilmagan'
+             ELSE COALESCE(ext.extended_by_name, 'Nomalum') END as deadline_extended_by,
+        CASE WHEN ext.old_deadline IS NULL THEN 'Yoq' ELSE ext.reason END as deadline_extension_reason,
+        COALESCE(ext.extension_hours, 0) as deadline_extension_hours
+    FROM tasks t
+    LEFT JOIN users u1 ON t.created_by = u1.id
+    LEFT JOIN users u2 ON t.assigned_to = u2.id
+    LEFT JOIN users u3 ON t.approved_by = u3.id
+    LEFT JOIN users u4 ON t.rejected_by = u4.id
+    LEFT JOIN LATERAL (
+        SELECT tde.old_deadline, tde.extension_hours, tde.reason, ue.full_name as extended_by_name
+        FROM task_deadline_extensions tde
+        JOIN users ue ON tde.extended_by = ue.id
+        WHERE tde.task_id = t.id
+        ORDER BY tde.created_at DESC
+        LIMIT 1
+    ) ext ON TRUE
+    ORDER BY t.created_at DESC
+""")
+
 class ExportHandler(BaseHandler):
     def __init__(self, db):
         super().__init__(db)
@@ -18,7 +99,7 @@ class ExportHandler(BaseHandler):
     
     async def handle_export_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Export menyusi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
@@ -30,17 +111,12 @@ class ExportHandler(BaseHandler):
 Qanday formatda eksport qilmoqchisiz?
         """
         
-        keyboard = [
-            [InlineKeyboardButton("📊 XLSX (Excel)", callback_data="export_xlsx")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['export_menu']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_export_xlsx(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """XLSX export"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
@@ -53,19 +129,13 @@ Qanday formatda eksport qilmoqchisiz?
 Qanday ma'lumotlarni eksport qilmoqchisiz?
         """
         
-        keyboard = [
-            [InlineKeyboardButton("📋 Barcha vazifalar", callback_data="export_all_xlsx")],
-            [InlineKeyboardButton("👤 Ishchi bo'yicha", callback_data="export_user_xlsx")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="export_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['export_xlsx']
         await self.send_message(update, context, text, reply_markup)
     
     
     async def handle_export_all(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Barcha vazifalarni eksport qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         data = update.callback_query.data
         export_type = data.split('_')[2]  # xlsx (export_all_xlsx -> [export, all, xlsx])
         
@@ -76,28 +146,31 @@ Qanday ma'lumotlarni eksport qilmoqchisiz?
             return
         
         try:
-            # Barcha vazifalarni olish
-            logger.info("Getting all tasks...")
-            tasks = self.get_all_tasks_with_details()
-            logger.info(f"Found {len(tasks)} tasks")
+            # Vazifalar bo'laklab o'qiladi va darhol faylga yoziladi - xotira jadval hajmiga bog'liq emas
+            logger.info("Creating XLSX export...")
+            loop = asyncio.get_running_loop()
+            workbook, worksheet = self.create_xlsx_workbook()
+            task_count = 0
+            async for batch in self.stream_all_tasks_with_details():
+                await loop.run_in_executor(None, self.append_xlsx_rows, worksheet, batch)
+                task_count += len(batch)
+            logger.info(f"Found {task_count} tasks")
             
-            if not tasks:
+            if not task_count:
                 await self.send_message(update, context, "📝 Eksport qilish uchun ma'lumotlar yo'q!")
                 return
             
-            # Export qilish
-            logger.info("Creating XLSX export...")
-            file_data = self.create_xlsx_export(tasks)
+            file_data = await loop.run_in_executor(None, self.save_xlsx_workbook, workbook)
             filename = f"vazifalar_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             logger.info(f"Created file: {filename}, size: {len(file_data)} bytes")
             
             # Faylni yuborish
             logger.info("Sending file...")
-            await self.send_file(update, context, file_data, filename, export_type, task_count=len(tasks))
+            await self.send_file(update, context, file_data, filename, export_type, task_count=task_count)
             logger.info("File sent successfully!")
             
             # Audit log
-            self.db.add_audit_log(user['id'], 'EXPORT_ALL', f"Barcha vazifalar {export_type.upper()} formatida eksport qilindi")
+            await self.db.add_audit_log(user['id'], 'EXPORT_ALL', f"Barcha vazifalar {export_type.upper()} formatida eksport qilindi")
             
         except Exception as e:
             logger.error(f"Export qilishda xatolik: {e}", exc_info=True)
@@ -105,7 +178,7 @@ Qanday ma'lumotlarni eksport qilmoqchisiz?
     
     async def handle_export_date(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Sana bo'yicha eksport"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         data = update.callback_query.data
         export_type = data.split('_')[2]  # xlsx (export_date_xlsx -> [export, date, xlsx])
         
@@ -127,7 +200,7 @@ Masalan: 01.01.2024
     
     async def handle_export_user(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchi bo'yicha eksport"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         data = update.callback_query.data
         export_type = data.split('_')[2]  # xlsx (export_date_xlsx -> [export, date, xlsx])
         
@@ -136,8 +209,7 @@ Masalan: 01.01.2024
             return
         
         # Ishchilar ro'yxatini olish
-        workers = self.db.get_active_users()
-        workers = [w for w in workers if w['role'] == UserRole.WORKER]
+        workers = await self.db.get_users_by_role([UserRole.WORKER])
         
         if not workers:
             await self.send_message(update, context, "❌ Ishchilar topilmadi!")
@@ -164,7 +236,7 @@ Ishchini tanlang:
     
     async def handle_export_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Status bo'yicha eksport"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         data = update.callback_query.data
         export_type = data.split('_')[2]  # xlsx (export_date_xlsx -> [export, date, xlsx])
         
@@ -191,66 +263,18 @@ Statusni tanlang:
         reply_markup = InlineKeyboardMarkup(keyboard)
         await self.send_message(update, context, text, reply_markup)
     
-    def get_all_tasks_with_details(self) -> List[Dict[str, Any]]:
+    async def get_all_tasks_with_details(self) -> List[Dict[str, Any]]:
         """Barcha vazifalarni tafsilotlari bilan olish"""
-        query = """
-            SELECT 
-                t.id,
-                t.title,
-                t.description,
-                t.status,
-                t.priority,
-                t.start_at,
-                t.deadline,
-                t.completed_at,
-                t.approved_at,
-                t.rejected_at,
-                t.is_penalized,
-                t.penalty_amount,
-                t.created_at,
-                u1.full_name as creator_name,
-                u1.phone as creator_phone,
-                u2.full_name as assigned_name,
-                u2.phone as assigned_phone,
-                u3.full_name as approver_name,
-                u4.full_name as rejector_name
-            FROM tasks t
-            LEFT JOIN users u1 ON t.created_by = u1.id
-            LEFT JOIN users u2 ON t.assigned_to = u2.id
-            LEFT JOIN users u3 ON t.approved_by = u3.id
-            LEFT JOIN users u4 ON t.rejected_by = u4.id
-            ORDER BY t.created_at DESC
-        """
-        tasks = self.db.execute_query(query)
-        
-        # Har bir vazifa uchun deadline uzaytirish ma'lumotlarini qo'shish
-        for task in tasks:
-            try:
-                extensions = self.db.get_task_deadline_extensions(task['id'])
-                if extensions and len(extensions) > 0:
-                    # Oxirgi uzaytirish ma'lumotini olish
-                    latest_extension = extensions[0]
-                    task['original_deadline'] = latest_extension.get('old_deadline', task['deadline'])
-                    task['deadline_extended_by'] = latest_extension.get('extended_by_name', 'Nomalum')
-                    task['deadline_extension_reason'] = latest_extension.get('reason', 'Yoq')
-                    task['deadline_extension_hours'] = latest_extension.get('extension_hours', 0)
-                else:
-                    task['original_deadline'] = task['deadline']
-                    task['deadline_extended_by'] = 'Uzaytirilmagan'
-                    task['deadline_extension_reason'] = 'Yoq'
-                    task['deadline_extension_hours'] = 0
-            except Exception as e:
-                # Xatolik bo'lsa, default qiymatlarni qo'yish
-                task['original_deadline'] = task['deadline']
-                task['deadline_extended_by'] = 'Uzaytirilmagan'
-                task['deadline_extension_reason'] = 'Yoq'
-                task['deadline_extension_hours'] = 0
-        
-        return tasks
+        # Ko'p qatorli o'qish - ixcham qatorlar
+        return await self.db.execute_query(EXPORT_ALL_TASKS, compact=True, replica=True)
+    
+    def stream_all_tasks_with_details(self, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Barcha vazifalarni bo'laklab (server-side cursor orqali) o'qish"""
+        return self.db.stream_query(EXPORT_ALL_TASKS, batch_size=batch_size, replica=True)
     
-    def get_tasks_by_date_range(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    async def get_tasks_by_date_range(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """Sana oralig'ida vazifalarni olish"""
-        query = """
+        query = statement('export_tasks_by_date_range', """
             SELECT 
                 t.id,
                 t.title,
@@ -271,14 +295,14 @@ Statusni tanlang:
             LEFT JOIN users u1 ON t.created_by = u1.id
             LEFT JOIN users u2 ON t.assigned_to = u2.id
             LEFT JOIN users u3 ON t.approved_by = u3.id
-            WHERE DATE(t.created_at) BETWEEN ? AND ?
+            WHERE t.created_at >= ? AND t.created_at < ?::date + 1
             ORDER BY t.created_at DESC
-        """
-        return self.db.execute_query(query, (start_date, end_date))
+        """)
+        return await self.db.execute_query(query, (start_date, end_date), replica=True)
     
-    def get_tasks_by_user(self, user_id: int) -> List[Dict[str, Any]]:
+    async def get_tasks_by_user(self, user_id: int) -> List[Dict[str, Any]]:
         """Foydalanuvchi bo'yicha vazifalarni olish"""
-        query = """
+        query = statement('export_tasks_by_user', """
             SELECT 
                 t.id,
                 t.title,
@@ -306,13 +330,13 @@ Statusni tanlang:
             LEFT JOIN users u4 ON t.rejected_by = u4.id
             WHERE t.assigned_to = ?
             ORDER BY t.created_at DESC
-        """
-        tasks = self.db.execute_query(query, (user_id,))
+        """)
+        tasks = await self.db.execute_query(query, (user_id,), replica=True)
         
         # Har bir vazifa uchun deadline uzaytirish ma'lumotlarini qo'shish
         for task in tasks:
             try:
-                extensions = self.db.get_task_deadline_extensions(task['id'])
+                extensions = await self.db.get_task_deadline_extensions(task['id'])
                 if extensions and len(extensions) > 0:
                     latest_extension = extensions[0]
                     task['original_deadline'] = latest_extension.get('old_deadline', task['deadline'])
@@ -332,9 +356,9 @@ Statusni tanlang:
         
         return tasks
     
-    def get_tasks_by_status(self, status: str) -> List[Dict[str, Any]]:
+    async def get_tasks_by_status(self, status: str) -> List[Dict[str, Any]]:
         """Status bo'yicha vazifalarni olish"""
-        query = """
+        query = statement('export_tasks_by_status', """
             SELECT 
                 t.id,
                 t.title,
@@ -357,108 +381,117 @@ Statusni tanlang:
             LEFT JOIN users u3 ON t.approved_by = u3.id
             WHERE t.status = ?
             ORDER BY t.created_at DESC
+        """)
+        return await self.db.execute_query(query, (status,), replica=True)
+    
+    def task_to_xlsx_row(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Vazifani eksport qatoriga aylantirish (kalitlar XLSX_COLUMNS tartibida)"""
+        return self.tasks_to_xlsx_rows([task])[0]
+    
+    def tasks_to_xlsx_rows(self, tasks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Vazifalar paketini eksport qatorlariga aylantirish.
+        
+        Sana ustunlari har bir katak uchun alohida emas, ustun bo'yicha bir
+        chaqiruvda formatlanadi (format_datetimes).
         """
-        return self.db.execute_query(query, (status,))
+        tasks = list(tasks)
+        start_at = format_datetimes(task['start_at'] for task in tasks)
+        original_deadline = format_datetimes(task.get('original_deadline', task['deadline']) for task in tasks)
+        deadline = format_datetimes(task['deadline'] for task in tasks)
+        completed_at = format_datetimes((task['completed_at'] for task in tasks), empty='Tugatilmagan')
+        approved_at = format_datetimes((task['approved_at'] for task in tasks), empty='Tasdiqlanmagan')
+        rejected_at = format_datetimes((task.get('rejected_at') for task in tasks), empty='Rad etilmagan')
+        created_at = format_datetimes(task['created_at'] for task in tasks)
+        
+        return [
+            self._xlsx_row(task, start_at[i], original_deadline[i], deadline[i],
+                           completed_at[i], approved_at[i], rejected_at[i], created_at[i])
+            for i, task in enumerate(tasks)
+        ]
     
-    def create_xlsx_export(self, tasks: List[Dict[str, Any]]) -> bytes:
-        """XLSX fayl yaratish"""
-        # Ma'lumotlarni tayyorlash
-        data = []
-        for task in tasks:
-            # Status emoji qo'shish
-            status_emoji = get_status_emoji(task['status'])
-            
-            # Priority emoji qo'shish
-            priority_emoji = get_priority_emoji(task['priority'])
-            
-            data.append({
-                'ID': task['id'],
-                'Sarlavha': task['title'],
-                'Tavsif': task['description'] or 'Tavsif yoq',
-                'Status': f"{status_emoji} {task['status']}",
-                'Ustuvorlik': f"{priority_emoji} {task['priority']}",
-                'Boshlanish vaqti': format_datetime(task['start_at']),
-                'Original deadline': format_datetime(task.get('original_deadline', task['deadline'])),
-                'Joriy deadline': format_datetime(task['deadline']),
-                'Deadline uzaytirgan': task.get('deadline_extended_by', 'Uzaytirilmagan'),
-                'Uzaytirish sababi': task.get('deadline_extension_reason', 'Yoq'),
-                'Uzaytirish soati': f"{task.get('deadline_extension_hours', 0)} soat" if task.get('deadline_extension_hours', 0) > 0 else 'Yoq',
-                'Ishchi tugatgan vaqt': format_datetime(task['completed_at']) if task['completed_at'] else 'Tugatilmagan',
-                'Admin tasdiqlagan vaqt': format_datetime(task['approved_at']) if task['approved_at'] else 'Tasdiqlanmagan',
-                'Rad etilgan vaqt': format_datetime(task.get('rejected_at')) if task.get('rejected_at') else 'Rad etilmagan',
-                'Yaratuvchi': task['creator_name'] or 'Nomalum',
-                'Yaratuvchi telefon': task['creator_phone'] or 'Kiritilmagan',
-                'Ishchi': task['assigned_name'] or 'Tayinlanmagan',
-                'Ishchi telefon': task['assigned_phone'] or 'Kiritilmagan',
-                'Tasdiqlovchi': task['approver_name'] or 'Tasdiqlanmagan',
-                'Rad etuvchi': task['rejector_name'] or 'Rad etilmagan',
-                'Jarima': '💰 Ha' if task['is_penalized'] else '✅ Yoq',
-                'Jarima miqdori': f"{task['penalty_amount']:,} UZS" if task['penalty_amount'] > 0 else '0 UZS',
-                'Yaratilgan': format_datetime(task['created_at'])
-            })
-        
-        # DataFrame yaratish
-        df = pd.DataFrame(data)
-        
-        # Excel fayl yaratish
+    def _xlsx_row(self, task: Dict[str, Any], start_at: str, original_deadline: str, deadline: str,
+                  completed_at: str, approved_at: str, rejected_at: str, created_at: str) -> Dict[str, Any]:
+        """Bitta eksport qatori (sanalar oldindan formatlangan)"""
+        # Status emoji qo'shish
+        status_emoji = get_status_emoji(task['status'])
+        
+        # Priority emoji qo'shish
+        priority_emoji = get_priority_emoji(task['priority'])
+        
+        return {
+            'ID': task['id'],
+            'Sarlavha': task['title'],
+            'Tavsif': task['description'] or 'Tavsif yoq',
+            'Status': f"{status_emoji} {task['status']}",
+            'Ustuvorlik': f"{priority_emoji} {task['priority']}",
+            'Boshlanish vaqti': start_at,
+            'Original deadline': original_deadline,
+            'Joriy deadline': deadline,
+            'Deadline uzaytirgan': task.get('deadline_extended_by', 'Uzaytirilmagan'),
+            'Uzaytirish sababi': task.get('deadline_extension_reason', 'Yoq'),
+            'Uzaytirish soati': f"{task.get('deadline_extension_hours', 0)} soat" if task.get('deadline_extension_hours', 0) > 0 else 'Yoq',
+            'Ishchi tugatgan vaqt': completed_at,
+            'Admin tasdiqlagan vaqt': approved_at,
+            'Rad etilgan vaqt': rejected_at,
+            'Yaratuvchi': task['creator_name'] or 'Nomalum',
+            'Yaratuvchi telefon': task['creator_phone'] or 'Kiritilmagan',
+            'Ishchi': task['assigned_name'] or 'Tayinlanmagan',
+            'Ishchi telefon': task['assigned_phone'] or 'Kiritilmagan',
+            'Tasdiqlovchi': task['approver_name'] or 'Tasdiqlanmagan',
+            'Rad etuvchi': task['rejector_name'] or 'Rad etilmagan',
+            'Jarima': '💰 Ha' if task['is_penalized'] else '✅ Yoq',
+            'Jarima miqdori': f"{task['penalty_amount']:,} UZS" if task['penalty_amount'] > 0 else '0 UZS',
+            'Yaratilgan': created_at
+        }
+    
+    def create_xlsx_workbook(self):
+        """Eksport uchun write-only workbook (qatorlar xotirada emas, vaqtinchalik faylda yig'iladi)"""
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Vazifalar')
+        
+        # Ustun kengliklari
+        for i, (_, width) in enumerate(XLSX_COLUMNS, 1):
+            worksheet.column_dimensions[get_column_letter(i)].width = width
+        
+        # Sarlavha qatori
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+        
+        header = []
+        for title, _ in XLSX_COLUMNS:
+            cell = WriteOnlyCell(worksheet, value=title)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            header.append(cell)
+        worksheet.append(header)
+        
+        return workbook, worksheet
+    
+    def append_xlsx_rows(self, worksheet, tasks: Iterable[Dict[str, Any]]):
+        """Vazifalarni worksheet'ga qo'shish"""
+        data_alignment = Alignment(horizontal="left", vertical="center")
+        for xlsx_row in self.tasks_to_xlsx_rows(tasks):
+            row = []
+            for value in xlsx_row.values():
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.alignment = data_alignment
+                row.append(cell)
+            worksheet.append(row)
+    
+    def save_xlsx_workbook(self, workbook) -> bytes:
+        """Workbook'ni XLSX baytlariga saqlash"""
         output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Vazifalar', index=False)
-            
-            # Ustun kengliklarini o'rnatish
-            worksheet = writer.sheets['Vazifalar']
-            
-            # Ustun kengliklari
-            column_widths = {
-                'A': 35,  # ID
-                'B': 20,  # Sarlavha
-                'C': 30,  # Tavsif
-                'D': 15,  # Status
-                'E': 15,  # Ustuvorlik
-                'F': 18,  # Boshlanish vaqti
-                'G': 18,  # Original deadline
-                'H': 18,  # Joriy deadline
-                'I': 20,  # Deadline uzaytirgan
-                'J': 25,  # Uzaytirish sababi
-                'K': 15,  # Uzaytirish soati
-                'L': 20,  # Ishchi tugatgan vaqt
-                'M': 20,  # Admin tasdiqlagan vaqt
-                'N': 20,  # Rad etilgan vaqt
-                'O': 20,  # Yaratuvchi
-                'P': 18,  # Yaratuvchi telefon
-                'Q': 20,  # Ishchi
-                'R': 18,  # Ishchi telefon
-                'S': 20,  # Tasdiqlovchi
-                'T': 20,  # Rad etuvchi
-                'U': 12,  # Jarima
-                'V': 15,  # Jarima miqdori
-                'W': 18   # Yaratilgan
-            }
-            
-            for col, width in column_widths.items():
-                worksheet.column_dimensions[col].width = width
-            
-            # Sarlavha qatorini formatlash
-            from openpyxl.styles import Font, PatternFill, Alignment
-            
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            for cell in worksheet[1]:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # Ma'lumotlar qatorlarini formatlash
-            data_alignment = Alignment(horizontal="left", vertical="center")
-            for row in worksheet.iter_rows(min_row=2):
-                for cell in row:
-                    cell.alignment = data_alignment
-        
-        output.seek(0)
+        workbook.save(output)
         return output.getvalue()
     
+    def create_xlsx_export(self, tasks: Iterable[Dict[str, Any]]) -> bytes:
+        """XLSX fayl yaratish"""
+        workbook, worksheet = self.create_xlsx_workbook()
+        self.append_xlsx_rows(worksheet, tasks)
+        return self.save_xlsx_workbook(workbook)
+    
     
     async def send_file(self, update: Update, context: ContextTypes.DEFAULT_TYPE, 
                        file_data: bytes, filename: str, file_type: str, task_count: int = None):
@@ -467,7 +500,6 @@ Statusni tanlang:
             logger.info(f"send_file called: filename={filename}, file_type={file_type}, data_size={len(file_data)}")
             if file_type == 'xlsx':
                 from telegram import InputFile
-                from utils import format_datetime
                 
                 # Fayl hajmini hisoblash
                 file_size_kb = len(file_data) / 1024
@@ -1,30 +1,84 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from database import Database
-from utils import get_uzbek_time, calculate_time_remaining, get_status_emoji, get_priority_emoji, format_datetime
-from config import TaskStatus, REMINDER_INTERVAL_HOURS, DEADLINE_WARNING_HOURS, DEFAULT_PENALTY_AMOUNT
+from typing import List, Dict, Any, Iterable
+from database import AsyncDatabase
+from statements import statement
+from scheduler import DeadlineScheduler
+from gateway import PRIORITY_NOTIFICATION
+from outbox import outbox_message
+from utils import calculate_time_remaining, get_status_emoji, get_priority_emoji, format_datetime
+from timeutils import TickClock, localize, to_local_naive
+from config import (TaskStatus, REMINDER_INTERVAL_HOURS, DEADLINE_WARNING_HOURS, DEFAULT_PENALTY_AMOUNT,
+                    NOTIFICATION_MAX_SLEEP, NOTIFICATION_RESYNC_INTERVAL)
 
 logger = logging.getLogger(__name__)
 
+# Eslatma navbatidagi faol vazifalar (JOIN users - xabar uchun telegram_id)
+ACTIVE_TASKS_QUERY = """
+    SELECT t.*, u.telegram_id, u.full_name as assigned_name
+    FROM tasks t
+    JOIN users u ON t.assigned_to = u.id
+    WHERE t.status IN ('REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA')
+    AND u.is_active = TRUE
+"""
+
+# Deadline ogohlantirishi shu vaqtgacha kechiksa ham yuboriladi (eski ±0.1 soat oynasi)
+WARNING_GRACE = timedelta(hours=0.1)
+
+# Hodisa turlari
+EVENT_START = 'start'
+EVENT_REMINDER = 'reminder'
+EVENT_WARNING = 'warning'
+EVENT_DEADLINE = 'deadline'
+
 class NotificationHandler:
-    def __init__(self, db: Database, bot):
+    """Vazifa eslatmalari.
+    
+    Faol vazifalar ishga tushganda bir marta o'qiladi va har biri uchun hodisalar
+    (boshlanish, periodik eslatma, 24/3/1 soatlik ogohlantirish, deadline)
+    DeadlineScheduler navbatiga qo'yiladi. Sikl eng yaqin hodisagacha uxlaydi.
+    Vazifa yaratilsa, statusi yoki deadline'i o'zgarsa Database tinglovchisi
+    orqali faqat o'sha vazifa qayta o'qiladi va rejalashtiriladi.
+    
+    Oxirgi periodik eslatma va yuborilgan ogohlantirishlar notification_ledger
+    jadvalida saqlanadi: har bir sikl oxirida o'zgarganlar bitta tranzaksiyada
+    yoziladi, qayta ishga tushganda jurnaldan tiklanadi.
+    """
+    
+    def __init__(self, db: AsyncDatabase, bot):
         self.db = db
         self.bot = bot
         self.is_running = False
         # Oxirgi ogohlantirish vaqtini saqlash: {task_id: last_reminder_time}
         self.last_reminder_times = {}
+        # Har bir tekshiruv sikli uchun bitta "hozir"
+        self.clock = TickClock()
+        self.scheduler = DeadlineScheduler()
+        # Navbatdagi faol vazifalar: {task_id: task}
+        self.tasks: Dict[str, Any] = {}
+        # Yuborilgan deadline ogohlantirishlari: {task_id: (deadline, {soat, ...})}
+        self.sent_warnings: Dict[str, tuple] = {}
+        # Jurnalga yozilishi kerak bo'lgan (o'zgargan va navbatdan chiqqan) vazifalar
+        self._ledger_dirty = set()
+        self._ledger_removed = set()
+        # Boshqa thread'da o'zgargan, qayta o'qilishi kerak bo'lgan vazifalar
+        self._dirty_tasks = set()
+        self._reminder_interval = None
+        self._loop = None
+        self._next_resync = None
     
     async def start_notifications(self):
         """Eslatmalar tizimini ishga tushirish"""
         self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        await self.db.add_task_listener(self._on_tasks_changed)
         logger.info("Eslatmalar tizimi ishga tushdi")
         
         while self.is_running:
             try:
                 await self.check_and_send_notifications()
-                await asyncio.sleep(60)  # Har minut tekshirish
+                await self.scheduler.wait(self.clock.tick(), NOTIFICATION_MAX_SLEEP)
             except Exception as e:
                 logger.error(f"Eslatmalar tizimida xatolik: {e}")
                 await asyncio.sleep(60)
@@ -32,150 +86,262 @@ class NotificationHandler:
     async def stop_notifications(self):
         """Eslatmalar tizimini to'xtatish"""
         self.is_running = False
+        self.scheduler.wake()
+        # Oxirgi sikl holatini jurnalga yozish
+        await self.flush_ledger()
         logger.info("Eslatmalar tizimi to'xtatildi")
     
+    def _on_tasks_changed(self, task_ids: List[str]):
+        """Database tinglovchisi: DB thread'idan chaqiriladi - event loop'ga uzatiladi"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._mark_dirty, task_ids)
+    
+    def _mark_dirty(self, task_ids: List[str]):
+        self._dirty_tasks.update(task_ids)
+        self.scheduler.wake()
+    
     async def check_and_send_notifications(self):
-        """Eslatmalarni tekshirish va yuborish"""
+        """Navbatni yangilash va vaqti kelgan hodisalarni bajarish"""
         try:
-            # Faol vazifalarni olish
-            active_tasks = self.get_active_tasks()
+            now = self.clock.tick()
+            
+            # Vaqti-vaqti bilan to'liq qayta o'qish (bot tashqarisidagi o'zgarishlar uchun)
+            if self._next_resync is None or now >= self._next_resync:
+                await self.load_tasks(now)
+            elif self._dirty_tasks:
+                task_ids, self._dirty_tasks = self._dirty_tasks, set()
+                await self.reload_tasks(task_ids, now)
+            
+            # Sozlamadagi eslatma oralig'i o'zgargan bo'lsa barcha vazifalar qayta rejalashtiriladi
+            interval = await self.get_reminder_interval()
+            if interval != self._reminder_interval:
+                self._reminder_interval = interval
+                for task in self.tasks.values():
+                    self.schedule_task(task, now)
+            
+            start_due = overdue_due = False
+            for task_id, kind, data, when in self.scheduler.pop_due(now):
+                if kind == EVENT_START:
+                    start_due = True
+                elif kind == EVENT_DEADLINE:
+                    overdue_due = True
+                else:
+                    await self.handle_event(task_id, kind, data, now)
             
-            for task in active_tasks:
-                await self.check_task_notifications(task)
+            # Status o'tishlari bitta so'rov bilan (bir nechta hodisa - bitta sweep)
+            if start_due:
+                await self.start_due_tasks(now)
+            if overdue_due:
+                await self.check_overdue_tasks(now)
             
-            # Muddati o'tgan vazifalarni tekshirish
-            await self.check_overdue_tasks()
+            await self.flush_ledger()
             
         except Exception as e:
             logger.error(f"Eslatmalarni tekshirishda xatolik: {e}")
     
-    def get_active_tasks(self) -> List[Dict[str, Any]]:
+    async def get_active_tasks(self) -> List[Dict[str, Any]]:
         """Faol vazifalarni olish"""
-        query = """
-            SELECT t.*, u.telegram_id, u.full_name as assigned_name
-            FROM tasks t
-            JOIN users u ON t.assigned_to = u.id
-            WHERE t.status IN ('REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA')
-            AND u.is_active = TRUE
-        """
-        return self.db.execute_query(query)
+        query = statement('get_active_tasks', ACTIVE_TASKS_QUERY)
+        # Ixcham qatorlar - navbatdagi vazifalar xotirada saqlanadi
+        return await self.db.execute_query(query, compact=True)
+    
+    async def get_active_tasks_by_ids(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """Berilgan vazifalardan faollarini olish"""
+        query = statement('get_active_tasks_by_ids', ACTIVE_TASKS_QUERY + " AND t.id = ANY(?)")
+        return await self.db.execute_query(query, (list(task_ids),), compact=True)
     
-    async def check_task_notifications(self, task: Dict[str, Any]):
-        """Vazifa uchun eslatmalarni tekshirish"""
+    async def get_reminder_interval(self) -> int:
+        """Periodik eslatma oralig'i, minut (sozlamadan)"""
+        settings = await self.db.get_org_settings()
+        # Default 3 soat
+        return settings.get('reminder_interval_minutes', REMINDER_INTERVAL_HOURS * 60) if settings else REMINDER_INTERVAL_HOURS * 60
+    
+    async def load_tasks(self, now: datetime):
+        """Barcha faol vazifalarni o'qib, navbatni qaytadan qurish"""
+        self._dirty_tasks.clear()
+        await self.db.prune_notification_ledger()
+        if self._next_resync is None:
+            # Ishga tushish: eslatmalar holati jurnaldan tiklanadi
+            await self.restore_ledger()
+        tasks = {task['id']: task for task in await self.get_active_tasks()}
+        for task_id in list(self.tasks):
+            if task_id not in tasks:
+                self.forget_task(task_id)
+        self.tasks = tasks
+        if self._reminder_interval is None:
+            self._reminder_interval = await self.get_reminder_interval()
+        for task in tasks.values():
+            self.schedule_task(task, now)
+        self._next_resync = now + timedelta(seconds=NOTIFICATION_RESYNC_INTERVAL)
+        logger.info(f"Eslatmalar navbati yangilandi: {len(tasks)} ta vazifa, {len(self.scheduler)} ta hodisa")
+        
+        # Bot to'xtab turgan paytda boshlangan va muddati o'tganlar
+        await self.start_due_tasks(now)
+        await self.check_overdue_tasks(now)
+    
+    async def reload_tasks(self, task_ids: Iterable[str], now: datetime):
+        """O'zgargan vazifalarni qayta o'qib, qayta rejalashtirish"""
+        task_ids = list(task_ids)
+        found = {task['id']: task for task in await self.get_active_tasks_by_ids(task_ids)}
+        for task_id in task_ids:
+            task = found.get(task_id)
+            if task is None:
+                # Bajarildi, rad etildi, muddati o'tdi yoki ishchi faol emas
+                self.forget_task(task_id)
+            else:
+                self.tasks[task_id] = task
+                self.schedule_task(task, now)
+    
+    def forget_task(self, task_id: str):
+        """Vazifani navbatdan olib tashlash"""
+        self.tasks.pop(task_id, None)
+        self.scheduler.cancel(task_id)
+        last_reminder = self.last_reminder_times.pop(task_id, None)
+        warned = self.sent_warnings.pop(task_id, None)
+        if last_reminder is not None or warned is not None:
+            self._ledger_dirty.discard(task_id)
+            self._ledger_removed.add(task_id)
+    
+    async def restore_ledger(self):
+        """Oxirgi eslatma vaqtlari va yuborilgan ogohlantirishlarni jurnaldan o'qish"""
+        for entry in await self.db.get_notification_ledger():
+            if entry['last_reminder_at'] is not None:
+                self.last_reminder_times[entry['task_id']] = entry['last_reminder_at']
+            if entry['warned_deadline'] is not None:
+                self.sent_warnings[entry['task_id']] = (entry['warned_deadline'], set(entry['warnings_sent']))
+    
+    async def flush_ledger(self):
+        """Sikl davomida o'zgargan eslatmalar holatini jurnalga bitta tranzaksiyada yozish"""
+        if not self._ledger_dirty and not self._ledger_removed:
+            return
+        dirty, removed = self._ledger_dirty, self._ledger_removed
+        self._ledger_dirty, self._ledger_removed = set(), set()
+        entries = []
+        for task_id in dirty:
+            warned_deadline, warnings_sent = self.sent_warnings.get(task_id, (None, ()))
+            entries.append((task_id, self.last_reminder_times.get(task_id), warned_deadline, sorted(warnings_sent)))
         try:
-            now = get_uzbek_time()
-            
-            # Deadline ni to'g'ri parse qilish
-            if isinstance(task['deadline'], str):
-                deadline = datetime.fromisoformat(task['deadline'])
-            elif isinstance(task['deadline'], datetime):
-                deadline = task['deadline']
+            await self.db.save_notification_ledger(entries, list(removed))
+        except Exception as e:
+            # Keyingi siklda qayta urinish (o'chirish upsert'dan oldin bajariladi)
+            self._ledger_dirty |= {task_id for task_id in dirty if task_id in self.tasks}
+            self._ledger_removed |= removed
+            logger.error(f"Eslatmalar jurnalini yozishda xatolik: {e}")
+    
+    def schedule_task(self, task: Dict[str, Any], now: datetime):
+        """Vazifaning kelgusi hodisalarini navbatga qo'yish (oldingilari bekor qilinadi)"""
+        # Deadline ni to'g'ri parse qilish
+        if not isinstance(task['deadline'], (str, datetime)):
+            logger.error(f"Noto'g'ri deadline format: {type(task['deadline'])}")
+            self.scheduler.cancel(task['id'])
+            return
+        deadline = localize(task['deadline'])
+        events = [(deadline, EVENT_DEADLINE, None)]
+        
+        # Vazifa boshlanish vaqti
+        if task['status'] == TaskStatus.SCHEDULED:
+            if isinstance(task['start_at'], (str, datetime)):
+                events.append((localize(task['start_at']), EVENT_START, None))
             else:
-                logger.error(f"Noto'g'ri deadline format: {type(task['deadline'])}")
-                return
-            
-            if deadline.tzinfo is None:
-                from pytz import timezone
-                deadline = timezone('Asia/Tashkent').localize(deadline)
-            
-            # Vazifa boshlanish vaqtini tekshirish
-            if task['status'] == 'REJALASHTIRILGAN':
-                if isinstance(task['start_at'], str):
-                    start_time = datetime.fromisoformat(task['start_at'])
-                elif isinstance(task['start_at'], datetime):
-                    start_time = task['start_at']
-                else:
-                    logger.error(f"Noto'g'ri start_at format: {type(task['start_at'])}")
-                    return
-                    
-                if start_time.tzinfo is None:
-                    from pytz import timezone
-                    start_time = timezone('Asia/Tashkent').localize(start_time)
-                
-                if now >= start_time:
-                    # Vazifani JARAYONDA holatiga o'tkazish
-                    self.db.update_task_status(task['id'], 'JARAYONDA')
-                    # Statusni yangilash
-                    task['status'] = 'JARAYONDA'
-                    
-                    # Eslatma yuborish
-                    await self.send_task_started_notification(task)
-            
-            # Deadline eslatmalari
-            time_remaining = deadline - now
-            hours_remaining = time_remaining.total_seconds() / 3600
-            
-            if hours_remaining > 0:
-                # Sozlamadan interval olish
-                settings = self.db.get_org_settings()
-                reminder_interval_minutes = settings.get('reminder_interval_minutes', 180) if settings else 180  # Default 3 soat
-                reminder_interval_hours = reminder_interval_minutes / 60
-                
-                # Faol vazifalarni sozlamadan interval bo'yicha qayta yuborish
-                if task['status'] in ['JARAYONDA', 'REJALASHTIRILGAN']:
-                    await self.check_periodic_reminder(task, reminder_interval_minutes)
-                
-                # Deadline yaqinlashganda eslatmalar
-                for warning_hours in DEADLINE_WARNING_HOURS:
-                    if warning_hours - 0.1 <= hours_remaining <= warning_hours + 0.1:
-                        await self.send_deadline_warning(task, warning_hours)
-            
+                logger.error(f"Noto'g'ri start_at format: {type(task['start_at'])}")
+        
+        # Deadline yaqinlashganda eslatmalar (har biri shu deadline uchun bir marta)
+        warned = self.sent_warnings.get(task['id'])
+        sent = warned[1] if warned and warned[0] == task['deadline'] else ()
+        for warning_hours in DEADLINE_WARNING_HOURS:
+            when = deadline - timedelta(hours=warning_hours)
+            if warning_hours not in sent and when + WARNING_GRACE >= now:
+                events.append((when, EVENT_WARNING, warning_hours))
+        
+        # Faol vazifalarni sozlamadan interval bo'yicha qayta yuborish
+        if task['status'] in (TaskStatus.IN_PROGRESS, TaskStatus.SCHEDULED):
+            reminder_at = self.next_reminder_at(task)
+            if reminder_at is not None and reminder_at < deadline:
+                events.append((reminder_at, EVENT_REMINDER, None))
+        
+        self.scheduler.schedule(task['id'], events)
+    
+    def next_reminder_at(self, task: Dict[str, Any]):
+        """Keyingi periodik eslatma vaqti: oxirgi eslatma (yo'q bo'lsa - yaratilgan vaqt) + interval"""
+        last_reminder = self.last_reminder_times.get(task['id'])
+        
+        # Agar oxirgi ogohlantirish yo'q bo'lsa, vazifaning yaratilgan vaqtini ishlatish
+        if last_reminder is None:
+            if not isinstance(task['created_at'], (str, datetime)):
+                logger.error(f"Noto'g'ri created_at format: {type(task['created_at'])}")
+                return None
+            last_reminder = localize(task['created_at'])
+        
+        return last_reminder + timedelta(minutes=self._reminder_interval or REMINDER_INTERVAL_HOURS * 60)
+    
+    async def handle_event(self, task_id: str, kind: str, data: Any, now: datetime):
+        """Vaqti kelgan hodisani bajarish"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return
+        try:
+            if kind == EVENT_WARNING:
+                warned = self.sent_warnings.get(task_id)
+                if not warned or warned[0] != task['deadline']:
+                    warned = self.sent_warnings[task_id] = (task['deadline'], set())
+                warned[1].add(data)
+                self._ledger_dirty.add(task_id)
+                await self.send_deadline_warning(task, data)
+            
+            elif kind == EVENT_REMINDER:
+                if task['status'] in (TaskStatus.IN_PROGRESS, TaskStatus.SCHEDULED):
+                    await self.send_periodic_reminder(task, now)
+        
         except Exception as e:
             logger.error(f"Vazifa eslatmalarini tekshirishda xatolik: {e}")
     
-    async def check_overdue_tasks(self):
-        """Muddati o'tgan vazifalarni tekshirish"""
+    async def start_due_tasks(self, now: datetime):
+        """Boshlanish vaqti kelgan vazifalarni JARAYONDA ga o'tkazish (bitta UPDATE ... RETURNING).
+        
+        Eslatma faqat shu so'rov o'tkazgan vazifalarga, status bilan bitta tranzaksiyada
+        outbox'ga yoziladi; tinglovchi vazifalarni qayta rejalashtiradi.
+        """
         try:
-            overdue_tasks = self.db.get_overdue_tasks()
-            
-            for task in overdue_tasks:
-                if task['status'] != TaskStatus.OVERDUE:
-                    # Statusni MUDDATI_OTGAN ga o'zgartirish (TaskStatus.OVERDUE = 'MUDDATI_OTGAN')
-                    self.db.update_task_status(task['id'], TaskStatus.OVERDUE)
-                    
-                    # Jarima qo'shish
-                    if not task['is_penalized']:
-                        self.add_penalty(task)
-                    
-                    # Eslatma yuborish
-                    await self.send_overdue_notification(task)
+            def start(db):
+                started = db.start_due_tasks(to_local_naive(now))
+                db.enqueue_notifications([self.task_started_message(task) for task in started])
+                return started
+            
+            started = await self.db.run_in_transaction(start)
+            for task in started:
+                if task['id'] in self.tasks:
+                    self.tasks[task['id']] = task
         
         except Exception as e:
-            logger.error(f"Muddati o'tgan vazifalarni tekshirishda xatolik: {e}")
+            logger.error(f"Boshlangan vazifalarni yangilashda xatolik: {e}")
     
-    def add_penalty(self, task: Dict[str, Any]):
-        """Jarima qo'shish"""
+    async def check_overdue_tasks(self, now: datetime = None):
+        """Muddati o'tgan vazifalarni tekshirish.
+        
+        Status, jarima va audit yozuvlari bitta so'rovda (mark_overdue_tasks); eslatma
+        faqat shu so'rov MUDDATI_OTGAN ga o'tkazgan vazifalarga, o'sha tranzaksiyada
+        outbox'ga yoziladi.
+        """
         try:
-            query = """
-                UPDATE tasks 
-                SET is_penalized = TRUE, penalty_amount = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """
-            self.db.execute_update(query, (DEFAULT_PENALTY_AMOUNT, task['id']))
-            
-            # Audit log
-            self.db.add_audit_log(
-                task['assigned_to'], 
-                'PENALTY_ADDED', 
-                f"Jarima qo'shildi: {task['title']} - {DEFAULT_PENALTY_AMOUNT} UZS"
-            )
+            now = now or self.clock.now
+            def mark_overdue(db):
+                overdue_tasks = db.mark_overdue_tasks(to_local_naive(now), DEFAULT_PENALTY_AMOUNT)
+                db.enqueue_notifications([self.overdue_message(task) for task in overdue_tasks])
             
+            await self.db.run_in_transaction(mark_overdue)
+        
         except Exception as e:
-            logger.error(f"Jarima qo'shishda xatolik: {e}")
+            logger.error(f"Muddati o'tgan vazifalarni tekshirishda xatolik: {e}")
     
-    async def send_task_started_notification(self, task: Dict[str, Any]):
-        """Vazifa boshlangan eslatma"""
-        try:
-            # Deadline ni formatlash
-            if isinstance(task['deadline'], str):
-                deadline = datetime.fromisoformat(task['deadline'])
-                deadline_str = format_datetime(deadline)
-            elif isinstance(task['deadline'], datetime):
-                deadline_str = format_datetime(task['deadline'])
-            else:
-                deadline_str = str(task['deadline'])
-            
-            text = f"""
+    def task_started_message(self, task: Dict[str, Any]) -> tuple:
+        """Vazifa boshlangan eslatma (outbox qatori)"""
+        # Deadline ni formatlash
+        if isinstance(task['deadline'], (str, datetime)):
+            deadline_str = format_datetime(task['deadline'])
+        else:
+            deadline_str = str(task['deadline'])
+        
+        text = f"""
 🚀 <b>Vazifa boshladi!</b>
 
 📝 <b>Sarlavha:</b> {task['title']}
@@ -183,16 +349,9 @@ class NotificationHandler:
 {get_priority_emoji(task['priority'])} <b>Ustuvorlik:</b> {task['priority']}
 
 Vazifani bajarishni boshlang!
-            """
-            
-            await self.bot.send_message(
-                chat_id=task['telegram_id'],
-                text=text,
-                parse_mode='HTML'
-            )
-            
-        except Exception as e:
-            logger.error(f"Vazifa boshlanish eslatmasini yuborishda xatolik: {e}")
+        """
+        
+        return outbox_message(f"task_started:{task['id']}", task['telegram_id'], text)
     
     async def send_reminder_notification(self, task: Dict[str, Any], hours_remaining: float):
         """3 soatlik eslatma"""
@@ -211,71 +370,52 @@ Vazifani davom ettiring!
             await self.bot.send_message(
                 chat_id=task['telegram_id'],
                 text=text,
-                parse_mode='HTML'
+                parse_mode='HTML',
+                rate_limit_args=PRIORITY_NOTIFICATION
             )
             
         except Exception as e:
             logger.error(f"Eslatma yuborishda xatolik: {e}")
     
-    async def check_periodic_reminder(self, task: Dict[str, Any], interval_minutes: int):
-        """Sozlamadan interval bo'yicha vazifalarni qayta yuborish"""
+    async def send_periodic_reminder(self, task: Dict[str, Any], now: datetime):
+        """Sozlamadan interval bo'yicha vazifani qayta yuborish va keyingisini rejalashtirish"""
         try:
             if not self.bot:
                 logger.warning("Bot None, eslatma yuborib bo'lmadi")
                 return
-                
-            task_id = task['id']
-            now = get_uzbek_time()
             
-            # Oxirgi ogohlantirish vaqtini olish
-            last_reminder = self.last_reminder_times.get(task_id)
+            task_id = task['id']
+            interval_minutes = self._reminder_interval
             
-            # Agar oxirgi ogohlantirish yo'q bo'lsa, vazifaning yaratilgan vaqtini ishlatish
-            if last_reminder is None:
-                # created_at ni to'g'ri parse qilish
-                if isinstance(task['created_at'], str):
-                    created_at = datetime.fromisoformat(task['created_at'])
-                elif isinstance(task['created_at'], datetime):
-                    created_at = task['created_at']
-                else:
-                    logger.error(f"Noto'g'ri created_at format: {type(task['created_at'])}")
-                    return
-                    
-                if created_at.tzinfo is None:
-                    from pytz import timezone
-                    created_at = timezone('Asia/Tashkent').localize(created_at)
-                
-                last_reminder = created_at
+            # Ogohlantirish yuborish
+            await self.send_periodic_task_reminder(task, interval_minutes, now)
             
-            # Vaqt farqini minutlarda hisoblash
-            time_since_last_reminder = (now - last_reminder).total_seconds() / 60
+            # Oxirgi ogohlantirish vaqtini yangilash
+            self.last_reminder_times[task_id] = now
+            self._ledger_dirty.add(task_id)
             
             task_title = task.get('title', 'Noma\'lum')
-            logger.debug(f"Periodik eslatma tekshiruvi: task={task_title}, interval={interval_minutes} min, time_since_last={time_since_last_reminder:.1f} min")
-            
-            # Agar interval o'tgan bo'lsa, ogohlantirish yuborish
-            if time_since_last_reminder >= interval_minutes:
-                # Ogohlantirish yuborish
-                await self.send_periodic_task_reminder(task, interval_minutes)
-                
-                # Oxirgi ogohlantirish vaqtini yangilash
-                self.last_reminder_times[task_id] = now
-                
-                logger.info(f"✅ Periodik eslatma yuborildi: {task_title}, interval: {interval_minutes} minut, time_since_last: {time_since_last_reminder:.1f} minut")
-            else:
-                logger.debug(f"Periodik eslatma o'tkazib yuborildi: time_since_last={time_since_last_reminder:.1f} < interval={interval_minutes}")
-                
+            logger.info(f"✅ Periodik eslatma yuborildi: {task_title}, interval: {interval_minutes} minut")
+        
         except Exception as e:
-            logger.error(f"Periodik eslatmani tekshirishda xatolik: {e}", exc_info=True)
+            logger.error(f"Periodik eslatmani yuborishda xatolik: {e}", exc_info=True)
+        
+        finally:
+            # Keyingi eslatma (deadline'gacha). Yuborilmagan bo'lsa - bir daqiqadan keyin qayta urinish
+            reminder_at = self.next_reminder_at(task)
+            if reminder_at is not None and reminder_at <= now:
+                reminder_at = now + timedelta(minutes=1)
+            if task['id'] in self.tasks and reminder_at is not None and reminder_at < localize(task['deadline']):
+                self.scheduler.add(task['id'], reminder_at, EVENT_REMINDER)
     
-    async def send_periodic_task_reminder(self, task: Dict[str, Any], interval_minutes: int):
+    async def send_periodic_task_reminder(self, task: Dict[str, Any], interval_minutes: int, now: datetime = None):
         """Periodik vazifa eslatmasini yuborish"""
         try:
             if not self.bot:
                 logger.error("Bot None, eslatma yuborib bo'lmadi")
                 return
             
-            time_text = calculate_time_remaining(task['deadline'])
+            time_text = calculate_time_remaining(task['deadline'], now)
             priority_emoji = get_priority_emoji(task['priority'])
             status_emoji = get_status_emoji(task['status'])
             
@@ -313,7 +453,8 @@ Vazifani davom ettiring!
                 chat_id=task['telegram_id'],
                 text=text,
                 reply_markup=reply_markup,
-                parse_mode='HTML'
+                parse_mode='HTML',
+                rate_limit_args=PRIORITY_NOTIFICATION
             )
             
             assigned_name = task.get('assigned_name', 'Noma\'lum')
@@ -349,16 +490,16 @@ Tezroq ishlang!
             await self.bot.send_message(
                 chat_id=task['telegram_id'],
                 text=text,
-                parse_mode='HTML'
+                parse_mode='HTML',
+                rate_limit_args=PRIORITY_NOTIFICATION
             )
             
         except Exception as e:
             logger.error(f"Deadline eslatmasini yuborishda xatolik: {e}")
     
-    async def send_overdue_notification(self, task: Dict[str, Any]):
-        """Muddati o'tgan eslatma"""
-        try:
-            text = f"""
+    def overdue_message(self, task: Dict[str, Any]) -> tuple:
+        """Muddati o'tgan eslatma (outbox qatori)"""
+        text = f"""
 🚨 <b>MUDDATI O'TGAN!</b>
 
 📝 <b>Vazifa:</b> {task['title']}
@@ -366,16 +507,9 @@ Tezroq ishlang!
 💰 <b>Jarima:</b> {DEFAULT_PENALTY_AMOUNT:,} UZS
 
 Vazifa muddati o'tdi va jarima qo'shildi!
-            """
-            
-            await self.bot.send_message(
-                chat_id=task['telegram_id'],
-                text=text,
-                parse_mode='HTML'
-            )
-            
-        except Exception as e:
-            logger.error(f"Muddati o'tgan eslatmasini yuborishda xatolik: {e}")
+        """
+        
+        return outbox_message(f"task_overdue:{task['id']}", task['telegram_id'], text)
     
     async def send_penalty_notification(self, task: Dict[str, Any], penalty_amount: int):
         """Jarima haqida eslatma"""
@@ -392,7 +526,8 @@ Vazifa muddati o'tgani uchun jarima qo'shildi.
             await self.bot.send_message(
                 chat_id=task['telegram_id'],
                 text=text,
-                parse_mode='HTML'
+                parse_mode='HTML',
+                rate_limit_args=PRIORITY_NOTIFICATION
             )
             
         except Exception as e:
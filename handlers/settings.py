@@ -1,8 +1,10 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from handlers.base import BaseHandler
+from keyboards import MENUS
 from config import UserRole, DEFAULT_PENALTY_AMOUNT, DEFAULT_TIMEZONE
 from utils import format_penalty_amount
+from statements import statement
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,19 +17,19 @@ class SettingsHandler(BaseHandler):
     async def handle_settings_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Sozlamalar menyusi"""
         try:
-            user = self.get_user(update)
+            user = await self.get_user(update)
             
             if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
                 await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
                 return
             
             # Hozirgi sozlamalarni olish
-            settings = self.db.get_org_settings()
+            settings = await self.db.get_org_settings()
             
             if not settings:
                 # Agar sozlamalar yo'q bo'lsa, default yaratish
-                self.db.create_org_settings("Yangi Tashkilot")
-                settings = self.db.get_org_settings()
+                await self.db.create_org_settings("Yangi Tashkilot")
+                settings = await self.db.get_org_settings()
             
             # Settings tekshiruvi
             if not settings:
@@ -65,16 +67,7 @@ class SettingsHandler(BaseHandler):
 Quyidagi sozlamalardan birini tanlang:
             """
             
-            keyboard = [
-                [InlineKeyboardButton("🏢 Tashkilot nomi", callback_data="edit_org_name")],
-                [InlineKeyboardButton("🌍 Vaqt zonasi", callback_data="edit_timezone")],
-                [InlineKeyboardButton("💰 Jarima miqdori", callback_data="edit_penalty")],
-                [InlineKeyboardButton("🕘 Ish soati", callback_data="edit_work_hours")],
-                [InlineKeyboardButton("🔔 Ogohlantirish", callback_data="edit_reminder")],
-                [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = MENUS['settings_menu']
             await self.send_message(update, context, text, reply_markup)
         except Exception as e:
             logger.error(f"Sozlamalar menyusida xatolik: {e}", exc_info=True)
@@ -82,7 +75,7 @@ Quyidagi sozlamalardan birini tanlang:
     
     async def handle_edit_org_name(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Tashkilot nomini tahrirlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -101,7 +94,7 @@ Yangi tashkilot nomini yuboring:
     
     async def handle_edit_timezone(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vaqt zonasi tahrirlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -113,20 +106,12 @@ Yangi tashkilot nomini yuboring:
 Vaqt zonasini tanlang:
         """
         
-        keyboard = [
-            [InlineKeyboardButton("🇺🇿 Asia/Tashkent", callback_data="timezone_Asia/Tashkent")],
-            [InlineKeyboardButton("🇷🇺 Europe/Moscow", callback_data="timezone_Europe/Moscow")],
-            [InlineKeyboardButton("🇺🇸 America/New_York", callback_data="timezone_America/New_York")],
-            [InlineKeyboardButton("🇬🇧 Europe/London", callback_data="timezone_Europe/London")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="settings_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['timezones']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_edit_penalty(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Jarima miqdorini tahrirlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -146,7 +131,7 @@ Masalan: 1000000
     
     async def handle_edit_work_hours(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ish soatini tahrirlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -176,7 +161,7 @@ Masalan: 09:00
     
     async def handle_org_name_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Tashkilot nomi kiritish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if self.user_states.get(user['id']) != 'editing_org_name':
             return
@@ -188,14 +173,16 @@ Masalan: 09:00
             return
         
         # Tashkilot nomini yangilash
-        query = "UPDATE org_settings SET org_name = ?, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)"
-        self.db.execute_update(query, (org_name,))
+        query = statement('update_org_name', "UPDATE org_settings SET org_name = ?, version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)")
+        await self.db.execute_update(query, (org_name,))
+        # Sozlamalar keshini yangilash
+        await self.db.refresh_org_settings()
         
         # Holatni tozalash
         del self.user_states[user['id']]
         
         # Audit log
-        self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Tashkilot nomi yangilandi: {org_name}")
+        await self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Tashkilot nomi yangilandi: {org_name}")
         
         text = f"""
 ✅ <b>Tashkilot nomi yangilandi!</b>
@@ -208,7 +195,7 @@ Masalan: 09:00
     
     async def handle_penalty_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Jarima miqdori kiritish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if self.user_states.get(user['id']) != 'editing_penalty':
             return
@@ -221,14 +208,16 @@ Masalan: 09:00
                 return
             
             # Jarima miqdorini yangilash
-            query = "UPDATE org_settings SET penalty_amount = ?, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)"
-            self.db.execute_update(query, (penalty_amount,))
+            query = statement('update_penalty_amount', "UPDATE org_settings SET penalty_amount = ?, version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)")
+            await self.db.execute_update(query, (penalty_amount,))
+            # Sozlamalar keshini yangilash
+            await self.db.refresh_org_settings()
             
             # Holatni tozalash
             del self.user_states[user['id']]
             
             # Audit log
-            self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Jarima miqdori yangilandi: {penalty_amount} UZS")
+            await self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Jarima miqdori yangilandi: {penalty_amount} UZS")
             
             text = f"""
 ✅ <b>Jarima miqdori yangilandi!</b>
@@ -244,7 +233,7 @@ Masalan: 09:00
     
     async def handle_timezone_selection(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vaqt zonasi tanlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -253,11 +242,13 @@ Masalan: 09:00
         timezone = update.callback_query.data.split('_')[1]
         
         # Vaqt zonasini yangilash
-        query = "UPDATE org_settings SET timezone = ?, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)"
-        self.db.execute_update(query, (timezone,))
+        query = statement('update_timezone', "UPDATE org_settings SET timezone = ?, version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)")
+        await self.db.execute_update(query, (timezone,))
+        # Sozlamalar keshini yangilash
+        await self.db.refresh_org_settings()
         
         # Audit log
-        self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Vaqt zonasi yangilandi: {timezone}")
+        await self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Vaqt zonasi yangilandi: {timezone}")
         
         text = f"""
 ✅ <b>Vaqt zonasi yangilandi!</b>
@@ -270,7 +261,7 @@ Masalan: 09:00
     
     async def handle_work_start_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ish boshlanish vaqtini kiritish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Holatni qat'iy tekshirish - faqat editing_work_start holatida ishlaydi
         current_state = self.user_states.get(user['id'])
@@ -322,7 +313,7 @@ Masalan: 18:00
     
     async def handle_work_end_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ish tugash vaqtini kiritish va saqlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Holatni qat'iy tekshirish - faqat editing_work_end holatida ishlaydi
         current_state = self.user_states.get(user['id'])
@@ -365,8 +356,10 @@ Masalan: 18:00
             
             # Ish soatini yangilash (faqat soatni saqlaymiz, chunki database struktura shunday)
             # Foydalanuvchi daqiqani ham kiritishi mumkin, lekin biz faqat soatni saqlaymiz
-            query = "UPDATE org_settings SET work_hours_start = ?, work_hours_end = ?, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)"
-            self.db.execute_update(query, (start_hour, hour))
+            query = statement('update_work_hours', "UPDATE org_settings SET work_hours_start = ?, work_hours_end = ?, version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)")
+            await self.db.execute_update(query, (start_hour, hour))
+            # Sozlamalar keshini yangilash
+            await self.db.refresh_org_settings()
             
             # Holatni tozalash
             del self.user_states[user['id']]
@@ -376,7 +369,7 @@ Masalan: 18:00
                 del context.user_data['work_start_minute']
             
             # Audit log (ko'rsatish uchun daqiqani ham qo'shamiz)
-            self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Ish soati yangilandi: {start_hour:02d}:{start_minute:02d} - {hour:02d}:{minute:02d}")
+            await self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Ish soati yangilandi: {start_hour:02d}:{start_minute:02d} - {hour:02d}:{minute:02d}")
             
             text = f"""
 ✅ <b>Ish soati yangilandi!</b>
@@ -394,7 +387,7 @@ Masalan: 18:00
     
     async def handle_edit_reminder(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ogohlantirish vaqtini tahrirlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -408,18 +401,12 @@ Ishchilarning vazifalari qancha vaqtda qayta yuborilib ogohlantirilsin?
 Vaqt birligini tanlang:
         """
         
-        keyboard = [
-            [InlineKeyboardButton("⏰ Soat", callback_data="reminder_unit_hours")],
-            [InlineKeyboardButton("⏱ Minut", callback_data="reminder_unit_minutes")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="settings_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['reminder_units']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_reminder_unit_selection(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ogohlantirish vaqti birligini tanlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -481,7 +468,7 @@ Faqat raqam kiriting (masalan: 5)
     
     async def handle_reminder_value_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ogohlantirish vaqti qiymatini kiritish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Holatni tekshirish
         current_state = self.user_states.get(user['id'])
@@ -514,8 +501,10 @@ Faqat raqam kiriting (masalan: 5)
                 display_text = f"{value} minut"
             
             # Database ga saqlash
-            query = "UPDATE org_settings SET reminder_interval_minutes = %s, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)"
-            self.db.execute_update(query, (reminder_minutes,))
+            query = statement('update_reminder_interval', "UPDATE org_settings SET reminder_interval_minutes = %s, version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = (SELECT id FROM org_settings ORDER BY id DESC LIMIT 1)")
+            await self.db.execute_update(query, (reminder_minutes,))
+            # Sozlamalar keshini yangilash
+            await self.db.refresh_org_settings()
             
             # Holatni tozalash
             del self.user_states[user['id']]
@@ -523,7 +512,7 @@ Faqat raqam kiriting (masalan: 5)
                 del context.user_data['reminder_unit']
             
             # Audit log
-            self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Ogohlantirish vaqti yangilandi: {display_text} ({reminder_minutes} minut)")
+            await self.db.add_audit_log(user['id'], 'SETTINGS_UPDATED', f"Ogohlantirish vaqti yangilandi: {display_text} ({reminder_minutes} minut)")
             
             text = f"""
 ✅ <b>Ogohlantirish vaqti yangilandi!</b>
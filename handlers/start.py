@@ -1,6 +1,7 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from handlers.base import BaseHandler
+from keyboards import SHARE_PHONE_KEYBOARD
 from config import UserRole
 import logging
 import re
@@ -10,27 +11,27 @@ logger = logging.getLogger(__name__)
 class StartHandler(BaseHandler):
     async def handle_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Start komandasi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Agar foydalanuvchi to'liq registratsiya qilmagan bo'lsa
         if not user.get('full_name') or user.get('full_name') == 'Yangi Foydalanuvchi' or not user.get('phone'):
             # Super Admin uchun ro'yxatdan o'tish jarayonini o'tkazib yuborish
             if user.get('role') == UserRole.SUPER_ADMIN:
                 # Super Admin uchun default ma'lumotlar
-                self.db.update_user_full_name(user['id'], "Super Admin")
-                self.db.update_user_phone(user['id'], "+998000000000")
+                await self.db.update_user_full_name(user['id'], "Super Admin")
+                await self.db.update_user_phone(user['id'], "+998000000000")
                 # Yangi user object ni olish
-                user = self.get_user(update)
+                user = await self.get_user(update)
             else:
                 await self.start_registration(update, context, user)
                 return
         
         # Tashkilot sozlamalarini tekshirish
-        org_settings = self.db.get_org_settings()
+        org_settings = await self.db.get_org_settings()
         if not org_settings and user['role'] == UserRole.SUPER_ADMIN:
             # Super Admin uchun tashkilot sozlamalarini yaratish
-            self.db.create_org_settings("Yangi Tashkilot")
-            org_settings = self.db.get_org_settings()
+            await self.db.create_org_settings("Yangi Tashkilot")
+            org_settings = await self.db.get_org_settings()
         
         welcome_text = f"""
 🤖 <b>IshBot - Vazifa Boshqarish Tizimi</b>
@@ -48,7 +49,7 @@ Quyidagi menyudan kerakli funksiyani tanlang:
         await self.send_message(update, context, welcome_text, reply_markup)
         
         # Audit log
-        self.db.add_audit_log(user['id'], 'BOT_STARTED', f"Bot ishga tushirildi")
+        await self.db.add_audit_log(user['id'], 'BOT_STARTED', f"Bot ishga tushirildi")
     
     async def start_registration(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user: dict):
         """Registratsiya jarayonini boshlash"""
@@ -69,7 +70,7 @@ Iltimos, ism va familiyangizni kiriting.
     
     async def handle_full_name_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ism familiya qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         full_name = update.message.text.strip()
         
         # Ism familiya formatini tekshirish (kamida 2 so'z)
@@ -79,7 +80,7 @@ Iltimos, ism va familiyangizni kiriting.
             return
         
         # Ism familiyani saqlash
-        self.db.update_user_full_name(user['id'], full_name)
+        await self.db.update_user_full_name(user['id'], full_name)
         
         # Telefon raqamini so'rash
         phone_text = f"""
@@ -90,10 +91,7 @@ Iltimos, ism va familiyangizni kiriting.
         """
         
         # Telefon ulashish tugmasi
-        keyboard = [
-            [KeyboardButton("📱 Telefon raqamini ulashish", request_contact=True)]
-        ]
-        reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
+        reply_markup = SHARE_PHONE_KEYBOARD
         
         # Foydalanuvchi holatini o'zgartirish
         self.user_states[user['id']] = 'waiting_phone'
@@ -102,7 +100,7 @@ Iltimos, ism va familiyangizni kiriting.
     
     async def handle_phone_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Telefon raqami qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         phone = None
         
@@ -131,7 +129,7 @@ Iltimos, ism va familiyangizni kiriting.
             return
         
         # Telefon raqamini saqlash
-        self.db.update_user_phone(user['id'], phone)
+        await self.db.update_user_phone(user['id'], phone)
         
         # Registratsiya yakunlangan
         await self.complete_registration(update, context, user)
@@ -156,7 +154,7 @@ Iltimos, ism va familiyangizni kiriting.
     async def complete_registration(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user: dict):
         """Registratsiyani yakunlash"""
         # Yangilangan foydalanuvchi ma'lumotlarini olish
-        updated_user = self.db.get_user_by_telegram_id(user['telegram_id'])
+        updated_user = await self.db.get_user_by_telegram_id(user['telegram_id'])
         
         welcome_text = f"""
 🎉 <b>Hush kelibsiz!</b>
@@ -181,10 +179,10 @@ Endi bot funksiyalaridan foydalanishingiz mumkin!
         await update.message.reply_text(welcome_text, reply_markup=reply_markup, parse_mode='HTML')
         
         # Tashkilot sozlamalarini tekshirish
-        org_settings = self.db.get_org_settings()
+        org_settings = await self.db.get_org_settings()
         if not org_settings and updated_user['role'] == UserRole.SUPER_ADMIN:
-            self.db.create_org_settings("Yangi Tashkilot")
-            org_settings = self.db.get_org_settings()
+            await self.db.create_org_settings("Yangi Tashkilot")
+            org_settings = await self.db.get_org_settings()
         
         # Asosiy menyu
         main_menu_text = f"""
@@ -197,12 +195,12 @@ Quyidagi menyudan kerakli funksiyani tanlang:
         await self.send_message(update, context, main_menu_text, reply_markup)
         
         # Audit log
-        self.db.add_audit_log(updated_user['id'], 'USER_REGISTERED', 
+        await self.db.add_audit_log(updated_user['id'], 'USER_REGISTERED', 
             f"Registratsiya yakunlandi: {updated_user['full_name']}")
     
     async def handle_phone_choice(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Telefon raqami tanlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if update.message.text == "📱 Telefon raqamini ulashish":
             await self.send_message(update, context, 
@@ -247,7 +245,7 @@ Savollar bo'lsa, administratorga murojaat qiling.
     
     async def handle_id(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """ID ko'rsatish komandasi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Barcha foydalanuvchilar o'z ID sini ko'ra oladi
         
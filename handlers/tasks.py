@@ -1,10 +1,14 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from handlers.base import BaseHandler
+from keyboards import MENUS
+from gateway import PRIORITY_NOTIFICATION
+from outbox import outbox_message
 from handlers.resubmit_handler import ResubmitHandler
 from handlers.tasks_notifications import TaskNotificationHandler
 from config import UserRole
 from utils import format_datetime, get_status_emoji, get_priority_emoji, calculate_time_remaining, get_uzbek_time, format_penalty_amount, mask_phone_number
+from statements import statement
 import logging
 import uuid
 from datetime import datetime, timedelta
@@ -20,7 +24,7 @@ class TaskHandler(BaseHandler):
     
     async def handle_create_task(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifa yaratish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
@@ -40,7 +44,7 @@ Vazifa sarlavhasini yuboring:
     
     async def handle_task_title(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifa sarlavhasini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if self.user_states.get(user['id']) != 'creating_task':
             return
@@ -55,15 +59,12 @@ Vazifa sarlavhasini yuboring:
 Vazifa tavsifini yuboring yoki "O'tkazib yuborish" tugmasini bosing:
         """
         
-        keyboard = [
-            [InlineKeyboardButton("⏭ O'tkazib yuborish", callback_data="skip_description")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['skip_description']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_task_description(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifa tavsifini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if self.user_states.get(user['id']) != 'task_description':
             return
@@ -83,7 +84,7 @@ Boshlanish vaqtini yuboring (DD.MM.YYYY HH:MM formatida):
     
     async def handle_task_start_time(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifa boshlanish vaqtini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if self.user_states.get(user['id']) != 'task_start_time':
             return
@@ -111,7 +112,7 @@ Deadline vaqtini yuboring (DD.MM.YYYY HH:MM formatida):
     
     async def handle_task_deadline(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifa deadline'ini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if self.user_states.get(user['id']) != 'task_deadline':
             return
@@ -128,8 +129,7 @@ Deadline vaqtini yuboring (DD.MM.YYYY HH:MM formatida):
             start_time = self.user_states[f"{user['id']}_start_time"]
             
             # Ishchilarni olish
-            workers = self.db.get_active_users()
-            workers = [w for w in workers if w['role'] == 'WORKER']
+            workers = await self.db.get_users_by_role([UserRole.WORKER])
             
             if not workers:
                 await self.send_message(update, context, "❌ Hozircha ishchilar yo'q!")
@@ -167,7 +167,7 @@ Ustuvorlikni tanlang:
     
     async def handle_task_priority(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifa ustuvorligini tanlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         data = update.callback_query.data.split('_')
         priority = data[1]
         task_id = data[2]
@@ -186,8 +186,7 @@ Ustuvorlikni tanlang:
         deadline = self.user_states[f"{user['id']}_deadline"]
         
         # Ishchilarni olish
-        workers = self.db.get_active_users()
-        workers = [w for w in workers if w['role'] == 'WORKER']
+        workers = await self.db.get_users_by_role([UserRole.WORKER])
         
         priority_emoji = "🔴" if priority == "YUQORI" else "🟡" if priority == "ORTA" else "🟢"
         
@@ -215,7 +214,7 @@ Ishchini tanlang:
     
     async def handle_task_assign(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchini tayinlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         data = update.callback_query.data.split('_')
         worker_id = int(data[1])
         task_id = data[2]
@@ -232,29 +231,40 @@ Ishchini tanlang:
             deadline = self.user_states[f"{user['id']}_deadline"]
             priority = self.user_states.get(f"{user['id']}_priority", "ORTA")
             
-            # Vazifani yaratish
-            self.db.create_task(
-                task_id=task_id,
-                title=title,
-                description=description,
-                created_by=user['id'],
-                assigned_to=worker_id,
-                start_at=start_time,
-                deadline=deadline,
-                priority=priority
-            )
-            
-            # Ishchini olish
-            worker = self.db.get_user_by_id(worker_id)
+            # Ishchini olish va xabarni tayyorlash (tranzaksiyadan oldin)
+            worker = await self.db.get_user_by_id(worker_id)
             assignee_name = worker['full_name'] if worker else "Noma'lum"
-            assignee_telegram_id = worker['telegram_id'] if worker else None
+            messages = []
+            if worker and worker['telegram_id']:
+                messages = self.task_assigned_messages(worker, task_id, title, deadline)
+            else:
+                logger.error(f"⚠️ Ishchining telegram_id topilmadi: {worker_id} (Ishchi: {assignee_name})")
             
-            # Audit log
-            self.db.add_audit_log(
-                user['id'], 
-                'TASK_CREATED', 
-                f"Yangi vazifa yaratildi: {title} - {assignee_name}"
-            )
+            # Vazifa, audit log va ishchiga xabar (outbox) bitta tranzaksiyada
+            def create(db):
+                # Vazifani yaratish
+                db.create_task(
+                    task_id=task_id,
+                    title=title,
+                    description=description,
+                    created_by=user['id'],
+                    assigned_to=worker_id,
+                    start_at=start_time,
+                    deadline=deadline,
+                    priority=priority
+                )
+                
+                # Audit log
+                db.add_audit_log(
+                    user['id'], 
+                    'TASK_CREATED', 
+                    f"Yangi vazifa yaratildi: {title} - {assignee_name}"
+                )
+                
+                # Ishchiga xabar
+                db.enqueue_notifications(messages)
+            
+            await self.db.run_in_transaction(create)
             
             # Foydalanuvchi holatini tozalash
             self.user_states.pop(user['id'], None)
@@ -276,39 +286,18 @@ Ishchini tanlang:
             reply_markup = self.create_main_menu(user['role'])
             await self.send_message(update, context, text, reply_markup)
             
-            # Ishchiga xabar yuborish (telegram_id bo'yicha)
-            if assignee_telegram_id:
-                logger.info(f"Vazifa biriktirilgan ishchiga xabar yuborilmoqda: {assignee_name} (Telegram ID: {assignee_telegram_id})")
-                try:
-                    await self.notify_worker_task_assigned(assignee_telegram_id, task_id, title, deadline, context)
-                except Exception as notify_error:
-                    logger.error(f"Xabar yuborishda xatolik: {notify_error}", exc_info=True)
-            else:
-                logger.error(f"⚠️ Ishchining telegram_id topilmadi: {worker_id} (Ishchi: {assignee_name})")
-            
         except Exception as e:
             logger.error(f"Vazifa yaratishda xatolik: {e}")
             await self.send_message(update, context, "❌ Vazifa yaratishda xatolik yuz berdi!")
     
-    async def notify_worker_task_assigned(self, worker_telegram_id: int, task_id: str, task_title: str, task_deadline: str, context: ContextTypes.DEFAULT_TYPE):
-        """Ishchiga yangi vazifa tayinlanganini xabar qilish"""
-        try:
-            # Bot tekshiruvi
-            if not context or not hasattr(context, 'bot') or not context.bot:
-                logger.error("Context yoki bot None!")
-                return
-            
-            worker = self.db.get_user_by_telegram_id(worker_telegram_id)
-            if not worker:
-                logger.error(f"Ishchi topilmadi: {worker_telegram_id}")
-                return
-            
-            # Ishchi faol emas bo'lsa, xabar yubormaslik
-            if not worker.get('is_active', True):
-                logger.info(f"Ishchi faol emas, xabar yuborilmaydi: {worker['full_name']}")
-                return
-
-            notification_text = f"""
+    def task_assigned_messages(self, worker: dict, task_id: str, task_title: str, task_deadline: str) -> list:
+        """Ishchiga yangi vazifa tayinlangani haqida xabar (outbox qatorlari)"""
+        # Ishchi faol emas bo'lsa, xabar yubormaslik
+        if not worker.get('is_active', True):
+            logger.info(f"Ishchi faol emas, xabar yuborilmaydi: {worker['full_name']}")
+            return []
+
+        notification_text = f"""
 📝 <b>Yangi vazifa tayinlandi!</b>
 
 📋 <b>Vazifa:</b> {task_title}
@@ -316,28 +305,18 @@ Ishchini tanlang:
 📅 <b>Tayinlangan vaqt:</b> {format_datetime(get_uzbek_time())}
 
 Vazifani bajarishni boshlang!
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton("👁 Vazifani ko'rish", callback_data=f"view_task_{task_id}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await context.bot.send_message(
-                chat_id=worker_telegram_id,
-                text=notification_text,
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
-            
-            logger.info(f"✅ Vazifa xabari yuborildi ishchiga: {worker['full_name']} (ID: {worker_telegram_id})")
-            
-        except Exception as e:
-            logger.error(f"❌ Ishchiga xabar yuborishda xatolik: {e}", exc_info=True)
+        """
+        
+        keyboard = [
+            [InlineKeyboardButton("👁 Vazifani ko'rish", callback_data=f"view_task_{task_id}")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        return [outbox_message(f"task_assigned:{task_id}", worker['telegram_id'], notification_text, reply_markup)]
     
     async def handle_tasks_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifalar menyusi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if user['role'] == UserRole.WORKER:
             text = """
@@ -346,13 +325,7 @@ Vazifani bajarishni boshlang!
 Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
             """
             
-            keyboard = [
-                [InlineKeyboardButton("🔄 Faol vazifalar", callback_data="my_tasks")],
-                [InlineKeyboardButton("✅ Bajarilgan ishlar", callback_data="completed_tasks")],
-                [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = MENUS['worker_tasks_shortcut']
             await self.send_message(update, context, text, reply_markup)
             return
         
@@ -363,21 +336,13 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
 Vazifalarni boshqarish uchun quyidagi tugmalardan birini tanlang:
         """
         
-        keyboard = [
-            [InlineKeyboardButton("📝 Mening vazifalarim", callback_data="my_tasks")],
-            [InlineKeyboardButton("🔍 Barcha vazifalar", callback_data="all_tasks")],
-            [InlineKeyboardButton("⏳ Tasdiqlash kerak", callback_data="pending_approval")],
-            [InlineKeyboardButton("🔎 Qidiruv/Filtr", callback_data="search_tasks")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['tasks_menu']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_search_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Qidiruv/Filtr menyusi"""
         
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
@@ -389,33 +354,26 @@ Vazifalarni boshqarish uchun quyidagi tugmalardan birini tanlang:
 Qanday qidirish kerak?
         """
         
-        keyboard = [
-            [InlineKeyboardButton("👤 Ishlar bo'yicha qidirish", callback_data="search_by_worker")],
-            [InlineKeyboardButton("📅 Sana bo'yicha qidirish", callback_data="search_by_date")],
-            [InlineKeyboardButton("📊 Status bo'yicha qidirish", callback_data="search_by_status")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['search_tasks']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_pending_approval(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Tasdiqlash kerak bo'lgan vazifalar"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
             return
         
         # Tasdiqlash kerak bo'lgan vazifalarni olish
-        query = """
+        query = statement('pending_approval_tasks', """
             SELECT t.*, u.full_name as assigned_name 
             FROM tasks t 
             JOIN users u ON t.assigned_to = u.id 
             WHERE t.status = 'TASDIQLASH_KUTILMOQDA'
             ORDER BY t.created_at DESC
-        """
-        tasks = self.db.execute_query(query)
+        """)
+        tasks = await self.db.execute_query(query)
         
         if not tasks:
             text = "✅ Hozircha tasdiqlash kerak bo'lgan vazifalar yo'q."
@@ -435,30 +393,25 @@ Qanday qidirish kerak?
             text += f"   📅 {format_datetime(task['deadline'])}\n\n"
         
         # Tugmalar
-        keyboard = [
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="tasks_menu")],
-            [InlineKeyboardButton("🏠 Bosh menyu", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['task_list_nav']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_all_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Barcha vazifalar"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
             return
         
         # Barcha vazifalarni olish
-        query = """
+        query = statement('all_tasks', """
             SELECT t.*, u.full_name as assigned_name 
             FROM tasks t 
             JOIN users u ON t.assigned_to = u.id 
             ORDER BY t.created_at DESC
-        """
-        tasks = self.db.execute_query(query)
+        """)
+        tasks = await self.db.execute_query(query, replica=True)
         
         if not tasks:
             text = "📝 Hozircha vazifalar yo'q."
@@ -478,17 +431,12 @@ Qanday qidirish kerak?
             text += f"   📅 {format_datetime(task['deadline'])}\n\n"
         
         # Tugmalar
-        keyboard = [
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="tasks_menu")],
-            [InlineKeyboardButton("🏠 Bosh menyu", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['task_list_nav']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_worker_tasks_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchilar uchun vazifalar menyusi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if user['role'] != UserRole.WORKER:
             await self.send_message(update, context, "❌ Bu funksiya faqat ishchilar uchun!")
@@ -500,27 +448,19 @@ Qanday qidirish kerak?
 Quyidagi bo'limlardan birini tanlang:
         """
         
-        keyboard = [
-            [InlineKeyboardButton("🔄 Faol vazifalar", callback_data="active_tasks")],
-            [InlineKeyboardButton("✅ Bajarilgan ishlar", callback_data="completed_tasks")],
-            [InlineKeyboardButton("❌ Muvaffaqiyatsiz", callback_data="failed_tasks")],
-            [InlineKeyboardButton("⏳ Tasdiqlash kutilmoqda", callback_data="worker_pending_tasks")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['worker_tasks_menu']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_worker_pending_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchining tasdiqlash kutilayotgan vazifalari"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if user['role'] != UserRole.WORKER:
             await self.send_message(update, context, "❌ Bu funksiya faqat ishchilar uchun!")
             return
         
         # Tasdiqlash kutilayotgan vazifalar
-        tasks = self.db.get_user_tasks_by_status(user['id'], ['TASDIQLASH_KUTILMOQDA'])
+        tasks = await self.db.get_user_tasks_by_status(user['id'], ['TASDIQLASH_KUTILMOQDA'])
         
         if not tasks:
             text = "⏳ Hozircha tasdiqlash kutilayotgan vazifalar yo'q."
@@ -553,62 +493,47 @@ Quyidagi bo'limlardan birini tanlang:
     
     async def handle_worker_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchining statistikasi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if user['role'] != UserRole.WORKER:
             await self.send_message(update, context, "❌ Bu funksiya faqat ishchilar uchun!")
             return
         
-        # Statistikani hisoblash
-        all_tasks = self.db.get_user_tasks_by_status(user['id'], [])
-        active_tasks = self.db.get_user_tasks_by_status(user['id'], ['REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA'])
-        completed_tasks = self.db.get_user_tasks_by_status(user['id'], ['BAJARILDI'])
-        failed_tasks = self.db.get_user_tasks_by_status(user['id'], ['RAD_ETILDI', 'MUDDATI_OTGAN'])
-        pending_tasks = self.db.get_user_tasks_by_status(user['id'], ['TASDIQLASH_KUTILMOQDA'])
-        
-        # Jarima hisoblash
-        query = """
-            SELECT SUM(penalty_amount) as total_penalty, COUNT(*) as penalized_count
-            FROM tasks
-            WHERE assigned_to = ? AND is_penalized = TRUE
-        """
-        penalty_result = self.db.execute_query(query, (user['id'],))
-        total_penalty = penalty_result[0]['total_penalty'] if penalty_result and penalty_result[0]['total_penalty'] else 0
-        penalized_count = penalty_result[0]['penalized_count'] if penalty_result and penalty_result[0]['penalized_count'] else 0
+        # Statistika worker_stats jadvalida tayyor turadi (hisobot - replikadan o'qish yetarli)
+        stats = await self.db.get_worker_stats(user['id'], replica=True)
+        total_penalty = stats['penalty_total'] or 0
+        penalized_count = stats['penalized_count']
+        active_count = stats['scheduled_count'] + stats['in_progress_count'] + stats['waiting_approval_count']
+        failed_count = stats['rejected_count'] + stats['overdue_count']
         
         # Foiz hisoblash
-        total_count = len(all_tasks)
-        completed_percent = (len(completed_tasks) / total_count * 100) if total_count > 0 else 0
+        total_count = stats['total_count']
+        completed_percent = (stats['done_count'] / total_count * 100) if total_count > 0 else 0
         
         text = f"""
 📊 <b>Mening statistikam</b>
 
 📈 <b>Umumiy ko'rsatkichlar:</b>
 • 📋 Jami vazifalar: {total_count} ta
-• 🔄 Faol vazifalar: {len(active_tasks)} ta
-• ✅ Bajarilgan: {len(completed_tasks)} ta ({completed_percent:.1f}%)
-• ❌ Muvaffaqiyatsiz: {len(failed_tasks)} ta
-• ⏳ Tasdiqlash kutilmoqda: {len(pending_tasks)} ta
+• 🔄 Faol vazifalar: {active_count} ta
+• ✅ Bajarilgan: {stats['done_count']} ta ({completed_percent:.1f}%)
+• ❌ Muvaffaqiyatsiz: {failed_count} ta
+• ⏳ Tasdiqlash kutilmoqda: {stats['waiting_approval_count']} ta
 
 💰 <b>Jarima ma'lumotlari:</b>
 • Jarima miqdori: {format_penalty_amount(total_penalty) if total_penalty > 0 else '0 UZS'}
 • Jarima qilingan vazifalar: {penalized_count} ta
 
 📅 <b>Oxirgi faollik:</b>
-• Oxirgi vazifa: {format_datetime(all_tasks[0]['created_at']) if all_tasks else "Yo'q"}
+• Oxirgi vazifa: {format_datetime(stats['last_task_at']) if stats['last_task_at'] else "Yo'q"}
         """
         
-        keyboard = [
-            [InlineKeyboardButton("🔄 Yangilash", callback_data="worker_stats")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['worker_stats']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_worker_profile(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchining ma'lumotlari"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if user['role'] != UserRole.WORKER:
             await self.send_message(update, context, "❌ Bu funksiya faqat ishchilar uchun!")
@@ -627,17 +552,12 @@ Quyidagi bo'limlardan birini tanlang:
 📅 <b>Registratsiya:</b> {format_datetime(user.get('created_at', '')) if user.get('created_at') else 'Nomalum'}
         """
         
-        keyboard = [
-            [InlineKeyboardButton("📊 Statistika", callback_data="worker_stats")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['worker_profile']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_my_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Mening vazifalarim menyusi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if user['role'] == UserRole.WORKER:
             text = """
@@ -646,14 +566,7 @@ Quyidagi bo'limlardan birini tanlang:
 Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
             """
             
-            keyboard = [
-                [InlineKeyboardButton("🔄 Faol vazifalar", callback_data="active_tasks")],
-                [InlineKeyboardButton("✅ Bajarilgan ishlar", callback_data="completed_tasks")],
-                [InlineKeyboardButton("❌ Bajarilmagan vaqt o'tgan", callback_data="failed_tasks")],
-                [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = MENUS['worker_my_tasks']
             await self.send_message(update, context, text, reply_markup)
             return
         
@@ -662,7 +575,7 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
         
         # Faqat faol vazifalar (BAJARILDI va RAD_ETILDI dan tashqari)
         active_statuses = ['REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA']
-        tasks = self.db.get_user_tasks_by_status(user['id'], active_statuses)
+        tasks = await self.db.get_user_tasks_by_status(user['id'], active_statuses)
         
         if not tasks:
             text += "🔄 Hozircha faol vazifalar yo'q."
@@ -697,11 +610,11 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
     
     async def handle_active_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Faol vazifalar"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Faqat faol vazifalar (BAJARILDI va RAD_ETILDI dan tashqari)
         active_statuses = ['REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA']
-        tasks = self.db.get_user_tasks_by_status(user['id'], active_statuses)
+        tasks = await self.db.get_user_tasks_by_status(user['id'], active_statuses)
         
         if not tasks:
             text = "🔄 Hozircha faol vazifalar yo'q."
@@ -736,11 +649,11 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
     
     async def handle_completed_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Bajarilgan vazifalar"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Faqat bajarilgan vazifalar (rad etilgan ishlar kiritilmaydi)
         completed_statuses = ['BAJARILDI']
-        tasks = self.db.get_user_tasks_by_status(user['id'], completed_statuses)
+        tasks = await self.db.get_user_tasks_by_status(user['id'], completed_statuses)
         
         if not tasks:
             text = "✅ Hozircha bajarilgan vazifalar yo'q."
@@ -781,11 +694,11 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
     
     async def handle_failed_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Bajarilmagan vaqt o'tgan vazifalar"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Muddati o'tgan va rad etilgan vazifalar
         failed_statuses = ['MUDDATI_OTGAN', 'RAD_ETILDI']
-        tasks = self.db.get_user_tasks_by_status(user['id'], failed_statuses)
+        tasks = await self.db.get_user_tasks_by_status(user['id'], failed_statuses)
         
         if not tasks:
             text = "❌ Hozircha bajarilmagan vaqt o'tgan vazifalar yo'q."
@@ -834,10 +747,10 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
     
     async def handle_view_task(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifani ko'rish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         task_id = update.callback_query.data.split('_')[2]
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task:
             await self.send_message(update, context, "❌ Vazifa topilmadi!")
             return
@@ -882,9 +795,9 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
                 ])
             elif task['status'] == 'TASDIQLASH_KUTILMOQDA':
                 # Qayta yuborish imkoniyatini tekshirish
-                can_resubmit = self.db.can_resubmit_task(task_id)
+                can_resubmit = await self.db.can_resubmit_task(task_id)
                 if can_resubmit:
-                    resubmit_count = self.db.get_task_resubmit_count(task_id)
+                    resubmit_count = await self.db.get_task_resubmit_count(task_id)
                     remaining_attempts = 3 - resubmit_count
                     keyboard.append([
                         InlineKeyboardButton(f"🔄 Qayta yuborish ({remaining_attempts} qoldi)", callback_data=f"resubmit_task_{task_id}")
@@ -913,10 +826,10 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
     
     async def handle_complete_task(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifani tugatish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         task_id = update.callback_query.data.split('_')[2]
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task or task['assigned_to'] != user['id']:
             await self.send_message(update, context, "❌ Bu vazifa sizga tegishli emas!")
             return
@@ -925,14 +838,20 @@ Vazifalaringizni ko'rish uchun quyidagi tugmalardan birini tanlang:
             await self.send_message(update, context, "❌ Vazifa tugatish uchun tayyor emas!")
             return
         
-        # Statusni yangilash va tugatish vaqtini belgilash
-        self.db.complete_task(task_id)
+        # Admin'larga xabar (tranzaksiyadan oldin tayyorlanadi)
+        admins = await self.db.get_admins()
+        messages = self.notification_handler.task_completed_messages(task, user, admins)
         
-        # Audit log
-        self.db.add_audit_log(user['id'], 'TASK_COMPLETED', f"Vazifa tugatildi: {task['title']}")
+        def complete(db):
+            # Statusni yangilash va tugatish vaqtini belgilash
+            db.complete_task(task_id)
+            
+            # Audit log
+            db.add_audit_log(user['id'], 'TASK_COMPLETED', f"Vazifa tugatildi: {task['title']}")
+            
+            db.enqueue_notifications(messages)
         
-        # Admin'larga xabar yuborish
-        await self.notification_handler.notify_admins_task_completed(task, user, context)
+        await self.db.run_in_transaction(complete)
         
         text = f"""
 ✅ <b>Vazifa tugatildi!</b>
@@ -949,26 +868,36 @@ Admin'lar vazifani tasdiqlaydi.
     
     async def handle_approve_task(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifani tasdiqlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         task_id = update.callback_query.data.split('_')[2]
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
             return
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task or task['status'] != 'TASDIQLASH_KUTILMOQDA':
             await self.send_message(update, context, "❌ Vazifa tasdiqlash uchun tayyor emas!")
             return
         
-        # Statusni yangilash va tasdiqlash vaqtini belgilash
-        self.db.approve_task(task_id, user['id'])
+        # Ishchiga xabar (tranzaksiyadan oldin tayyorlanadi)
+        worker = await self.db.get_user_by_id(task['assigned_to'])
+        messages = []
+        if worker:
+            messages.append(self.notification_handler.task_approved_message(task, user, worker))
+        else:
+            logger.error(f"Ishchi topilmadi: {task['assigned_to']}")
         
-        # Audit log
-        self.db.add_audit_log(user['id'], 'TASK_APPROVED', f"Vazifa tasdiqlandi: {task['title']}")
+        def approve(db):
+            # Statusni yangilash va tasdiqlash vaqtini belgilash
+            db.approve_task(task_id, user['id'])
+            
+            # Audit log
+            db.add_audit_log(user['id'], 'TASK_APPROVED', f"Vazifa tasdiqlandi: {task['title']}")
+            
+            db.enqueue_notifications(messages)
         
-        # Ishchiga xabar yuborish
-        await self.notification_handler.notify_worker_task_approved(task, user, context)
+        await self.db.run_in_transaction(approve)
         
         text = f"""
 ✅ <b>Vazifa tasdiqlandi!</b>
@@ -982,35 +911,50 @@ Admin'lar vazifani tasdiqlaydi.
     
     async def handle_reject_task(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifani rad etish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         task_id = update.callback_query.data.split('_')[2]
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
             return
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task or task['status'] != 'TASDIQLASH_KUTILMOQDA':
             await self.send_message(update, context, "❌ Vazifa rad etish uchun tayyor emas!")
             return
         
-        # Statusni yangilash
-        self.db.update_task_status(task_id, 'RAD_ETILDI', rejected_by=user['id'])
+        # Ishchi tranzaksiyadan oldin olinadi; xabar matni yangi qayta yuborish soniga bog'liq
+        worker = await self.db.get_user_by_id(task['assigned_to'])
+        if not worker:
+            logger.error(f"Ishchi topilmadi: {task['assigned_to']}")
+        
+        # Barcha o'zgarishlar bitta tranzaksiyada
+        def reject(db):
+            # Statusni yangilash
+            db.update_task_status(task_id, 'RAD_ETILDI', rejected_by=user['id'])
+            
+            # Qayta yuborish sonini oshirish
+            resubmit_count = db.increment_resubmit_count(task_id)
+            
+            # Agar 3 marta rad etilgan bo'lsa, shtraf qo'llash
+            if resubmit_count >= 3:
+                db.apply_penalty(task_id, 1000000)
+            
+            # Audit log
+            db.add_audit_log(user['id'], 'TASK_REJECTED', f"Vazifa rad etildi: {task['title']} (Qayta yuborish: {resubmit_count}/3)")
+            
+            # Ishchiga xabar
+            if worker:
+                db.enqueue_notifications([
+                    self.notification_handler.task_rejected_message(task, user, worker, resubmit_count)
+                ])
+            return resubmit_count
         
-        # Qayta yuborish sonini oshirish
-        resubmit_count = self.db.increment_resubmit_count(task_id)
+        resubmit_count = await self.db.run_in_transaction(reject)
         
-        # Agar 3 marta rad etilgan bo'lsa, shtraf qo'llash
         if resubmit_count >= 3:
-            self.db.apply_penalty(task_id, 1000000)
             logger.info(f"Vazifa {task_id} uchun shtraf qo'llanildi: 1,000,000")
         
-        # Audit log
-        self.db.add_audit_log(user['id'], 'TASK_REJECTED', f"Vazifa rad etildi: {task['title']} (Qayta yuborish: {resubmit_count}/3)")
-        
-        # Ishchiga xabar yuborish
-        await self.notification_handler.notify_worker_task_rejected(task, user, context, resubmit_count)
-        
         text = f"""
 ❌ <b>Vazifa rad etildi!</b>
 
@@ -1023,15 +967,14 @@ Admin'lar vazifani tasdiqlaydi.
     
     async def handle_search_by_worker(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchi bo'yicha qidirish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
             return
         
         # Barcha ishchilarni olish
-        workers = self.db.get_active_users()
-        workers = [w for w in workers if w['role'] == 'WORKER']
+        workers = await self.db.get_users_by_role([UserRole.WORKER])
         
         if not workers:
             text = "❌ Hozircha ishchilar yo'q."
@@ -1044,7 +987,7 @@ Admin'lar vazifani tasdiqlaydi.
         keyboard = []
         for worker in workers:
             # Har bir ishchining vazifalar sonini olish
-            worker_tasks = self.db.get_user_tasks_by_status(worker['id'], ['REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA'])
+            worker_tasks = await self.db.get_user_tasks_by_status(worker['id'], ['REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA'])
             task_count = len(worker_tasks)
             
             keyboard.append([
@@ -1060,7 +1003,7 @@ Admin'lar vazifani tasdiqlaydi.
     
     async def handle_search_by_date(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Sana bo'yicha qidirish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
@@ -1080,7 +1023,7 @@ Masalan: 01.01.2024
     
     async def handle_search_by_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Status bo'yicha qidirish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
@@ -1092,22 +1035,12 @@ Masalan: 01.01.2024
 Statusni tanlang:
         """
         
-        keyboard = [
-            [InlineKeyboardButton("📅 REJALASHTIRILGAN", callback_data="search_status_REJALASHTIRILGAN")],
-            [InlineKeyboardButton("🔄 JARAYONDA", callback_data="search_status_JARAYONDA")],
-            [InlineKeyboardButton("⏳ TASDIQLASH_KUTILMOQDA", callback_data="search_status_TASDIQLASH_KUTILMOQDA")],
-            [InlineKeyboardButton("✅ BAJARILDI", callback_data="search_status_BAJARILDI")],
-            [InlineKeyboardButton("❌ RAD_ETILDI", callback_data="search_status_RAD_ETILDI")],
-            [InlineKeyboardButton("🚨 MUDDATI_OTGAN", callback_data="search_status_MUDDATI_OTGAN")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="search_tasks")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['search_by_status']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_edit_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifalarni tahrirlash menyusi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
@@ -1121,15 +1054,15 @@ Tahrirlash uchun vazifani tanlang:
         
         # Faqat faol vazifalarni ko'rsatish
         active_statuses = ['REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA']
-        query = """
+        query = statement('active_tasks_for_edit', """
             SELECT t.*, u.full_name as assigned_name 
             FROM tasks t 
             JOIN users u ON t.assigned_to = u.id 
             WHERE t.status IN ('REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA')
             ORDER BY t.created_at DESC
             LIMIT 10
-        """
-        tasks = self.db.execute_query(query)
+        """)
+        tasks = await self.db.execute_query(query)
         
         if not tasks:
             text += "\n❌ Tahrirlash uchun vazifalar yo'q."
@@ -1153,7 +1086,7 @@ Tahrirlash uchun vazifani tanlang:
     
     async def handle_worker_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchining vazifalarini ko'rish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         worker_id = int(update.callback_query.data.split('_')[2])
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
@@ -1161,20 +1094,20 @@ Tahrirlash uchun vazifani tanlang:
             return
         
         # Ishchini olish
-        worker = self.db.get_user_by_id(worker_id)
+        worker = await self.db.get_user_by_id(worker_id)
         if not worker:
             await self.send_message(update, context, "❌ Ishchi topilmadi!")
             return
         
         # Ishchining barcha vazifalarini olish
-        query = """
+        query = statement('worker_tasks', """
             SELECT t.*, u.full_name as assigned_name 
             FROM tasks t 
             JOIN users u ON t.assigned_to = u.id 
             WHERE t.assigned_to = ?
             ORDER BY t.created_at DESC
-        """
-        tasks = self.db.execute_query(query, (worker_id,))
+        """)
+        tasks = await self.db.execute_query(query, (worker_id,))
         
         text = f"👤 <b>{worker['full_name']} ning vazifalari</b>\n\n"
         
@@ -1193,17 +1126,12 @@ Tahrirlash uchun vazifani tanlang:
             text += f"   📅 {format_datetime(task['deadline'])}\n\n"
         
         # Tugmalar
-        keyboard = [
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="search_by_worker")],
-            [InlineKeyboardButton("🏠 Bosh menyu", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['worker_task_list_nav']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_edit_worker_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchining vazifalarini tahrirlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         worker_id = int(update.callback_query.data.split('_')[3])
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
@@ -1211,21 +1139,21 @@ Tahrirlash uchun vazifani tanlang:
             return
         
         # Ishchini olish
-        worker = self.db.get_user_by_id(worker_id)
+        worker = await self.db.get_user_by_id(worker_id)
         if not worker:
             await self.send_message(update, context, "❌ Ishchi topilmadi!")
             return
         
         # Ishchining faol vazifalarini olish
         active_statuses = ['REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA']
-        query = """
+        query = statement('worker_active_tasks', """
             SELECT t.*, u.full_name as assigned_name 
             FROM tasks t 
             JOIN users u ON t.assigned_to = u.id 
             WHERE t.assigned_to = ? AND t.status IN ('REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA')
             ORDER BY t.created_at DESC
-        """
-        tasks = self.db.execute_query(query, (worker_id,))
+        """)
+        tasks = await self.db.execute_query(query, (worker_id,))
         
         text = f"✏️ <b>{worker['full_name']} ning vazifalarini tahrirlash</b>\n\n"
         
@@ -1251,14 +1179,14 @@ Tahrirlash uchun vazifani tanlang:
     
     async def handle_edit_task(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifani tahrirlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         task_id = update.callback_query.data.split('_')[2]
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN, UserRole.ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat adminlar uchun!")
             return
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task:
             await self.send_message(update, context, "❌ Vazifa topilmadi!")
             return
@@ -1294,10 +1222,10 @@ Nimani o'zgartirmoqchisiz?
     
     async def handle_start_task(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifani boshlash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         task_id = update.callback_query.data.split('_')[2]
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task or task['assigned_to'] != user['id']:
             await self.send_message(update, context, "❌ Bu vazifa sizga tegishli emas!")
             return
@@ -1307,10 +1235,10 @@ Nimani o'zgartirmoqchisiz?
             return
         
         # Statusni yangilash
-        self.db.update_task_status(task_id, 'JARAYONDA')
+        await self.db.update_task_status(task_id, 'JARAYONDA')
         
         # Audit log
-        self.db.add_audit_log(user['id'], 'TASK_STARTED', f"Vazifa boshladi: {task['title']}")
+        await self.db.add_audit_log(user['id'], 'TASK_STARTED', f"Vazifa boshladi: {task['title']}")
         
         text = f"""
 ▶️ <b>Vazifa boshladi!</b>
@@ -1327,10 +1255,10 @@ Vazifani bajarishni davom eting!
     
     async def handle_fail_task(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vazifani bajarilmagan deb belgilash"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         task_id = update.callback_query.data.split('_')[2]
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task or task['assigned_to'] != user['id']:
             await self.send_message(update, context, "❌ Bu vazifa sizga tegishli emas!")
             return
@@ -1339,14 +1267,20 @@ Vazifani bajarishni davom eting!
             await self.send_message(update, context, "❌ Vazifa holati noto'g'ri!")
             return
         
-        # Statusni yangilash
-        self.db.update_task_status(task_id, 'MUDDATI_OTGAN')
+        # Admin'larga xabar (tranzaksiyadan oldin tayyorlanadi)
+        admins = await self.db.get_admins()
+        messages = self.notification_handler.task_failed_messages(task, user, admins)
         
-        # Audit log
-        self.db.add_audit_log(user['id'], 'TASK_FAILED', f"Vazifa bajarilmadi: {task['title']}")
+        def fail(db):
+            # Statusni yangilash
+            db.update_task_status(task_id, 'MUDDATI_OTGAN')
+            
+            # Audit log
+            db.add_audit_log(user['id'], 'TASK_FAILED', f"Vazifa bajarilmadi: {task['title']}")
+            
+            db.enqueue_notifications(messages)
         
-        # Admin'larga xabar yuborish
-        await self.notification_handler.notify_admins_task_failed(task, user, context)
+        await self.db.run_in_transaction(fail)
         
         text = f"""
 ❌ <b>Vazifa bajarilmadi deb belgilandi!</b>
@@ -1363,10 +1297,10 @@ Admin'lar xabardor qilindi.
     
     async def handle_request_extension(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Deadline uzaytirish so'rovi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         task_id = update.callback_query.data.split('_')[2]
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task or task['assigned_to'] != user['id']:
             await self.send_message(update, context, "❌ Bu vazifa sizga tegishli emas!")
             return
@@ -1393,7 +1327,7 @@ Sababini yuboring:
     
     async def handle_extension_reason(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Deadline uzaytirish sababini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if self.user_states.get(user['id']) != 'requesting_extension':
             return
@@ -1401,15 +1335,17 @@ Sababini yuboring:
         reason = update.message.text
         task_id = self.user_states[f"{user['id']}_task_id"]
         
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task:
             await self.send_message(update, context, "❌ Vazifa topilmadi!")
             self.user_states.pop(user['id'], None)
             self.user_states.pop(f"{user['id']}_task_id", None)
             return
         
-        # Admin'larga xabar yuborish
-        await self.notification_handler.notify_admins_extension_request(task, user, reason, context)
+        # Admin'larga xabar (update ID - so'rovning idempotency kaliti)
+        admins = await self.db.get_admins()
+        await self.db.enqueue_notifications(
+            self.notification_handler.extension_request_messages(task, user, reason, update.update_id, admins))
         
         # Foydalanuvchi holatini tozalash
         self.user_states.pop(user['id'], None)
@@ -1429,7 +1365,7 @@ Admin'lar sizning so'rovingizni ko'rib chiqadi.
     
     async def handle_approve_extension(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Deadline uzaytirishni qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         data = update.callback_query.data.split('_')
         task_id = data[2]
         
@@ -1438,7 +1374,7 @@ Admin'lar sizning so'rovingizni ko'rib chiqadi.
             return
         
         # Vazifani olish
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task:
             await self.send_message(update, context, "❌ Vazifa topilmadi!")
             return
@@ -1460,7 +1396,7 @@ Yangi deadline vaqtini yuboring (DD.MM.YYYY HH:MM formatida):
     
     async def handle_extension_time_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Admin'dan uzaytirish vaqtini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if f"{user['id']}_approve_extension" not in self.user_states:
             return
@@ -1489,7 +1425,7 @@ Iltimos, uzaytirish sababini yozing (izoh):
     
     async def handle_extension_comment_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Admin'dan uzaytirish izohini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if f"{user['id']}_new_deadline" not in self.user_states:
             return
@@ -1500,14 +1436,12 @@ Iltimos, uzaytirish sababini yozing (izoh):
             new_deadline = self.user_states[f"{user['id']}_new_deadline"]
             
             # Vazifani olish
-            task = self.db.get_task_by_id(task_id)
+            task = await self.db.get_task_by_id(task_id)
             if not task:
                 await self.send_message(update, context, "❌ Vazifa topilmadi!")
                 return
             
-            # Deadline'ni yangilash
             old_deadline = task['deadline']
-            self.db.update_task_deadline(task_id, new_deadline)
             
             # Bazadan datetime yoki string kelishi mumkin; datetime ga normalize qilamiz
             if isinstance(old_deadline, datetime):
@@ -1519,19 +1453,10 @@ Iltimos, uzaytirish sababini yozing (izoh):
             new_dt = datetime.strptime(new_deadline, "%Y-%m-%d %H:%M:%S")
             extension_hours = int((new_dt - old_dt).total_seconds() / 3600)
             
-            self.db.add_deadline_extension(
-                task_id=task_id,
-                extended_by=user['id'],
-                old_deadline=old_deadline_str,
-                new_deadline=new_deadline,
-                extension_hours=extension_hours,
-                reason=comment
-            )
-            
-            # Ishchini olish
-            worker = self.db.get_user_by_id(task['assigned_to'])
+            # Ishchiga xabar (tranzaksiyadan oldin tayyorlanadi)
+            worker = await self.db.get_user_by_id(task['assigned_to'])
+            messages = []
             if worker:
-                # Ishchiga xabar yuborish
                 notification_text = f"""
 ✅ <b>Deadline uzaytirish qabul qilindi!</b>
 
@@ -1549,21 +1474,34 @@ Vazifangiz uchun qo'shimcha vaqt berildi. Yangi deadline'ga rioya qiling!
                 ]
                 reply_markup = InlineKeyboardMarkup(keyboard)
                 
-                await context.bot.send_message(
-                    chat_id=worker['telegram_id'],
-                    text=notification_text,
-                    reply_markup=reply_markup,
-                    parse_mode='HTML'
+                messages.append(outbox_message(f"extension_approved:{task_id}:{new_deadline}", worker['telegram_id'],
+                                               notification_text, reply_markup))
+            
+            # Deadline, uzaytirish tarixi, audit log va ishchiga xabar (outbox) bitta tranzaksiyada
+            def extend(db):
+                db.update_task_deadline(task_id, new_deadline)
+                
+                db.add_deadline_extension(
+                    task_id=task_id,
+                    extended_by=user['id'],
+                    old_deadline=old_deadline_str,
+                    new_deadline=new_deadline,
+                    extension_hours=extension_hours,
+                    reason=comment
+                )
+                
+                # Audit log
+                db.add_audit_log(
+                    user['id'], 
+                    'EXTENSION_APPROVED', 
+                    f"Deadline uzaytirish qabul qilindi: {task['title']} - {format_datetime(new_deadline)} - {comment}"
                 )
                 
-                logger.info(f"Deadline uzaytirish qabul qilindi: {task['title']} - {worker['full_name']}")
+                db.enqueue_notifications(messages)
             
-            # Audit log
-            self.db.add_audit_log(
-                user['id'], 
-                'EXTENSION_APPROVED', 
-                f"Deadline uzaytirish qabul qilindi: {task['title']} - {format_datetime(new_deadline)} - {comment}"
-            )
+            await self.db.run_in_transaction(extend)
+            
+            logger.info(f"Deadline uzaytirish qabul qilindi: {task['title']}")
             
             # Foydalanuvchi holatini tozalash
             self.user_states.pop(user['id'], None)
@@ -1586,7 +1524,7 @@ Ishchiga xabar yuborildi.
     
     async def handle_reject_extension(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Deadline uzaytirishni rad etish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         data = update.callback_query.data.split('_')
         task_id = data[2]
         
@@ -1595,7 +1533,7 @@ Ishchiga xabar yuborildi.
             return
         
         # Vazifani olish
-        task = self.db.get_task_by_id(task_id)
+        task = await self.db.get_task_by_id(task_id)
         if not task:
             await self.send_message(update, context, "❌ Vazifa topilmadi!")
             return
@@ -1617,7 +1555,7 @@ Rad etish sababini yozing:
     
     async def handle_rejection_reason_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Admin'dan rad etish sababini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if f"{user['id']}_reject_extension" not in self.user_states:
             return
@@ -1627,15 +1565,15 @@ Rad etish sababini yozing:
             task_id = self.user_states[f"{user['id']}_reject_extension"]
             
             # Vazifani olish
-            task = self.db.get_task_by_id(task_id)
+            task = await self.db.get_task_by_id(task_id)
             if not task:
                 await self.send_message(update, context, "❌ Vazifa topilmadi!")
                 return
             
-            # Ishchini olish
-            worker = self.db.get_user_by_id(task['assigned_to'])
+            # Ishchiga xabar (tranzaksiyadan oldin tayyorlanadi)
+            worker = await self.db.get_user_by_id(task['assigned_to'])
+            messages = []
             if worker:
-                # Ishchiga xabar yuborish
                 notification_text = f"""
 ❌ <b>Deadline uzaytirish rad etildi</b>
 
@@ -1652,21 +1590,23 @@ Deadline o'zgartirilmadi. Vazifani belgilangan vaqtda yakunlang!
                 ]
                 reply_markup = InlineKeyboardMarkup(keyboard)
                 
-                await context.bot.send_message(
-                    chat_id=worker['telegram_id'],
-                    text=notification_text,
-                    reply_markup=reply_markup,
-                    parse_mode='HTML'
-                )
+                messages.append(outbox_message(f"extension_rejected:{task_id}:{update.update_id}", worker['telegram_id'],
+                                               notification_text, reply_markup))
+            
+            # Audit log va ishchiga xabar (outbox) bitta tranzaksiyada
+            def reject_extension(db):
+                db.enqueue_notifications(messages)
                 
-                logger.info(f"Deadline uzaytirish rad etildi: {task['title']} - {worker['full_name']}")
+                # Audit log
+                db.add_audit_log(
+                    user['id'], 
+                    'EXTENSION_REJECTED', 
+                    f"Deadline uzaytirish rad etildi: {task['title']} - {reason}"
+                )
             
-            # Audit log
-            self.db.add_audit_log(
-                user['id'], 
-                'EXTENSION_REJECTED', 
-                f"Deadline uzaytirish rad etildi: {task['title']} - {reason}"
-            )
+            await self.db.run_in_transaction(reject_extension)
+            
+            logger.info(f"Deadline uzaytirish rad etildi: {task['title']}")
             
             # Foydalanuvchi holatini tozalash
             self.user_states.pop(user['id'], None)
@@ -1687,17 +1627,17 @@ Ishchiga xabar yuborildi.
     
     async def handle_start_work(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ish boshlash - ish soati ma'lumotlari"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if user['role'] != UserRole.WORKER:
             await self.send_message(update, context, "❌ Bu funksiya faqat ishchilar uchun!")
             return
         
         # Tashkilot sozlamalarini olish
-        org_settings = self.db.get_org_settings()
+        org_settings = await self.db.get_org_settings()
         if not org_settings:
-            self.db.create_org_settings("Yangi Tashkilot")
-            org_settings = self.db.get_org_settings()
+            await self.db.create_org_settings("Yangi Tashkilot")
+            org_settings = await self.db.get_org_settings()
         
         work_start_hour = org_settings.get('work_hours_start', 9)
         work_end_hour = org_settings.get('work_hours_end', 18)
@@ -1770,17 +1710,17 @@ Ishchiga xabar yuborildi.
     
     async def handle_end_work(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ish tugatish - ish soati ma'lumotlari"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if user['role'] != UserRole.WORKER:
             await self.send_message(update, context, "❌ Bu funksiya faqat ishchilar uchun!")
             return
         
         # Tashkilot sozlamalarini olish
-        org_settings = self.db.get_org_settings()
+        org_settings = await self.db.get_org_settings()
         if not org_settings:
-            self.db.create_org_settings("Yangi Tashkilot")
-            org_settings = self.db.get_org_settings()
+            await self.db.create_org_settings("Yangi Tashkilot")
+            org_settings = await self.db.get_org_settings()
         
         work_start_hour = org_settings.get('work_hours_start', 9)
         work_end_hour = org_settings.get('work_hours_end', 18)
@@ -1851,7 +1791,7 @@ Ishchiga xabar yuborildi.
     
     async def handle_start_work_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ish boshlash uchun rasm qabul qilish va kanalga yuborish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Rasm fayl ID sini olish
         photo = update.message.photo
@@ -1864,10 +1804,10 @@ Ishchiga xabar yuborildi.
         file_id = photo_file.file_id
         
         # Tashkilot sozlamalarini olish
-        org_settings = self.db.get_org_settings()
+        org_settings = await self.db.get_org_settings()
         if not org_settings:
-            self.db.create_org_settings("Yangi Tashkilot")
-            org_settings = self.db.get_org_settings()
+            await self.db.create_org_settings("Yangi Tashkilot")
+            org_settings = await self.db.get_org_settings()
         
         work_start_hour = org_settings.get('work_hours_start', 9)
         work_end_hour = org_settings.get('work_hours_end', 18)
@@ -1879,7 +1819,7 @@ Ishchiga xabar yuborildi.
         current_time = format_datetime(now)
         
         # Audit log
-        self.db.add_audit_log(user['id'], 'WORK_STARTED', f"Ish boshladi: {user['full_name']}")
+        await self.db.add_audit_log(user['id'], 'WORK_STARTED', f"Ish boshladi: {user['full_name']}")
         
         # Kanalga yuborish uchun matn
         from config import WORK_START_CHANNEL_ID
@@ -1900,7 +1840,8 @@ Ishchiga xabar yuborildi.
                     chat_id=WORK_START_CHANNEL_ID,
                     photo=file_id,
                     caption=caption,
-                    parse_mode='HTML'
+                    parse_mode='HTML',
+                    rate_limit_args=PRIORITY_NOTIFICATION
                 )
             except Exception as e:
                 logger.error(f"Kanalga rasm yuborishda xatolik: {e}")
@@ -1923,7 +1864,7 @@ Ishingiz muvaffaqiyatli boshlandi!
     
     async def handle_end_work_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ish tugatish uchun rasm qabul qilish va kanalga yuborish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         # Rasm fayl ID sini olish
         photo = update.message.photo
@@ -1936,10 +1877,10 @@ Ishingiz muvaffaqiyatli boshlandi!
         file_id = photo_file.file_id
         
         # Tashkilot sozlamalarini olish
-        org_settings = self.db.get_org_settings()
+        org_settings = await self.db.get_org_settings()
         if not org_settings:
-            self.db.create_org_settings("Yangi Tashkilot")
-            org_settings = self.db.get_org_settings()
+            await self.db.create_org_settings("Yangi Tashkilot")
+            org_settings = await self.db.get_org_settings()
         
         work_start_hour = org_settings.get('work_hours_start', 9)
         work_end_hour = org_settings.get('work_hours_end', 18)
@@ -1951,7 +1892,7 @@ Ishingiz muvaffaqiyatli boshlandi!
         current_time = format_datetime(now)
         
         # Audit log
-        self.db.add_audit_log(user['id'], 'WORK_ENDED', f"Ish tugadi: {user['full_name']}")
+        await self.db.add_audit_log(user['id'], 'WORK_ENDED', f"Ish tugadi: {user['full_name']}")
         
         # Kanalga yuborish uchun matn
         from config import WORK_END_CHANNEL_ID
@@ -1972,7 +1913,8 @@ Ishingiz muvaffaqiyatli boshlandi!
                     chat_id=WORK_END_CHANNEL_ID,
                     photo=file_id,
                     caption=caption,
-                    parse_mode='HTML'
+                    parse_mode='HTML',
+                    rate_limit_args=PRIORITY_NOTIFICATION
                 )
             except Exception as e:
                 logger.error(f"Kanalga rasm yuborishda xatolik: {e}")
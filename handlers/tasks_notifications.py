@@ -1,24 +1,35 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from utils import format_datetime, get_uzbek_time
+from gateway import PRIORITY_BROADCAST
+from outbox import outbox_message
+from typing import Any, Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
 
 class TaskNotificationHandler:
+    """Vazifa hodisalari haqidagi xabarlar (outbox qatorlari).
+    
+    Metodlar bazaga murojaat qilmaydi: qabul qiluvchilar (ishchi, adminlar) handler
+    tomonidan tranzaksiyadan oldin olinadi, tayyor qatorlar esa holat o'zgarishi bilan
+    bitta tranzaksiyada (AsyncDatabase.run_in_transaction) Database.enqueue_notifications
+    orqali yoziladi. Yuborishni OutboxDispatcher bajaradi.
+    """
+    
     def __init__(self, db):
         self.db = db
     
-    async def notify_worker_task_approved(self, task, admin, context: ContextTypes.DEFAULT_TYPE):
-        """Ishchiga vazifa tasdiqlanganini xabar qilish"""
-        try:
-            # Ishchini olish
-            worker = self.db.get_user_by_id(task['assigned_to'])
-            if not worker:
-                logger.error(f"Ishchi topilmadi: {task['assigned_to']}")
-                return
-            
-            notification_text = f"""
+    def admin_messages(self, admins: List[Dict[str, Any]], key: str, text: str, reply_markup=None) -> List[tuple]:
+        """Bir marta tayyorlangan xabar - har bir admin uchun bitta outbox qatori"""
+        return [
+            outbox_message(f"{key}:{admin['telegram_id']}", admin['telegram_id'], text, reply_markup,
+                           priority=PRIORITY_BROADCAST)
+            for admin in admins if admin.get('telegram_id')
+        ]
+    
+    def task_approved_message(self, task, admin, worker) -> tuple:
+        """Ishchiga vazifa tasdiqlangani haqida xabar"""
+        notification_text = f"""
 🎉 <b>Vazifangiz tasdiqlandi!</b>
 
 📝 <b>Vazifa:</b> {task['title']}
@@ -27,44 +38,27 @@ class TaskNotificationHandler:
 📅 <b>Tasdiqlangan vaqt:</b> {format_datetime(get_uzbek_time())}
 
 Tabriklaymiz! Vazifangiz muvaffaqiyatli yakunlandi! 🎊
-            """
-            
-            keyboard = [
-                [
-                    InlineKeyboardButton("👁 Vazifani ko'rish", callback_data=f"view_task_{task['id']}")
-                ],
-                [
-                    InlineKeyboardButton("✅ Bajarilgan ishlar", callback_data="completed_tasks")
-                ]
+        """
+        
+        keyboard = [
+            [
+                InlineKeyboardButton("👁 Vazifani ko'rish", callback_data=f"view_task_{task['id']}")
+            ],
+            [
+                InlineKeyboardButton("✅ Bajarilgan ishlar", callback_data="completed_tasks")
             ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await context.bot.send_message(
-                chat_id=worker['telegram_id'],
-                text=notification_text,
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
-            
-            logger.info(f"Tasdiqlash xabari yuborildi ishchiga: {worker['full_name']}")
-            
-        except Exception as e:
-            logger.error(f"Ishchiga tasdiqlash xabari yuborishda xatolik: {e}")
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        return outbox_message(f"task_approved:{task['id']}", worker['telegram_id'], notification_text, reply_markup)
     
-    async def notify_worker_task_rejected(self, task, admin, context: ContextTypes.DEFAULT_TYPE, resubmit_count: int = 0):
-        """Ishchiga vazifa rad etilganini xabar qilish"""
-        try:
-            # Ishchini olish
-            worker = self.db.get_user_by_id(task['assigned_to'])
-            if not worker:
-                logger.error(f"Ishchi topilmadi: {task['assigned_to']}")
-                return
-            
-            # Qayta yuborish imkoniyati
-            remaining_attempts = 3 - resubmit_count
-            can_resubmit = self.db.can_resubmit_task(task['id'])
-            
-            notification_text = f"""
+    def task_rejected_message(self, task, admin, worker, resubmit_count: int) -> tuple:
+        """Ishchiga vazifa rad etilgani haqida xabar (resubmit_count - rad etishdan keyingi son)"""
+        # Qayta yuborish imkoniyati (3-rad etishda shtraf qo'llanadi - Database.can_resubmit_task bilan bir xil)
+        remaining_attempts = 3 - resubmit_count
+        can_resubmit = resubmit_count < 3 and not task.get('is_penalized')
+        
+        notification_text = f"""
 ❌ <b>Vazifangiz rad etildi</b>
 
 📝 <b>Vazifa:</b> {task['title']}
@@ -74,56 +68,42 @@ Tabriklaymiz! Vazifangiz muvaffaqiyatli yakunlandi! 🎊
 🔄 <b>Qayta yuborish:</b> {resubmit_count}/3 marta
 
 """
-            
-            if not can_resubmit:
-                notification_text += """
+        
+        if not can_resubmit:
+            notification_text += """
 ⚠️ <b>DIQQAT!</b>
 Vazifangiz 3 marta rad etildi va qayta yuborish imkoniyati tugadi!
 💰 <b>Shtraf:</b> 1,000,000 so'm
-                """
-            elif remaining_attempts > 0:
-                notification_text += f"""
+            """
+        elif remaining_attempts > 0:
+            notification_text += f"""
 Iltimos, vazifani qayta ko'rib chiqing va kerak bo'lsa qayta yuboring.
 ⚠️ <b>Qolgan imkoniyat:</b> {remaining_attempts} marta
-                """
-            
-            keyboard = [
-                [
-                    InlineKeyboardButton("👁 Vazifani ko'rish", callback_data=f"view_task_{task['id']}")
-                ]
+            """
+        
+        keyboard = [
+            [
+                InlineKeyboardButton("👁 Vazifani ko'rish", callback_data=f"view_task_{task['id']}")
             ]
-            
-            # Agar qayta yuborish mumkin bo'lsa, tugma qo'shish
-            if can_resubmit:
-                keyboard.append([
-                    InlineKeyboardButton("🔄 Qayta yuborish", callback_data=f"resubmit_task_{task['id']}")
-                ])
-            
+        ]
+        
+        # Agar qayta yuborish mumkin bo'lsa, tugma qo'shish
+        if can_resubmit:
             keyboard.append([
-                InlineKeyboardButton("❌ Bajarilmagan vaqt o'tgan", callback_data="failed_tasks")
+                InlineKeyboardButton("🔄 Qayta yuborish", callback_data=f"resubmit_task_{task['id']}")
             ])
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await context.bot.send_message(
-                chat_id=worker['telegram_id'],
-                text=notification_text,
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
-            
-            logger.info(f"Rad etish xabari yuborildi ishchiga: {worker['full_name']}")
-            
-        except Exception as e:
-            logger.error(f"Ishchiga rad etish xabari yuborishda xatolik: {e}")
+        
+        keyboard.append([
+            InlineKeyboardButton("❌ Bajarilmagan vaqt o'tgan", callback_data="failed_tasks")
+        ])
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        return outbox_message(f"task_rejected:{task['id']}:{resubmit_count}", worker['telegram_id'],
+                              notification_text, reply_markup)
     
-    async def notify_admins_task_failed(self, task, worker, context: ContextTypes.DEFAULT_TYPE):
-        """Admin'larga vazifa bajarilmaganligini xabar qilish"""
-        try:
-            # Admin'larni olish
-            admins = self.db.get_active_users()
-            admins = [a for a in admins if a['role'] in ['SUPER_ADMIN', 'ADMIN']]
-            
-            notification_text = f"""
+    def task_failed_messages(self, task, worker, admins) -> List[tuple]:
+        """Admin'larga vazifa bajarilmagani haqida xabar"""
+        notification_text = f"""
 ❌ <b>Vazifa bajarilmadi!</b>
 
 📝 <b>Vazifa:</b> {task['title']}
@@ -131,31 +111,13 @@ Iltimos, vazifani qayta ko'rib chiqing va kerak bo'lsa qayta yuboring.
 📅 <b>Vaqt:</b> {format_datetime(get_uzbek_time())}
 
 Vazifa bajarilmagan deb belgilandi.
-            """
-            
-            for admin in admins:
-                try:
-                    await context.bot.send_message(
-                        chat_id=admin['telegram_id'],
-                        text=notification_text,
-                        parse_mode='HTML'
-                    )
-                except Exception as e:
-                    logger.error(f"Admin'ga xabar yuborishda xatolik: {e}")
-            
-            logger.info(f"Vazifa bajarilmaganligi haqida xabar yuborildi {len(admins)} ta admin'ga")
-            
-        except Exception as e:
-            logger.error(f"Admin'larga xabar yuborishda xatolik: {e}")
+        """
+        
+        return self.admin_messages(admins, f"task_failed:{task['id']}", notification_text)
     
-    async def notify_admins_extension_request(self, task, worker, reason, context: ContextTypes.DEFAULT_TYPE):
-        """Admin'larga deadline uzaytirish so'rovini xabar qilish"""
-        try:
-            # Admin'larni olish
-            admins = self.db.get_active_users()
-            admins = [a for a in admins if a['role'] in ['SUPER_ADMIN', 'ADMIN']]
-            
-            notification_text = f"""
+    def extension_request_messages(self, task, worker, reason, request_id: int, admins) -> List[tuple]:
+        """Admin'larga deadline uzaytirish so'rovi (request_id - so'rov update'i ID'si)"""
+        notification_text = f"""
 ⏰ <b>Deadline uzaytirish so'rovi</b>
 
 📝 <b>Vazifa:</b> {task['title']}
@@ -163,38 +125,20 @@ Vazifa bajarilmagan deb belgilandi.
 ⏰ <b>Joriy deadline:</b> {format_datetime(task['deadline'])}
 📄 <b>Sabab:</b> {reason}
 📅 <b>So'rov vaqti:</b> {format_datetime(get_uzbek_time())}
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton("✅ Qabul qilish", callback_data=f"approve_extension_{task['id']}")],
-                [InlineKeyboardButton("❌ Rad etish", callback_data=f"reject_extension_{task['id']}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            for admin in admins:
-                try:
-                    await context.bot.send_message(
-                        chat_id=admin['telegram_id'],
-                        text=notification_text,
-                        reply_markup=reply_markup,
-                        parse_mode='HTML'
-                    )
-                except Exception as e:
-                    logger.error(f"Admin'ga xabar yuborishda xatolik: {e}")
-            
-            logger.info(f"Deadline uzaytirish so'rovi yuborildi {len(admins)} ta admin'ga")
-            
-        except Exception as e:
-            logger.error(f"Admin'larga xabar yuborishda xatolik: {e}")
+        """
+        
+        keyboard = [
+            [InlineKeyboardButton("✅ Qabul qilish", callback_data=f"approve_extension_{task['id']}")],
+            [InlineKeyboardButton("❌ Rad etish", callback_data=f"reject_extension_{task['id']}")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        return self.admin_messages(admins, f"extension_request:{task['id']}:{request_id}",
+                                   notification_text, reply_markup)
     
-    async def notify_admins_task_completed(self, task, worker, context: ContextTypes.DEFAULT_TYPE):
-        """Admin'larga vazifa tugatilganini xabar qilish"""
-        try:
-            # Admin'larni olish
-            admins = self.db.get_active_users()
-            admins = [a for a in admins if a['role'] in ['SUPER_ADMIN', 'ADMIN']]
-            
-            notification_text = f"""
+    def task_completed_messages(self, task, worker, admins) -> List[tuple]:
+        """Admin'larga vazifa tugatilgani haqida xabar"""
+        notification_text = f"""
 ✅ <b>Vazifa tugatildi!</b>
 
 📝 <b>Vazifa:</b> {task['title']}
@@ -202,25 +146,11 @@ Vazifa bajarilmagan deb belgilandi.
 📅 <b>Tugatilgan vaqt:</b> {format_datetime(get_uzbek_time())}
 
 Ishchi vazifani tugatgan. Tasdiqlash kutilmoqda.
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton("👁 Vazifani ko'rish", callback_data=f"view_task_{task['id']}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            for admin in admins:
-                try:
-                    await context.bot.send_message(
-                        chat_id=admin['telegram_id'],
-                        text=notification_text,
-                        reply_markup=reply_markup,
-                        parse_mode='HTML'
-                    )
-                except Exception as e:
-                    logger.error(f"Admin'ga xabar yuborishda xatolik: {e}")
-            
-            logger.info(f"Vazifa tugatilgani haqida xabar yuborildi {len(admins)} ta admin'ga")
-            
-        except Exception as e:
-            logger.error(f"Admin'larga xabar yuborishda xatolik: {e}")
\ No newline at end of file
+        """
+        
+        keyboard = [
+            [InlineKeyboardButton("👁 Vazifani ko'rish", callback_data=f"view_task_{task['id']}")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        return self.admin_messages(admins, f"task_completed:{task['id']}", notification_text, reply_markup)
@@ -1,6 +1,7 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from handlers.base import BaseHandler
+from keyboards import MENUS
 from config import UserRole
 from utils import mask_phone_number
 import logging
@@ -14,7 +15,7 @@ class UserHandler(BaseHandler):
     
     async def handle_users_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Foydalanuvchilar menyusi"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -26,20 +27,12 @@ class UserHandler(BaseHandler):
 Quyidagi amallardan birini tanlang:
         """
         
-        keyboard = [
-            [InlineKeyboardButton("➕ Admin qo'shish", callback_data="add_admin")],
-            [InlineKeyboardButton("👷 Ishchi qo'shish", callback_data="add_worker")],
-            [InlineKeyboardButton("📋 Foydalanuvchilar ro'yxati", callback_data="list_users")],
-            [InlineKeyboardButton("🔄 Rollarni tahrirlash", callback_data="edit_roles")],
-            [InlineKeyboardButton("🔙 Orqaga", callback_data="main_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MENUS['users_menu']
         await self.send_message(update, context, text, reply_markup)
     
     async def handle_add_admin(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Admin qo'shish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -58,7 +51,7 @@ Yangi adminning Telegram ID yoki username'ini yuboring:
     
     async def handle_add_worker(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Ishchi qo'shish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -77,7 +70,7 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
     
     async def handle_user_identifier(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Foydalanuvchi identifikatorini qabul qilish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if self.user_states.get(user['id']) not in ['adding_admin', 'adding_worker']:
             return
@@ -89,14 +82,14 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
             if identifier.isdigit():
                 # Telegram ID
                 telegram_id = int(identifier)
-                target_user = self.db.get_user_by_telegram_id(telegram_id)
+                target_user = await self.db.get_user_by_telegram_id(telegram_id)
             else:
                 # Username
                 if identifier.startswith('@'):
                     identifier = identifier[1:]
                 
                 # Username bo'yicha qidirish
-                users = self.db.get_all_users()
+                users = await self.db.get_all_users()
                 target_user = None
                 for u in users:
                     if u['username'] == identifier:
@@ -118,13 +111,13 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
         new_role = UserRole.ADMIN if self.user_states[user['id']] == 'adding_admin' else UserRole.WORKER
         
         # Rolni yangilash
-        self.db.update_user_role(target_user['id'], new_role)
+        await self.db.update_user_role(target_user['id'], new_role)
         
         # Holatni tozalash
         del self.user_states[user['id']]
         
         # Audit log
-        self.db.add_audit_log(
+        await self.db.add_audit_log(
             user['id'], 
             'USER_ROLE_UPDATED', 
             f"Foydalanuvchi roli yangilandi: {target_user['full_name']} -> {new_role}"
@@ -151,13 +144,13 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
     
     async def handle_list_users(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Foydalanuvchilar ro'yxati"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
             return
         
-        users = self.db.get_all_users()
+        users = await self.db.get_all_users(replica=True)
         
         if not users:
             text = "📝 Hozircha foydalanuvchilar yo'q."
@@ -194,7 +187,7 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
     
     async def handle_user_details(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Foydalanuvchi tafsilotlari"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -203,7 +196,7 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
         user_id = int(update.callback_query.data.split('_')[2])
         
         # Foydalanuvchini topish
-        users = self.db.get_all_users()
+        users = await self.db.get_all_users()
         target_user = None
         for u in users:
             if u['id'] == user_id:
@@ -259,7 +252,7 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
     
     async def handle_change_role(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Foydalanuvchi rolini o'zgartirish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -270,10 +263,10 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
         new_role = data.split('_')[1].upper()
         
         # Rolni yangilash
-        self.db.update_user_role(user_id, new_role)
+        await self.db.update_user_role(user_id, new_role)
         
         # Audit log
-        self.db.add_audit_log(
+        await self.db.add_audit_log(
             user['id'], 
             'USER_ROLE_CHANGED', 
             f"Foydalanuvchi roli o'zgartirildi: ID {user_id} -> {new_role}"
@@ -292,7 +285,7 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
     
     async def handle_toggle_active(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Foydalanuvchi faolligini o'zgartirish"""
-        user = self.get_user(update)
+        user = await self.get_user(update)
         
         if not self.check_permission(user, [UserRole.SUPER_ADMIN]):
             await self.send_message(update, context, "❌ Bu funksiya faqat Super Admin uchun!")
@@ -305,12 +298,11 @@ Yangi ishchining Telegram ID yoki username'ini yuboring:
         new_status = action == 'activate'
         
         # Faollikni yangilash
-        query = "UPDATE users SET is_active = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
-        self.db.execute_update(query, (new_status, user_id))
+        await self.db.update_user_active(user_id, new_status)
         
         # Audit log
         status_text = "faollashtirildi" if new_status else "nofaollashtirildi"
-        self.db.add_audit_log(
+        await self.db.add_audit_log(
             user['id'], 
             'USER_STATUS_CHANGED', 
             f"Foydalanuvchi {status_text}: ID {user_id}"
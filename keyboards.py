@@ -0,0 +1,179 @@
+import functools
+from typing import Dict, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+
+from config import UserRole
+
+# O'zgarmas (statik) klaviaturalar bir marta - modul yuklanganda yaratiladi va barcha
+# update'lar uchun bitta obyekt ishlatiladi. PTB obyektlari yaratilgandan keyin o'zgarmaydi,
+# shuning uchun ularni bo'lishish xavfsiz. Vazifalar ro'yxati kabi dinamik klaviaturalar
+# handlerlarda har so'rovda quriladi.
+
+
+def _markup(*rows: Tuple[Tuple[str, str], ...]) -> InlineKeyboardMarkup:
+    """(matn, callback_data) qatorlaridan inline klaviatura"""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(text, callback_data=callback_data) for text, callback_data in row]
+        for row in rows
+    ])
+
+
+# Asosiy menyu - rol bo'yicha
+MAIN_MENUS: Dict[str, InlineKeyboardMarkup] = {
+    UserRole.SUPER_ADMIN: _markup(
+        [("👥 Foydalanuvchilar", "users_menu")],
+        [("⚙️ Sozlamalar", "settings_menu")],
+        [("📤 Eksport", "export_menu")],
+        [("📜 Audit log", "audit_log")],
+        [("➕ Vazifa yaratish", "create_task")],
+        [("📋 Vazifalar", "tasks_menu")],
+    ),
+    UserRole.ADMIN: _markup(
+        [("➕ Vazifa yaratish", "create_task")],
+        [("📋 Vazifalar", "tasks_menu")],
+    ),
+    UserRole.WORKER: _markup(
+        [("🧾 Mening vazifalarim", "my_tasks")],
+        [("📋 Vazifalar menyusi", "worker_tasks_menu")],
+        [("📊 Mening statistikam", "worker_stats")],
+        [("▶️ Ish vaqtim boshladim", "start_work")],
+        [("✅ Ish vaqtim tugadi", "end_work")],
+        [("👤 Mening ma'lumotlarim", "worker_profile")],
+    ),
+}
+
+# Statik menyular - menyu nomi bo'yicha
+MENUS: Dict[str, InlineKeyboardMarkup] = {
+    # Vazifalar
+    'skip_description': _markup(
+        [("⏭ O'tkazib yuborish", "skip_description")],
+    ),
+    'worker_tasks_shortcut': _markup(
+        [("🔄 Faol vazifalar", "my_tasks")],
+        [("✅ Bajarilgan ishlar", "completed_tasks")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'tasks_menu': _markup(
+        [("📝 Mening vazifalarim", "my_tasks")],
+        [("🔍 Barcha vazifalar", "all_tasks")],
+        [("⏳ Tasdiqlash kerak", "pending_approval")],
+        [("🔎 Qidiruv/Filtr", "search_tasks")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'search_tasks': _markup(
+        [("👤 Ishlar bo'yicha qidirish", "search_by_worker")],
+        [("📅 Sana bo'yicha qidirish", "search_by_date")],
+        [("📊 Status bo'yicha qidirish", "search_by_status")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'search_by_status': _markup(
+        [("📅 REJALASHTIRILGAN", "search_status_REJALASHTIRILGAN")],
+        [("🔄 JARAYONDA", "search_status_JARAYONDA")],
+        [("⏳ TASDIQLASH_KUTILMOQDA", "search_status_TASDIQLASH_KUTILMOQDA")],
+        [("✅ BAJARILDI", "search_status_BAJARILDI")],
+        [("❌ RAD_ETILDI", "search_status_RAD_ETILDI")],
+        [("🚨 MUDDATI_OTGAN", "search_status_MUDDATI_OTGAN")],
+        [("🔙 Orqaga", "search_tasks")],
+    ),
+    'task_list_nav': _markup(
+        [("🔙 Orqaga", "tasks_menu")],
+        [("🏠 Bosh menyu", "main_menu")],
+    ),
+    'worker_task_list_nav': _markup(
+        [("🔙 Orqaga", "search_by_worker")],
+        [("🏠 Bosh menyu", "main_menu")],
+    ),
+    'worker_tasks_menu': _markup(
+        [("🔄 Faol vazifalar", "active_tasks")],
+        [("✅ Bajarilgan ishlar", "completed_tasks")],
+        [("❌ Muvaffaqiyatsiz", "failed_tasks")],
+        [("⏳ Tasdiqlash kutilmoqda", "worker_pending_tasks")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'worker_my_tasks': _markup(
+        [("🔄 Faol vazifalar", "active_tasks")],
+        [("✅ Bajarilgan ishlar", "completed_tasks")],
+        [("❌ Bajarilmagan vaqt o'tgan", "failed_tasks")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'worker_stats': _markup(
+        [("🔄 Yangilash", "worker_stats")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'worker_profile': _markup(
+        [("📊 Statistika", "worker_stats")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+
+    # Eksport
+    'export_menu': _markup(
+        [("📊 XLSX (Excel)", "export_xlsx")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'export_xlsx': _markup(
+        [("📋 Barcha vazifalar", "export_all_xlsx")],
+        [("👤 Ishchi bo'yicha", "export_user_xlsx")],
+        [("🔙 Orqaga", "export_menu")],
+    ),
+
+    # Sozlamalar
+    'settings_menu': _markup(
+        [("🏢 Tashkilot nomi", "edit_org_name")],
+        [("🌍 Vaqt zonasi", "edit_timezone")],
+        [("💰 Jarima miqdori", "edit_penalty")],
+        [("🕘 Ish soati", "edit_work_hours")],
+        [("🔔 Ogohlantirish", "edit_reminder")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'timezones': _markup(
+        [("🇺🇿 Asia/Tashkent", "timezone_Asia/Tashkent")],
+        [("🇷🇺 Europe/Moscow", "timezone_Europe/Moscow")],
+        [("🇺🇸 America/New_York", "timezone_America/New_York")],
+        [("🇬🇧 Europe/London", "timezone_Europe/London")],
+        [("🔙 Orqaga", "settings_menu")],
+    ),
+    'reminder_units': _markup(
+        [("⏰ Soat", "reminder_unit_hours")],
+        [("⏱ Minut", "reminder_unit_minutes")],
+        [("🔙 Orqaga", "settings_menu")],
+    ),
+
+    # Foydalanuvchilar
+    'users_menu': _markup(
+        [("➕ Admin qo'shish", "add_admin")],
+        [("👷 Ishchi qo'shish", "add_worker")],
+        [("📋 Foydalanuvchilar ro'yxati", "list_users")],
+        [("🔄 Rollarni tahrirlash", "edit_roles")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+
+    # Audit
+    'audit_log': _markup(
+        [("🔄 Yangilash", "audit_log")],
+        [("📊 To'liq hisobot", "audit_full_report")],
+        [("🔙 Orqaga", "main_menu")],
+    ),
+    'audit_full_report': _markup(
+        [("📄 CSV eksport", "export_audit_csv")],
+        [("🔙 Orqaga", "audit_log")],
+    ),
+}
+
+# Ro'yxatdan o'tishda telefon raqamini ulashish
+SHARE_PHONE_KEYBOARD = ReplyKeyboardMarkup(
+    [[KeyboardButton("📱 Telefon raqamini ulashish", request_contact=True)]],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+
+
+def main_menu(user_role: str) -> InlineKeyboardMarkup:
+    """Rol uchun asosiy menyu (noma'lum rol - ishchi menyusi)"""
+    return MAIN_MENUS.get(user_role, MAIN_MENUS[UserRole.WORKER])
+
+
+@functools.lru_cache(maxsize=256)
+def back_button(callback_data: str = "main_menu") -> InlineKeyboardMarkup:
+    """Orqaga qaytish tugmasi (har bir callback_data uchun bitta obyekt)"""
+    return InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Orqaga", callback_data=callback_data)]])
@@ -1,7 +1,8 @@
 import logging
 import asyncio
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
-from database import Database
+from database import Database, AsyncDatabase, request_scope
+from statements import statement
 from handlers.start import StartHandler
 from handlers.tasks import TaskHandler
 from handlers.users import UserHandler
@@ -9,8 +10,16 @@ from handlers.export import ExportHandler
 from handlers.audit import AuditHandler
 from handlers.settings import SettingsHandler
 from handlers.notifications import NotificationHandler
-from config import BOT_TOKEN
+from gateway import OutboundGateway
+from broadcast import Broadcaster
+from outbox import OutboxDispatcher
+from update_processor import UserOrderedUpdateProcessor
+from config import (BOT_TOKEN, BROADCAST_DRAIN_TIMEOUT, BOT_MODE, DROP_PENDING_UPDATES, WEBHOOK_URL, WEBHOOK_PATH,
+                    WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_SECRET_TOKEN, WEBHOOK_CERT, WEBHOOK_KEY,
+                    WEBHOOK_MAX_CONNECTIONS)
 import os
+import re
+import secrets
 
 # Logging sozlamalari
 logging.basicConfig(
@@ -23,9 +32,24 @@ logger = logging.getLogger(__name__)
 from config import SUPER_ADMIN_TELEGRAM_IDS
 logger.info(f"SUPER_ADMIN_TELEGRAM_IDS loaded: {SUPER_ADMIN_TELEGRAM_IDS} (count: {len(SUPER_ADMIN_TELEGRAM_IDS)})")
 
+# Bot qabul qiladigan yangilanish turlari (polling va webhook uchun bir xil)
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+class IshApplication(Application):
+    """Har bir update o'z DB memo'si (request_scope) ichida qayta ishlanadi:
+    bitta callback ichida bir xil vazifa qayta so'ralsa bazaga borilmaydi"""
+    
+    async def process_update(self, update: object) -> None:
+        with request_scope():
+            await super().process_update(update)
+
 class IshBot:
     def __init__(self):
-        self.db = Database()
+        # Handlerlar event loop'ni bloklamasligi uchun async fasad orqali ishlaydi
+        self.db = AsyncDatabase(Database())
+        self.broadcaster = Broadcaster()
+        # Outbox'ga yozilgan xabarlarni yuboruvchi fon sikli
+        self.outbox_dispatcher = OutboxDispatcher(self.db, broadcaster=self.broadcaster)
         self.start_handler = StartHandler(self.db)
         self.task_handler = TaskHandler(self.db)
         self.user_handler = UserHandler(self.db)
@@ -40,6 +64,8 @@ class IshBot:
             self.notification_handler.bot = app.bot
             notification_task = asyncio.create_task(self.notification_handler.start_notifications())
             app.bot_data['notification_task'] = notification_task
+            self.outbox_dispatcher.bot = app.bot
+            app.bot_data['outbox_task'] = asyncio.create_task(self.outbox_dispatcher.start())
             logger.info("Bot ishga tushdi!")
         
         async def post_stop(app):
@@ -48,9 +74,22 @@ class IshBot:
                 await self.notification_handler.stop_notifications()
                 app.bot_data['notification_task'].cancel()
                 logger.info("Notification handler to'xtatildi")
+            if 'outbox_task' in app.bot_data:
+                # Yuborilayotgan paket tugaydi; yuborilmaganlari keyingi ishga tushishda yuboriladi
+                await self.outbox_dispatcher.stop()
+                try:
+                    await asyncio.wait_for(app.bot_data['outbox_task'], timeout=BROADCAST_DRAIN_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("Outbox paketi vaqtida tugamadi, qolgan xabarlar keyingi ishga tushishda yuboriladi")
+            logger.info(f"Tarqatishlar: {self.broadcaster.stats()}")
+            logger.info(f"Chiquvchi xabarlar: {self.gateway.stats()}")
+            self.db.close()
         
-        # Bot application yaratish
-        self.application = Application.builder().token(BOT_TOKEN).post_init(post_init).post_stop(post_stop).build()
+        # Bot application yaratish - barcha Bot API so'rovlari chiquvchi xabarlar shlyuzi orqali
+        self.gateway = OutboundGateway()
+        # Har xil foydalanuvchilarning update'lari parallel, bitta foydalanuvchiniki - ketma-ket
+        self.update_processor = UserOrderedUpdateProcessor()
+        self.application = Application.builder().application_class(IshApplication).token(BOT_TOKEN).rate_limiter(self.gateway).concurrent_updates(self.update_processor).post_init(post_init).post_stop(post_stop).build()
         
         # Error handler qo'shish
         async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -182,7 +221,7 @@ class IshBot:
             elif data.startswith("search_status_"):
                 # Status bo'yicha qidirish natijalari
                 status = data.replace("search_status_", "")
-                tasks = self.export_handler.get_tasks_by_status(status)
+                tasks = await self.export_handler.get_tasks_by_status(status)
                 if tasks:
                     text = f"📊 <b>Status: {status}</b> ({len(tasks)} ta vazifa)\n\n"
                     for i, task in enumerate(tasks[:10], 1):
@@ -214,7 +253,7 @@ class IshBot:
             
             elif data == "skip_description":
                 # Tavsifni o'tkazib yuborish
-                user = self.start_handler.get_user(update)
+                user = await self.start_handler.get_user(update)
                 self.task_handler.user_states[user['id']] = 'task_start_time'
                 await self.task_handler.send_message(
                     update, context, 
@@ -254,19 +293,19 @@ class IshBot:
                 if len(parts) >= 3:
                     status = parts[2]  # SCHEDULED, IN_PROGRESS, etc.
                     export_type = parts[3] if len(parts) > 3 else 'xlsx'
-                    tasks = self.export_handler.get_tasks_by_status(status)
+                    tasks = await self.export_handler.get_tasks_by_status(status)
                     if tasks:
                         file_data = self.export_handler.create_xlsx_export(tasks)
                         filename = f"vazifalar_{status}_{update.effective_user.id}.xlsx"
                         await self.export_handler.send_file(update, context, file_data, filename, export_type)
-                        self.db.add_audit_log(update.effective_user.id, 'EXPORT_STATUS', f"Status bo'yicha eksport: {status}")
+                        await self.db.add_audit_log(update.effective_user.id, 'EXPORT_STATUS', f"Status bo'yicha eksport: {status}")
                     else:
                         await self.export_handler.send_message(update, context, f"❌ {status} statusidagi vazifalar topilmadi.", self.export_handler.create_back_button("export_menu"))
             elif data.startswith("export_worker_"):
                 # Ishchi bo'yicha eksport
                 user_id = int(data.split('_')[2])
                 export_type = data.split('_')[3]
-                tasks = self.export_handler.get_tasks_by_user(user_id)
+                tasks = await self.export_handler.get_tasks_by_user(user_id)
                 file_data = self.export_handler.create_xlsx_export(tasks)
                 filename = f"ishchi_vazifalar_{user_id}_{update.effective_user.id}.xlsx"
                 await self.export_handler.send_file(update, context, file_data, filename, export_type, task_count=len(tasks))
@@ -313,7 +352,7 @@ class IshBot:
     
     async def handle_message(self, update, context):
         """Matn xabarlarini boshqarish"""
-        user = self.start_handler.get_user(update)
+        user = await self.start_handler.get_user(update)
         
         # Registratsiya holatini tekshirish
         if hasattr(self.start_handler, 'user_states') and user['id'] in self.start_handler.user_states:
@@ -363,14 +402,15 @@ class IshBot:
                     date_str = update.message.text.strip()
                     search_date = datetime.strptime(date_str, "%d.%m.%Y").date()
                     # Bu sanada yaratilgan vazifalarni qidirish
-                    query = """
+                    query = statement('search_tasks_by_date', """
                         SELECT t.*, u.full_name as assigned_name 
                         FROM tasks t 
                         LEFT JOIN users u ON t.assigned_to = u.id 
-                        WHERE DATE(t.created_at) = ?
+                        WHERE t.created_at >= ? AND t.created_at < ?::date + 1
                         ORDER BY t.created_at DESC
-                    """
-                    tasks = self.task_handler.db.execute_query(query, (search_date.strftime("%Y-%m-%d"),))
+                    """)
+                    day = search_date.strftime("%Y-%m-%d")
+                    tasks = await self.task_handler.db.execute_query(query, (day, day), replica=True)
                     if tasks:
                         text = f"📅 <b>{date_str} sanasidagi vazifalar</b> ({len(tasks)} ta)\n\n"
                         for i, task in enumerate(tasks[:10], 1):
@@ -427,7 +467,7 @@ class IshBot:
     
     async def handle_photo(self, update, context):
         """Rasm xabarlarini boshqarish"""
-        user = self.start_handler.get_user(update)
+        user = await self.start_handler.get_user(update)
         
         # Foydalanuvchi holatini tekshirish
         if user['id'] in self.task_handler.user_states:
@@ -443,7 +483,7 @@ class IshBot:
     
     async def handle_contact(self, update, context):
         """Contact xabarlarini boshqarish"""
-        user = self.start_handler.get_user(update)
+        user = await self.start_handler.get_user(update)
         
         # Registratsiya holatini tekshirish
         if hasattr(self.start_handler, 'user_states') and user['id'] in self.start_handler.user_states:
@@ -452,17 +492,48 @@ class IshBot:
             if state in ['waiting_phone', 'waiting_phone_text', 'waiting_phone_contact']:
                 await self.start_handler.handle_phone_input(update, context)
     
+    def run_webhook(self):
+        """Webhook rejimi: PTB'ning ichki serveri Telegram yuborgan yangilanishlarni qabul qiladi.
+        
+        Webhook to'xtatishda o'chirilmaydi - bot ishlamagan vaqtdagi yangilanishlar Telegram'da
+        saqlanadi va qayta ishga tushganda yetkaziladi (DROP_PENDING_UPDATES o'chiq bo'lsa).
+        """
+        if not WEBHOOK_URL:
+            raise ValueError("BOT_MODE=webhook uchun WEBHOOK_URL sozlanmagan")
+        secret_token = WEBHOOK_SECRET_TOKEN or secrets.token_urlsafe(32)
+        if not re.fullmatch(r'[A-Za-z0-9_-]{1,256}', secret_token):
+            raise ValueError("WEBHOOK_SECRET_TOKEN faqat A-Z, a-z, 0-9, _ va - belgilaridan iborat bo'lishi kerak")
+        
+        webhook_url = f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}"
+        logger.info(f"Webhook rejimi: {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH} -> {webhook_url}")
+        self.application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=webhook_url,
+            secret_token=secret_token,
+            cert=WEBHOOK_CERT,
+            key=WEBHOOK_KEY,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=ALLOWED_UPDATES,
+            drop_pending_updates=DROP_PENDING_UPDATES
+        )
+    
     def start_bot(self):
         """Botni ishga tushirish"""
-        logger.info("Bot ishga tushmoqda...")
+        logger.info(f"Bot ishga tushmoqda ({BOT_MODE})...")
         
-        # Botni ishga tushirish (run_polling avtomatik initialize, start va polling qiladi)
-        # run_polling() o'zi event loop yaratadi, shuning uchun asyncio.run() ishlatmaymiz
+        # run_polling()/run_webhook() avtomatik initialize, start qiladi va o'zi event loop yaratadi,
+        # shuning uchun asyncio.run() ishlatmaymiz. To'xtatishda (SIGINT/SIGTERM) avval yangilanishlarni
+        # qabul qilish to'xtaydi, navbatdagi yangilanishlar qayta ishlanadi, keyin post_stop chaqiriladi
         try:
-            self.application.run_polling(
-                allowed_updates=["message", "callback_query"],
-                drop_pending_updates=True
-            )
+            if BOT_MODE == 'webhook':
+                self.run_webhook()
+            else:
+                self.application.run_polling(
+                    allowed_updates=ALLOWED_UPDATES,
+                    drop_pending_updates=DROP_PENDING_UPDATES
+                )
         except KeyboardInterrupt:
             logger.info("Bot foydalanuvchi tomonidan to'xtatildi")
         except Exception as e:
@@ -0,0 +1,397 @@
+import logging
+from typing import List, Tuple
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+# Asosiy so'rovlar uchun indekslar: (nomi, CREATE INDEX so'rovi)
+SCHEMA_INDEXES = [
+    # Xodimning vazifalari: WHERE assigned_to = ? AND status IN (...) ORDER BY created_at DESC
+    ('idx_tasks_assigned_status_created',
+     "CREATE INDEX IF NOT EXISTS idx_tasks_assigned_status_created "
+     "ON tasks (assigned_to, status, created_at DESC)"),
+    # Status bo'yicha ro'yxatlar (tasdiqlash kutilmoqda, eksport)
+    ('idx_tasks_status_created',
+     "CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at DESC)"),
+    # Eslatmalar va muddati o'tganlar skaneri - faqat faol vazifalar
+    ('idx_tasks_active_deadline',
+     "CREATE INDEX IF NOT EXISTS idx_tasks_active_deadline ON tasks (deadline) "
+     "WHERE status IN ('REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA')"),
+    # Barcha vazifalar ro'yxati va sana bo'yicha qidiruv
+    ('idx_tasks_created_at',
+     "CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at DESC)"),
+    ('idx_audit_log_created_at',
+     "CREATE INDEX IF NOT EXISTS idx_audit_log_created_at ON audit_log (created_at DESC)"),
+    ('idx_task_deadline_extensions_task',
+     "CREATE INDEX IF NOT EXISTS idx_task_deadline_extensions_task "
+     "ON task_deadline_extensions (task_id, created_at DESC)"),
+    # Adminlar ro'yxati: WHERE role IN (...) AND is_active = TRUE
+    ('idx_users_role_active',
+     "CREATE INDEX IF NOT EXISTS idx_users_role_active ON users (role, is_active)"),
+]
+
+
+# Xodimlar statistikasini vazifalardan qayta hisoblash (migratsiya 4 va rebuild_worker_stats).
+# Hisoblash paytida vazifalarga yozish kutib turadi - trigger bilan poyga bo'lmaydi
+WORKER_STATS_REBUILD = [
+    "LOCK TABLE tasks IN SHARE MODE",
+    "DELETE FROM worker_stats",
+    '''
+        INSERT INTO worker_stats (
+            user_id, total_count, scheduled_count, in_progress_count, waiting_approval_count,
+            done_count, rejected_count, overdue_count, penalized_count, penalty_total, last_task_at
+        )
+        SELECT assigned_to,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE status = 'REJALASHTIRILGAN'),
+               COUNT(*) FILTER (WHERE status = 'JARAYONDA'),
+               COUNT(*) FILTER (WHERE status = 'TASDIQLASH_KUTILMOQDA'),
+               COUNT(*) FILTER (WHERE status = 'BAJARILDI'),
+               COUNT(*) FILTER (WHERE status = 'RAD_ETILDI'),
+               COUNT(*) FILTER (WHERE status = 'MUDDATI_OTGAN'),
+               COUNT(*) FILTER (WHERE is_penalized),
+               COALESCE(SUM(penalty_amount) FILTER (WHERE is_penalized), 0),
+               MAX(created_at)
+        FROM tasks
+        GROUP BY assigned_to
+    ''',
+]
+
+
+# Raqamlangan migratsiyalar: (versiya, tavsif, SQL so'rovlar ro'yxati).
+# Qo'llangan migratsiyani o'zgartirmang - yangi o'zgarish uchun keyingi raqamli qadam qo'shing.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Boshlang'ich sxema", [
+        # Users jadvali
+        '''
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                telegram_id BIGINT UNIQUE NOT NULL,
+                full_name VARCHAR(255) NOT NULL,
+                username VARCHAR(255),
+                phone VARCHAR(50),
+                role VARCHAR(20) NOT NULL CHECK(role IN ('SUPER_ADMIN', 'ADMIN', 'WORKER')),
+                is_active BOOLEAN DEFAULT TRUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+
+        # Tasks jadvali
+        '''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id VARCHAR(255) PRIMARY KEY,
+                title VARCHAR(500) NOT NULL,
+                description TEXT,
+                created_by INTEGER NOT NULL,
+                assigned_to INTEGER NOT NULL,
+                start_at TIMESTAMP NOT NULL,
+                deadline TIMESTAMP NOT NULL,
+                priority VARCHAR(20) NOT NULL CHECK(priority IN ('PAST', 'ORTA', 'YUQORI', 'KRITIK')),
+                status VARCHAR(30) NOT NULL CHECK(status IN ('REJALASHTIRILGAN', 'JARAYONDA', 'TASDIQLASH_KUTILMOQDA', 'BAJARILDI', 'RAD_ETILDI', 'MUDDATI_OTGAN')),
+                completed_at TIMESTAMP,
+                approved_by INTEGER,
+                approved_at TIMESTAMP,
+                rejected_by INTEGER,
+                rejected_at TIMESTAMP,
+                is_penalized BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                resubmit_count INTEGER DEFAULT 0,
+                penalty_amount INTEGER DEFAULT 0,
+                FOREIGN KEY (created_by) REFERENCES users (id) ON DELETE CASCADE,
+                FOREIGN KEY (assigned_to) REFERENCES users (id) ON DELETE CASCADE,
+                FOREIGN KEY (approved_by) REFERENCES users (id) ON DELETE SET NULL,
+                FOREIGN KEY (rejected_by) REFERENCES users (id) ON DELETE SET NULL
+            )
+        ''',
+
+        # Task files jadvali
+        '''
+            CREATE TABLE IF NOT EXISTS task_files (
+                id SERIAL PRIMARY KEY,
+                task_id VARCHAR(255) NOT NULL,
+                file_id VARCHAR(255) NOT NULL,
+                file_name VARCHAR(500) NOT NULL,
+                uploaded_by INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE,
+                FOREIGN KEY (uploaded_by) REFERENCES users (id) ON DELETE CASCADE
+            )
+        ''',
+
+        # Task comments jadvali
+        '''
+            CREATE TABLE IF NOT EXISTS task_comments (
+                id SERIAL PRIMARY KEY,
+                task_id VARCHAR(255) NOT NULL,
+                author_id INTEGER NOT NULL,
+                message TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE,
+                FOREIGN KEY (author_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+        ''',
+
+        # Audit log jadvali
+        '''
+            CREATE TABLE IF NOT EXISTS audit_log (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                action VARCHAR(100) NOT NULL,
+                details TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+        ''',
+
+        # Organization settings jadvali
+        '''
+            CREATE TABLE IF NOT EXISTS org_settings (
+                id SERIAL PRIMARY KEY,
+                org_name VARCHAR(255) NOT NULL,
+                timezone VARCHAR(50) DEFAULT 'Asia/Tashkent',
+                penalty_amount INTEGER DEFAULT 1000000,
+                work_hours_start INTEGER DEFAULT 9,
+                work_hours_end INTEGER DEFAULT 18,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+
+        # Task deadline extensions jadvali
+        '''
+            CREATE TABLE IF NOT EXISTS task_deadline_extensions (
+                id SERIAL PRIMARY KEY,
+                task_id VARCHAR(255) NOT NULL,
+                extended_by INTEGER NOT NULL,
+                old_deadline TIMESTAMP NOT NULL,
+                new_deadline TIMESTAMP NOT NULL,
+                extension_hours INTEGER NOT NULL,
+                reason TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE,
+                FOREIGN KEY (extended_by) REFERENCES users (id) ON DELETE CASCADE
+            )
+        ''',
+
+        # Org_settings jadvaliga reminder_interval_minutes qo'shish
+        '''
+            ALTER TABLE org_settings
+            ADD COLUMN IF NOT EXISTS reminder_interval_minutes INTEGER DEFAULT 180
+        ''',
+    ]),
+    (2, "Asosiy so'rovlar uchun indekslar", [index_sql for _, index_sql in SCHEMA_INDEXES]),
+    (3, "Sozlamalar versiyasi (kesh invalidatsiyasi uchun)", [
+        '''
+            ALTER TABLE org_settings
+            ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1
+        ''',
+    ]),
+    (4, "Xodimlar statistikasi jadvali va trigger", [
+        '''
+            CREATE TABLE IF NOT EXISTS worker_stats (
+                -- FK yo'q: foydalanuvchi o'chirilganda vazifalar kaskad o'chiriladi va trigger shu qatorni yangilaydi
+                user_id INTEGER PRIMARY KEY,
+                total_count INTEGER NOT NULL DEFAULT 0,
+                scheduled_count INTEGER NOT NULL DEFAULT 0,
+                in_progress_count INTEGER NOT NULL DEFAULT 0,
+                waiting_approval_count INTEGER NOT NULL DEFAULT 0,
+                done_count INTEGER NOT NULL DEFAULT 0,
+                rejected_count INTEGER NOT NULL DEFAULT 0,
+                overdue_count INTEGER NOT NULL DEFAULT 0,
+                penalized_count INTEGER NOT NULL DEFAULT 0,
+                penalty_total BIGINT NOT NULL DEFAULT 0,
+                last_task_at TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+
+        # Bitta vazifaning statistikaga hissasini qo'shish (p_sign = 1) yoki ayirish (p_sign = -1)
+        '''
+            CREATE OR REPLACE FUNCTION worker_stats_apply(
+                p_user INTEGER, p_status VARCHAR, p_penalized BOOLEAN, p_penalty INTEGER,
+                p_created TIMESTAMP, p_sign INTEGER
+            ) RETURNS void AS $$
+            BEGIN
+                INSERT INTO worker_stats AS ws (
+                    user_id, total_count, scheduled_count, in_progress_count, waiting_approval_count,
+                    done_count, rejected_count, overdue_count, penalized_count, penalty_total, last_task_at
+                )
+                VALUES (
+                    p_user, p_sign,
+                    CASE WHEN p_status = 'REJALASHTIRILGAN' THEN p_sign ELSE 0 END,
+                    CASE WHEN p_status = 'JARAYONDA' THEN p_sign ELSE 0 END,
+                    CASE WHEN p_status = 'TASDIQLASH_KUTILMOQDA' THEN p_sign ELSE 0 END,
+                    CASE WHEN p_status = 'BAJARILDI' THEN p_sign ELSE 0 END,
+                    CASE WHEN p_status = 'RAD_ETILDI' THEN p_sign ELSE 0 END,
+                    CASE WHEN p_status = 'MUDDATI_OTGAN' THEN p_sign ELSE 0 END,
+                    CASE WHEN p_penalized THEN p_sign ELSE 0 END,
+                    CASE WHEN p_penalized THEN p_sign * COALESCE(p_penalty, 0) ELSE 0 END,
+                    CASE WHEN p_sign > 0 THEN p_created END
+                )
+                ON CONFLICT (user_id) DO UPDATE SET
+                    total_count = ws.total_count + EXCLUDED.total_count,
+                    scheduled_count = ws.scheduled_count + EXCLUDED.scheduled_count,
+                    in_progress_count = ws.in_progress_count + EXCLUDED.in_progress_count,
+                    waiting_approval_count = ws.waiting_approval_count + EXCLUDED.waiting_approval_count,
+                    done_count = ws.done_count + EXCLUDED.done_count,
+                    rejected_count = ws.rejected_count + EXCLUDED.rejected_count,
+                    overdue_count = ws.overdue_count + EXCLUDED.overdue_count,
+                    penalized_count = ws.penalized_count + EXCLUDED.penalized_count,
+                    penalty_total = ws.penalty_total + EXCLUDED.penalty_total,
+                    last_task_at = GREATEST(ws.last_task_at, EXCLUDED.last_task_at),
+                    updated_at = CURRENT_TIMESTAMP;
+            END;
+            $$ LANGUAGE plpgsql
+        ''',
+
+        # Vazifa o'zgarishi bilan bitta tranzaksiyada statistika yangilanadi
+        '''
+            CREATE OR REPLACE FUNCTION worker_stats_on_task_change() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM worker_stats_apply(OLD.assigned_to, OLD.status, OLD.is_penalized,
+                                               OLD.penalty_amount, OLD.created_at, -1);
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM worker_stats_apply(NEW.assigned_to, NEW.status, NEW.is_penalized,
+                                               NEW.penalty_amount, NEW.created_at, 1);
+                END IF;
+                -- Vazifa o'chirilsa yoki boshqa xodimga o'tkazilsa oxirgi vazifa vaqti qayta hisoblanadi
+                IF TG_OP = 'DELETE' THEN
+                    UPDATE worker_stats SET last_task_at = (
+                        SELECT MAX(created_at) FROM tasks WHERE assigned_to = OLD.assigned_to
+                    ) WHERE user_id = OLD.assigned_to;
+                ELSIF TG_OP = 'UPDATE' THEN
+                    IF OLD.assigned_to <> NEW.assigned_to OR OLD.created_at IS DISTINCT FROM NEW.created_at THEN
+                        UPDATE worker_stats SET last_task_at = (
+                            SELECT MAX(created_at) FROM tasks WHERE assigned_to = OLD.assigned_to
+                        ) WHERE user_id = OLD.assigned_to;
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''',
+        "DROP TRIGGER IF EXISTS tasks_worker_stats ON tasks",
+        '''
+            CREATE TRIGGER tasks_worker_stats
+            AFTER INSERT OR DELETE OR UPDATE OF status, assigned_to, is_penalized, penalty_amount, created_at
+            ON tasks
+            FOR EACH ROW EXECUTE PROCEDURE worker_stats_on_task_change()
+        ''',
+    ] + WORKER_STATS_REBUILD),
+    (5, "Eslatmalar jurnali (qayta ishga tushganda takror yubormaslik uchun)", [
+        '''
+            CREATE TABLE IF NOT EXISTS notification_ledger (
+                -- FK yo'q: jurnal paket bilan yoziladi, o'chirilgan/yakunlangan vazifalar qatori tozalanadi
+                task_id VARCHAR(255) PRIMARY KEY,
+                last_reminder_at TIMESTAMPTZ,
+                -- Ogohlantirishlar qaysi deadline uchun yuborilgan (deadline uzaytirilsa qaytadan)
+                warned_deadline TIMESTAMP,
+                warnings_sent INTEGER[] NOT NULL DEFAULT '{}',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+    ]),
+    (6, "Xabarlar outbox'i (holat o'zgarishi bilan bitta tranzaksiyada yoziladi)", [
+        '''
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id BIGSERIAL PRIMARY KEY,
+                -- Bir hodisa ikki marta yozilmasligi uchun (masalan 'task_approved:<task_id>')
+                idempotency_key VARCHAR(255) NOT NULL UNIQUE,
+                chat_id BIGINT NOT NULL,
+                text TEXT NOT NULL,
+                reply_markup JSONB,
+                parse_mode VARCHAR(20),
+                priority SMALLINT NOT NULL DEFAULT 1,
+                status VARCHAR(20) NOT NULL DEFAULT 'PENDING'
+                    CHECK (status IN ('PENDING', 'SENT', 'FAILED')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                -- PENDING: keyingi urinish vaqti (olingan xabar uchun - lease tugashi)
+                next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                last_error TEXT,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                sent_at TIMESTAMPTZ
+            )
+        ''',
+        '''
+            CREATE INDEX IF NOT EXISTS idx_notification_outbox_pending
+            ON notification_outbox (next_attempt_at) WHERE status = 'PENDING'
+        ''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Bir vaqtda ishga tushgan bir nechta bot nusxasi migratsiyani ikki marta qo'llamasligi uchun
+MIGRATION_LOCK_ID = 742001
+
+
+def get_schema_version(conn) -> int:
+    """Joriy sxema versiyasini olish (jadval bo'lmasa 0)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version FROM schema_version WHERE id = 1")
+        row = cursor.fetchone()
+        conn.rollback()
+        return row[0] if row else 0
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return 0
+
+
+def apply_migrations(conn) -> int:
+    """Qo'llanmagan migratsiyalarni tartib bilan bajarish.
+
+    Tezkor yo'l: sxema joriy bo'lsa faqat bitta versiya qatori o'qiladi.
+    Har bir migratsiya versiya yangilanishi bilan bitta tranzaksiyada bajariladi.
+    """
+    version = get_schema_version(conn)
+    if version >= LATEST_VERSION:
+        return version
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("INSERT INTO schema_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING")
+        conn.commit()
+
+        # Lock kutilayotganda boshqa nusxa migratsiyani qo'llagan bo'lishi mumkin
+        version = get_schema_version(conn)
+        for number, description, statements in MIGRATIONS:
+            if number <= version:
+                continue
+            try:
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    "UPDATE schema_version SET version = %s, updated_at = CURRENT_TIMESTAMP WHERE id = 1",
+                    (number,)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Migratsiya {number} ({description}) xatosi: {e}")
+                raise
+            version = number
+            logger.info(f"Migratsiya {number} qo'llandi: {description}")
+    finally:
+        # Xatodan keyin tranzaksiya bekor qilingan holatda - unlock InFailedSqlTransaction bilan
+        # asl xatoni yashirmasligi uchun avval yopiladi (sessiya darajasidagi lock rollback'da saqlanadi)
+        try:
+            conn.rollback()
+        except Exception as e:
+            logger.warning(f"Migratsiya lock'ini bo'shatishdan oldin rollback xatosi: {e}")
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+    return version
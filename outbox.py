@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from broadcast import Broadcaster
+from config import (OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX, OUTBOX_LEASE,
+                    OUTBOX_POLL_INTERVAL, OUTBOX_KEEP_DAYS)
+from gateway import PRIORITY_NOTIFICATION
+
+logger = logging.getLogger(__name__)
+
+# Yuborilgan/muvaffaqiyatsiz xabarlar shuncha soniyada bir tozalanadi
+_PRUNE_INTERVAL = 3600
+# Xato matni bazada shu uzunlikkacha saqlanadi
+_MAX_ERROR_LENGTH = 500
+
+
+def outbox_message(key: str, chat_id: int, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                   parse_mode: Optional[str] = 'HTML', priority: int = PRIORITY_NOTIFICATION) -> tuple:
+    """Database.enqueue_notifications uchun qator.
+
+    key - hodisaning idempotency kaliti (masalan f"task_approved:{task_id}"): bir xil
+    kalitli xabar outbox'ga ikkinchi marta yozilmaydi.
+    """
+    markup = reply_markup.to_json() if reply_markup is not None else None
+    return (key, chat_id, text, markup, parse_mode, priority)
+
+
+class OutboxDispatcher:
+    """notification_outbox jadvalidagi xabarlarni yuboruvchi fon sikli.
+
+    Handlerlar xabarni holat o'zgarishi bilan bitta tranzaksiyada outbox'ga yozadi;
+    dispatcher commit'dan keyin uyg'onadi, xabarlarni paket bilan oladi va Broadcaster
+    orqali cheklangan parallellik bilan yuboradi. Xatoda xabar eksponensial kechikish
+    bilan qayta urinadi, bloklangan chat va noto'g'ri so'rov (Forbidden, BadRequest)
+    yoki OUTBOX_MAX_ATTEMPTS dan keyin FAILED bo'ladi.
+
+    Yetkazish kamida bir marta: yuborilgandan keyin SENT deb belgilashdan oldin jarayon
+    to'xtasa, xabar lease tugagach qayta yuboriladi.
+    """
+
+    def __init__(self, db, bot: Bot = None, broadcaster: Broadcaster = None,
+                 batch_size: int = OUTBOX_BATCH_SIZE, max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        self.db = db
+        self.bot = bot
+        self.broadcaster = broadcaster or Broadcaster()
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.is_running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Eng yaqin qayta urinish vaqti (time.monotonic)
+        self._next_retry: Optional[float] = None
+        self._next_prune = 0.0
+
+        # Metrikalar
+        self._batches = 0
+        self._sent = 0
+        self._retried = 0
+        self._failed = 0
+
+    async def start(self):
+        """Dispatcher siklini ishga tushirish"""
+        self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        await self.db.add_outbox_listener(self._on_enqueued)
+        logger.info("Outbox dispatcher ishga tushdi")
+
+        while self.is_running:
+            try:
+                claimed = await self.dispatch_batch()
+                if claimed >= self.batch_size:
+                    # Navbatda yana xabarlar bor
+                    continue
+                await self.prune()
+            except Exception as e:
+                logger.error(f"Outbox dispatcher xatosi: {e}")
+            await self._sleep()
+
+    async def stop(self):
+        """Siklni to'xtatish"""
+        self.is_running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info(f"Outbox dispatcher to'xtatildi: {self.stats()}")
+
+    def _on_enqueued(self):
+        """Database tinglovchisi: executor thread'idan chaqiriladi"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _sleep(self):
+        """Yangi xabar, eng yaqin qayta urinish yoki OUTBOX_POLL_INTERVAL gacha kutish"""
+        delay = OUTBOX_POLL_INTERVAL
+        if self._next_retry is not None:
+            # Muddat bu yerda tozalanmaydi: yangi xabar erta uyg'otsa ham qayta urinish kechikmaydi
+            delay = min(delay, max(0.0, self._next_retry - time.monotonic()))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def dispatch_batch(self) -> int:
+        """Bitta paketni olish va yuborish; olingan xabarlar sonini qaytaradi"""
+        if self._next_retry is not None and self._next_retry <= time.monotonic():
+            # Qayta urinish vaqti keldi - xabarlar shu paketda olinadi
+            self._next_retry = None
+        messages = await self.db.claim_outbox_batch(self.batch_size, OUTBOX_LEASE)
+        if not messages:
+            return 0
+        self._batches += 1
+
+        failures = {}
+        deliveries = []
+        for message in messages:
+            try:
+                kwargs = self._send_kwargs(message)
+            except Exception as e:
+                failures[message['id']] = (str(e)[:_MAX_ERROR_LENGTH], None)
+                continue
+            deliveries.append((message['id'], message['chat_id'], message['text'], message['priority'], kwargs))
+
+        result = await self.broadcaster.deliver(self.bot, deliveries, name="outbox")
+
+        sent_ids = []
+        for message in messages:
+            if message['id'] in failures:
+                continue
+            error = result.failed.get(message['id'])
+            if error is None:
+                sent_ids.append(message['id'])
+                continue
+            failures[message['id']] = (str(error)[:_MAX_ERROR_LENGTH], self.retry_delay(message['attempts'], error))
+
+        await self.db.mark_outbox_sent(sent_ids)
+        await self.db.mark_outbox_failed([(message_id, error, retry_in)
+                                          for message_id, (error, retry_in) in failures.items()])
+
+        self._sent += len(sent_ids)
+        for message_id, (error, retry_in) in failures.items():
+            if retry_in is None:
+                self._failed += 1
+                logger.error(f"Outbox xabari {message_id} yuborilmadi va qayta urinilmaydi: {error}")
+                continue
+            self._retried += 1
+            retry_at = time.monotonic() + retry_in
+            if self._next_retry is None or retry_at < self._next_retry:
+                self._next_retry = retry_at
+        return len(messages)
+
+    def _send_kwargs(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs = {}
+        if message['parse_mode']:
+            kwargs['parse_mode'] = message['parse_mode']
+        if message['reply_markup']:
+            kwargs['reply_markup'] = InlineKeyboardMarkup.de_json(message['reply_markup'], self.bot)
+        return kwargs
+
+    def retry_delay(self, attempts: int, error: Exception) -> Optional[float]:
+        """Keyingi urinishgacha soniya (None - qayta urinilmaydi)"""
+        if isinstance(error, (Forbidden, BadRequest)) or attempts >= self.max_attempts:
+            return None
+        delay = min(OUTBOX_RETRY_MAX, OUTBOX_RETRY_BASE * 2 ** (attempts - 1))
+        if isinstance(error, RetryAfter):
+            delay = max(delay, float(error.retry_after))
+        return delay
+
+    async def prune(self):
+        """Eski yakunlangan xabarlarni vaqti-vaqti bilan tozalash"""
+        if time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + _PRUNE_INTERVAL
+        await self.db.prune_notification_outbox(OUTBOX_KEEP_DAYS)
+
+    def stats(self) -> Dict[str, int]:
+        """Dispatcher metrikalarini olish (jadvaldagi holat - Database.get_outbox_stats)"""
+        return {
+            'batches': self._batches,
+            'sent': self._sent,
+            'retried': self._retried,
+            'failed': self._failed,
+        }
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Xodimlar statistikasini qayta hisoblash skripti
+worker_stats jadvali vazifalar triggeri orqali yangilanib boradi. Trigger
+o'chirib qo'yilgan bo'lsa yoki ma'lumotlar qo'lda tuzatilgan bo'lsa,
+statistikani shu skript bilan vazifalardan to'liq qayta hisoblash mumkin.
+
+Ishlatish:
+    python rebuild_worker_stats.py
+"""
+
+from database import Database
+
+
+def rebuild_worker_stats():
+    """worker_stats ni qayta hisoblash"""
+    db = Database()
+    try:
+        print("🔄 Xodimlar statistikasi qayta hisoblanmoqda...")
+        count = db.rebuild_worker_stats()
+        print(f"✅ Tayyor: {count} ta xodim statistikasi yangilandi")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_worker_stats()
@@ -0,0 +1,66 @@
+import keyword
+import operator
+from typing import Dict, Tuple
+
+
+class Record(tuple):
+    """Ixcham natija qatori.
+
+    Qiymatlar tuple'da saqlanadi, ustun nomlari esa klass darajasida bir marta -
+    har bir qatorda dict va takrorlangan kalitlar bo'lmaydi. Mavjud kod uchun
+    row['name'], row.get('name') va row.name ishlaydi.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else tuple.__getitem__(self, i)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def keys(self):
+        return self._fields
+
+    def items(self):
+        return [(name, tuple.__getitem__(self, i)) for name, i in self._index.items()]
+
+    def _asdict(self) -> dict:
+        return dict(self.items())
+
+    def _replace(self, **kwargs):
+        """O'zgartirilgan nusxa (qator o'zgarmas)"""
+        values = list(self)
+        for name, value in kwargs.items():
+            values[self._index[name]] = value
+        return self.__class__(values)
+
+    def __repr__(self):
+        return f"Record({', '.join(f'{name}={value!r}' for name, value in self.items())})"
+
+
+# Ustunlar ro'yxati -> Record klassi
+_record_classes: Dict[Tuple[str, ...], type] = {}
+
+
+def record_class(columns: Tuple[str, ...]) -> type:
+    """Cursor description ustunlari uchun Record klassini olish (har bir ustunlar to'plami uchun bir marta yaratiladi)"""
+    cls = _record_classes.get(columns)
+    if cls is None:
+        # Takrorlangan ustun nomida RealDictCursor kabi oxirgisi olinadi
+        index = {name: i for i, name in enumerate(columns)}
+        attrs = {'__slots__': (), '_fields': tuple(index), '_index': index}
+        for name, i in index.items():
+            if name.isidentifier() and not keyword.iskeyword(name) and not hasattr(Record, name):
+                attrs[name] = property(operator.itemgetter(i))
+        cls = type('Record', (Record,), attrs)
+        _record_classes[columns] = cls
+    return cls
@@ -0,0 +1,109 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Bekor qilingan yozuvlar jonlilaridan shuncha marta ko'p bo'lsa heap qayta quriladi
+_COMPACT_RATIO = 2
+
+
+class DeadlineScheduler:
+    """Vaqt bo'yicha tartiblangan hodisalar navbati (min-heap).
+
+    Har bir kalit (masalan, vazifa ID) uchun bir nechta hodisa saqlanadi.
+    schedule() kalitning oldingi hodisalarini bekor qiladi: eski yozuvlar
+    heap'dan darhol o'chirilmaydi, versiyasi mos kelmagani uchun chiqarilganda
+    tashlab yuboriladi. Navbatga eng yaqin hodisadan oldinroq hodisa qo'shilsa
+    yoki wake() chaqirilsa, wait() kutishni to'xtatadi.
+    """
+
+    def __init__(self):
+        # (vaqt, tartib raqami, kalit, versiya, tur, ma'lumot)
+        self._heap: List[tuple] = []
+        self._versions: Dict[Hashable, int] = {}
+        # Kalit bo'yicha heap'dagi jonli hodisalar soni
+        self._counts: Dict[Hashable, int] = {}
+        self._live = 0
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def schedule(self, key: Hashable, events: Iterable[Tuple[datetime, str, Any]]):
+        """Kalit hodisalarini almashtirish: [(vaqt, tur, ma'lumot), ...]"""
+        self.cancel(key)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        for when, kind, data in events:
+            self.add(key, when, kind, data)
+
+    def add(self, key: Hashable, when: datetime, kind: str, data: Any = None):
+        """Kalitga bitta hodisa qo'shish (mavjud hodisalari saqlanadi)"""
+        version = self._versions.setdefault(key, 1)
+        entry = (when, next(self._sequence), key, version, kind, data)
+        heapq.heappush(self._heap, entry)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self._live += 1
+        # Yangi hodisa navbat boshiga tushdi - kutayotgan sikl uyg'otiladi
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable):
+        """Kalitning barcha hodisalarini bekor qilish"""
+        count = self._counts.pop(key, 0)
+        if key in self._versions:
+            self._versions[key] += 1
+        self._live -= count
+        if len(self._heap) > _COMPACT_RATIO * self._live + 64:
+            self._compact()
+
+    def _is_live(self, entry: tuple) -> bool:
+        return self._versions.get(entry[2]) == entry[3]
+
+    def _compact(self):
+        """Bekor qilingan yozuvlarni heap'dan tozalash"""
+        self._heap = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(self._heap)
+        # Heap'da yozuvi qolmagan kalitlarning versiyasi endi kerak emas
+        self._versions = {key: version for key, version in self._versions.items() if key in self._counts}
+
+    def _drop_stale(self):
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[datetime]:
+        """Eng yaqin hodisa vaqti (navbat bo'sh bo'lsa None)"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Tuple[Hashable, str, Any, datetime]]:
+        """Vaqti kelgan hodisalarni chiqarish: [(kalit, tur, ma'lumot, vaqt), ...]"""
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            when, _, key, _, kind, data = heapq.heappop(self._heap)
+            self._counts[key] -= 1
+            if not self._counts[key]:
+                del self._counts[key]
+            self._live -= 1
+            due.append((key, kind, data, when))
+
+    def wake(self):
+        """Kutayotgan siklni darhol uyg'otish"""
+        self._wakeup.set()
+
+    async def wait(self, now: datetime, max_sleep: float):
+        """Eng yaqin hodisagacha (ko'pi bilan max_sleep soniya) yoki wake() gacha kutish"""
+        delay = max_sleep
+        next_due = self.next_due()
+        if next_due is not None:
+            delay = min(delay, max(0.0, (next_due - now).total_seconds()))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def __len__(self):
+        """Navbatdagi jonli hodisalar soni"""
+        return self._live
@@ -0,0 +1,76 @@
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class Statement:
+    """Ro'yxatdan o'tgan nomli so'rov.
+
+    SQL bir marta - ro'yxatdan o'tishda tayyorlanadi: ? va %s o'rniga $1..$n
+    qo'yiladi va RETURNING borligi aniqlanadi. Server tomonda har bir
+    connection uchun bir marta PREPARE qilinadi, keyin nomi bilan EXECUTE.
+    """
+
+    __slots__ = ('name', 'query', 'sql', 'prepare_sql', 'execute_sql', 'returning', 'prepare')
+
+    def __init__(self, name: str, query: str):
+        self.name = name
+        self.query = query
+        numbered, count = translate_placeholders(query)
+        # Oddiy (prepare qilinmagan) bajarish uchun psycopg2 formati
+        self.sql = query.replace('?', '%s')
+        self.prepare_sql = f"PREPARE {name} AS {numbered}"
+        if count:
+            self.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * count)})"
+        else:
+            self.execute_sql = f"EXECUTE {name}"
+        self.returning = 'RETURNING' in query.upper()
+        # Server PREPARE ni rad etsa (masalan parametr turini aniqlab bo'lmasa) False bo'ladi
+        self.prepare = True
+
+    def __str__(self):
+        return self.sql
+
+
+# Nom -> Statement
+STATEMENTS: Dict[str, Statement] = {}
+
+
+def translate_placeholders(query: str):
+    """? va %s placeholderlarini $1..$n ga almashtirish (satr literallari ichidagilar bundan mustasno)"""
+    result = []
+    count = 0
+    in_literal = False
+    i = 0
+    while i < len(query):
+        char = query[i]
+        if char == "'":
+            in_literal = not in_literal
+            result.append(char)
+        elif not in_literal and char == '?':
+            count += 1
+            result.append(f"${count}")
+        elif not in_literal and char == '%' and query[i + 1:i + 2] == 's':
+            count += 1
+            result.append(f"${count}")
+            i += 1
+        elif not in_literal and char == '%' and query[i + 1:i + 2] == '%':
+            result.append('%')
+            i += 1
+        else:
+            result.append(char)
+        i += 1
+    return ''.join(result), count
+
+
+def statement(name: str, query: str) -> Statement:
+    """Nomli so'rovni olish (birinchi chaqiruvda ro'yxatdan o'tkaziladi)"""
+    stmt = STATEMENTS.get(name)
+    if stmt is not None:
+        if stmt.query is not query and stmt.query != query:
+            raise ValueError(f"'{name}' nomli so'rov boshqa SQL bilan ro'yxatdan o'tgan")
+        return stmt
+    stmt = Statement(name, query)
+    STATEMENTS[name] = stmt
+    return stmt
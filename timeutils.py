@@ -0,0 +1,112 @@
+import functools
+from datetime import datetime, tzinfo
+from typing import Any, Callable, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from config import DEFAULT_TIMEZONE
+
+# Botdagi standart sana formati
+DEFAULT_FORMAT = "%d.%m.%Y %H:%M"
+
+
+@functools.lru_cache(maxsize=64)
+def get_zone(name: str = DEFAULT_TIMEZONE) -> tzinfo:
+    """Vaqt zonasi obyekti (har bir nom uchun bir marta yaratiladi)"""
+    return ZoneInfo(name)
+
+
+# Standart vaqt zonasi - modul yuklanganda bir marta
+LOCAL_TZ = get_zone(DEFAULT_TIMEZONE)
+
+
+def now(tz: Optional[tzinfo] = None) -> datetime:
+    """Hozirgi vaqt (standart - mahalliy zona)"""
+    return datetime.now(tz or LOCAL_TZ)
+
+
+def to_datetime(value: Any) -> datetime:
+    """Matn yoki datetime'ni datetime'ga aylantirish"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def localize(value: Any, tz: Optional[tzinfo] = None) -> datetime:
+    """Matn/zonasiz vaqtni zonali qilish (zonasiz vaqt mahalliy deb hisoblanadi).
+
+    zoneinfo zonalari replace() bilan to'g'ri ishlaydi - pytz'dagi localize() kerak emas.
+    """
+    value = to_datetime(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=tz or LOCAL_TZ)
+    return value
+
+
+def to_local_naive(value: datetime) -> datetime:
+    """Zonali vaqtni bazadagi zonasiz (mahalliy) TIMESTAMP ustunlari bilan solishtirish uchun"""
+    if value.tzinfo is not None:
+        value = value.astimezone(LOCAL_TZ).replace(tzinfo=None)
+    return value
+
+
+def _format_default(dt: datetime) -> str:
+    """DEFAULT_FORMAT uchun tezkor yo'l (strftime chaqiruvisiz)"""
+    return f"{dt.day:02d}.{dt.month:02d}.{dt.year} {dt.hour:02d}:{dt.minute:02d}"
+
+
+def _formatter(format_str: str) -> Callable[[datetime], str]:
+    if format_str == DEFAULT_FORMAT:
+        return _format_default
+    return lambda dt: dt.strftime(format_str)
+
+
+def format_datetime(value: Any, format_str: str = DEFAULT_FORMAT) -> str:
+    """Sana va vaqtni formatlash"""
+    return _formatter(format_str)(to_datetime(value))
+
+
+def format_datetimes(values: Iterable[Any], format_str: str = DEFAULT_FORMAT,
+                     empty: Any = '') -> List[Any]:
+    """Sanalar ustunini bir chaqiruvda formatlash.
+
+    Formatlovchi bir marta tanlanadi, bir xil qiymatlar (masalan, deadline va
+    original_deadline) bir marta formatlanadi. Bo'sh qiymatlar (None, '') o'rniga
+    empty qaytariladi.
+    """
+    fmt = _formatter(format_str)
+    seen = {}
+    result = []
+    append = result.append
+    for value in values:
+        if not value:
+            append(empty)
+            continue
+        text = seen.get(value)
+        if text is None:
+            text = seen[value] = fmt(to_datetime(value))
+        append(text)
+    return result
+
+
+class TickClock:
+    """Sikl uchun qotirilgan soat: tick() har bir iteratsiya boshida bir marta
+    chaqiriladi, shu iteratsiyadagi barcha tekshiruvlar bitta "hozir" bilan ishlaydi.
+    """
+
+    __slots__ = ('_source', '_now')
+
+    def __init__(self, source: Callable[[], datetime] = now):
+        self._source = source
+        self._now: Optional[datetime] = None
+
+    def tick(self) -> datetime:
+        """Yangi iteratsiya - vaqtni yangilash"""
+        self._now = self._source()
+        return self._now
+
+    @property
+    def now(self) -> datetime:
+        """Joriy iteratsiya vaqti (tick() chaqirilmagan bo'lsa - hozirgi vaqt)"""
+        if self._now is None:
+            return self.tick()
+        return self._now
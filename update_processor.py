@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from config import UPDATE_CONCURRENCY, UPDATE_MAX_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+class UserOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Update'larni parallel, lekin har bir foydalanuvchi uchun ketma-ket qayta ishlash.
+
+    Har xil foydalanuvchilarning update'lari bir vaqtda ishlaydi (bittasining eksporti
+    boshqalarning tugmalarini to'xtatib qo'ymaydi), bitta foydalanuvchining update'lari
+    esa kelgan tartibda, biri tugagach keyingisi boshlanadi. Handlerlardagi user_states
+    lug'atlari foydalanuvchi ID'si bo'yicha yuritiladi, shuning uchun ular poyga holatiga
+    tushmaydi.
+
+    concurrency - bir vaqtda ishlaydigan handlerlar soni. Handlerlar vaqtining katta qismi
+    Telegram so'rovlarida o'tadi; DB ishi executor navbatida kutadi, connection esa faqat
+    bitta executor chaqiruvi davomida band bo'ladi. max_pending - navbatdan olingan
+    (o'z navbatini kutayotganlari bilan) update'lar chegarasi; PTB semaforini shu belgilaydi,
+    shuning uchun bitta foydalanuvchining to'plangan update'lari ishlash o'rinlarini band qilmaydi.
+    """
+
+    def __init__(self, concurrency: int = UPDATE_CONCURRENCY, max_pending: int = UPDATE_MAX_PENDING):
+        self.concurrency = max(1, concurrency)
+        # PTB faqat max_concurrent_updates > 1 bo'lsa update'larni parallel task'larda ishlatadi
+        super().__init__(max(2, self.concurrency, max_pending))
+        self._slots = asyncio.Semaphore(self.concurrency)
+        # kalit -> Lock va uni kutayotgan/ushlab turgan update'lar soni
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._holders: Dict[Hashable, int] = {}
+
+        # Metrikalar
+        self._processed = 0
+        self._running = 0
+        self._waiting = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @staticmethod
+    def update_key(update: object) -> Optional[Hashable]:
+        """Tartib kaliti: foydalanuvchi, bo'lmasa chat (None - tartib talab qilinmaydi)"""
+        if isinstance(update, Update):
+            if update.effective_user is not None:
+                return ('user', update.effective_user.id)
+            if update.effective_chat is not None:
+                return ('chat', update.effective_chat.id)
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self.update_key(update)
+        queued_at = time.monotonic()
+        started = False
+        self._waiting += 1
+        if key is not None:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = asyncio.Lock()
+            self._holders[key] = self._holders.get(key, 0) + 1
+        try:
+            # Lock FIFO - bitta foydalanuvchining update'lari navbatdan olingan tartibda ishlaydi
+            if key is not None:
+                await lock.acquire()
+            try:
+                async with self._slots:
+                    wait = time.monotonic() - queued_at
+                    self._wait_total += wait
+                    self._wait_max = max(self._wait_max, wait)
+                    self._waiting -= 1
+                    self._running += 1
+                    started = True
+                    try:
+                        await coroutine
+                    finally:
+                        self._running -= 1
+                        self._processed += 1
+            finally:
+                if key is not None:
+                    lock.release()
+        finally:
+            if not started:
+                self._waiting -= 1
+                if asyncio.iscoroutine(coroutine):
+                    # Kutish paytida bekor qilindi - "never awaited" ogohlantirishi chiqmasin
+                    coroutine.close()
+            if key is not None:
+                self._holders[key] -= 1
+                if not self._holders[key]:
+                    del self._holders[key]
+                    del self._locks[key]
+
+    async def initialize(self) -> None:
+        logger.info(f"Update'lar parallel qayta ishlanadi: {self.concurrency} ta handler, "
+                    f"navbat chegarasi {self.max_concurrent_updates}")
+
+    async def shutdown(self) -> None:
+        logger.info(f"Update processor to'xtatildi: {self.stats()}")
+
+    def stats(self) -> Dict[str, float]:
+        """Update'larni qayta ishlash metrikalarini olish"""
+        return {
+            'processed': self._processed,
+            'running': self._running,
+            'waiting': self._waiting,
+            'users': len(self._locks),
+            'wait_time_avg': round(self._wait_total / self._processed, 4) if self._processed else 0.0,
+            'wait_time_max': round(self._wait_max, 4),
+        }
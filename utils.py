@@ -1,8 +1,7 @@
-import pytz
 from datetime import datetime, timedelta
 from typing import Optional
 import ulid
-from config import DEFAULT_TIMEZONE
+import timeutils
 
 def generate_task_id() -> str:
     """Vazifa uchun unique ID yaratish"""
@@ -10,14 +9,11 @@ def generate_task_id() -> str:
 
 def get_uzbek_time() -> datetime:
     """O'zbekiston vaqtini olish"""
-    tz = pytz.timezone(DEFAULT_TIMEZONE)
-    return datetime.now(tz)
+    return timeutils.now()
 
-def format_datetime(dt: datetime, format_str: str = "%d.%m.%Y %H:%M") -> str:
+def format_datetime(dt: datetime, format_str: str = timeutils.DEFAULT_FORMAT) -> str:
     """Sana va vaqtni formatlash"""
-    if isinstance(dt, str):
-        dt = datetime.fromisoformat(dt)
-    return dt.strftime(format_str)
+    return timeutils.format_datetime(dt, format_str)
 
 def parse_datetime(date_str: str) -> Optional[datetime]:
     """Sana matnini datetime obyektiga aylantirish"""
@@ -42,25 +38,12 @@ def parse_datetime(date_str: str) -> Optional[datetime]:
 
 def is_future_datetime(dt: datetime) -> bool:
     """Kelajakdagi vaqt ekanligini tekshirish"""
-    now = get_uzbek_time()
-    
     # Agar dt timezone-siz bo'lsa, uni timezone-li qilish
-    if dt.tzinfo is None:
-        tz = pytz.timezone(DEFAULT_TIMEZONE)
-        dt = tz.localize(dt)
-    
-    return dt > now
+    return timeutils.localize(dt) > get_uzbek_time()
 
-def calculate_time_remaining(deadline: datetime) -> str:
-    """Qolgan vaqtni hisoblash"""
-    now = get_uzbek_time()
-    if isinstance(deadline, str):
-        deadline = datetime.fromisoformat(deadline)
-    
-    if deadline.tzinfo is None:
-        deadline = pytz.timezone(DEFAULT_TIMEZONE).localize(deadline)
-    
-    remaining = deadline - now
+def calculate_time_remaining(deadline: datetime, now: Optional[datetime] = None) -> str:
+    """Qolgan vaqtni hisoblash (now - siklning qotirilgan vaqti, berilmasa hozirgi vaqt)"""
+    remaining = timeutils.localize(deadline) - (now or get_uzbek_time())
     
     if remaining.total_seconds() <= 0:
         return "⏰ Muddati o'tgan"